@@ -1,17 +1,45 @@
 from crewai import Agent
-from langchain_openai import ChatOpenAI
+from prompts import build_contract_prefix
+from llm_pool import get_pool
+import functools
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+def build_llm(callbacks=None, streaming=False, contract_text=None, route=None, budget=None):
+    # Every agent model shares the pool's connections, rate limits and retry policy
+    return get_pool().chat(
+        model=route.model if route else os.getenv("OPENAI_MODEL_NAME"),
+        fallback=route.fallback if route else None,
+        budget=budget,
+        api_key=os.getenv("OPENAI_API_KEY"),
+        streaming=streaming,
+        callbacks=callbacks,
+        contract_prefix=build_contract_prefix(contract_text)
+    )
 
-llm = ChatOpenAI(
-    model=os.getenv("OPENAI_MODEL_NAME"),
-    api_key=os.getenv("OPENAI_API_KEY")
-)
+@functools.lru_cache(maxsize=1)
+def default_llm():
+    """The callback-free model shared by every agent that neither streams nor carries the contract."""
+    return build_llm()
 
 class WarRoomAgents:
-    def shark_agent(self, counter_party, aggression_mode="Professional"):
+    def __init__(self, callback_factory=None, router=None, streaming=False):
+        # callback_factory(stream_key) -> list of LangChain callbacks for that agent's model
+        self.callback_factory = callback_factory
+        # Only a live view needs token streaming; plain calls return real token usage
+        self.streaming = streaming
+        # Optional routing.Router: picks each stage's model and fallback, and tracks its budget
+        self.router = router
+
+    def _llm_for(self, stream_key, contract_text=None):
+        # contract_text becomes the shared system prefix instead of being pasted into every task
+        if not self.callback_factory and not contract_text and self.router is None:
+            return default_llm()
+        callbacks = self.callback_factory(stream_key) if self.callback_factory else None
+        route = self.router.route(stream_key) if self.router else None
+        budget = self.router.budget(stream_key) if self.router else None
+        return build_llm(callbacks=callbacks, streaming=self.streaming, contract_text=contract_text, route=route, budget=budget)
+
+    def shark_agent(self, counter_party, aggression_mode="Professional", stream_key="attack", contract_text=None, tools=None):
         # --- 1. THE DIPLOMAT (The "Wolf in Sheep's Clothing") ---
         # Strategy: Passive-Aggressive. Frames traps as "standard procedure."
         diplomat_story = f"""You are The Diplomat. You function as a sophisticated, relationship-focused negotiator 
@@ -56,12 +84,14 @@ class WarRoomAgents:
             role=f'The Shark (Advocate for {counter_party}) - Mode: {aggression_mode}',
             goal=f'Negotiate terms for {counter_party} using a {aggression_mode} strategy.',
             backstory=selected_backstory,
-            llm=llm,
+            llm=self._llm_for(stream_key, contract_text),
+            # e.g. retrieval's "Search the contract" tool when only an outline is in the prompt
+            tools=tools or [],
             verbose=True,
             allow_delegation=False
         )
 
-    def shield_agent(self, user_role):
+    def shield_agent(self, user_role, stream_key="defense", contract_text=None, tools=None):
         return Agent(
             role=f'The Shield (Advocate for {user_role})',
             goal=f'Safeguard {user_role}’s rights, ensure fairness, and minimize risk exposure by explicitly flagging threats and proposing protective alternatives.',
@@ -78,12 +108,13 @@ class WarRoomAgents:
             While protective in nature, you remain commercially realistic—you do not seek to overcorrect or render 
             the agreement impractical, but instead work to defend {user_role} through legally sound, industry-standard 
             protections.""",
-            llm=llm,
+            llm=self._llm_for(stream_key, contract_text),
+            tools=tools or [],
             verbose=True,
             allow_delegation=False
         )
 
-    def mediator_agent(self):
+    def mediator_agent(self, stream_key="verdict", contract_text=None, tools=None):
         return Agent(
             role='The Mediator (Neutral Arbiter)',
             goal='Evaluate contrasting positions to produce a final, balanced, market-standard clause that harmonizes the priorities of both parties.',
@@ -100,12 +131,28 @@ class WarRoomAgents:
             advantage and the final contract reflects a realistic, functional agreement that can withstand both 
             legal scrutiny and practical application. Your output represents the refined, optimal midpoint between 
             aggressiveness and caution, resulting in a contract that is balanced, fair, and professionally drafted.""",
-            llm=llm,
+            llm=self._llm_for(stream_key, contract_text),
+            tools=tools or [],
             verbose=True,
             allow_delegation=False
         )
     
-    def negotiator_agent(self):
+    def reviewer_agent(self, user_role, stream_key="review", contract_text=None):
+        # The fast path's only agent: low-risk contracts get one balanced review instead of a debate
+        return Agent(
+            role='The Reviewer (Fast-Track Counsel)',
+            goal=f'Confirm a low-risk contract is fair to {user_role}, fix the few clauses that need it, and coach {user_role} on raising those fixes.',
+            backstory=f"""You are The Reviewer, a pragmatic senior counsel who handles the routine agreements that
+            do not warrant a full adversarial debate. You read the contract once, with both sides' interests in mind,
+            and you know that most low-risk agreements need few or no changes. You only rewrite a clause when it
+            genuinely departs from market standard, and you keep every revision balanced and easy to accept. You then
+            give {user_role} a short, practical script for raising those revisions without straining the relationship.""",
+            llm=self._llm_for(stream_key, contract_text),
+            verbose=True,
+            allow_delegation=False
+        )
+
+    def negotiator_agent(self, stream_key="negotiation"):
         return Agent(
             role='The Negotiator (Strategic Coach)',
             goal='Equip the user with a psychological and tactical playbook to win the acceptance of the Final Verdict clauses.',
@@ -116,7 +163,7 @@ class WarRoomAgents:
             You anticipate the emotional and logical pushback from the Counterparty and provide the User 
             with bulletproof rebuttals. Your output is not legal text, but a dialogue guide, offering specific 
             phrasing, psychological cues, and leverage points to help the User close the deal without blowing up the relationship.""",
-            llm=llm,
+            llm=self._llm_for(stream_key),
             verbose=True,
             allow_delegation=False
         )
\ No newline at end of file
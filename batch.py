@@ -0,0 +1,190 @@
+"""
+Headless batch runner: pushes every PDF in a directory through extraction,
+risk analysis and the full agent pipeline on a bounded worker pool. Every finished
+contract is also added to the searchable run history (history.py).
+
+A manifest in the output directory records each file's hash and status, so an
+interrupted batch picks up where it stopped instead of redoing finished files.
+
+Usage:
+    python batch.py contracts/ results/ --workers 4 --aggression Professional
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+
+# Before the imports below, which read their settings from the environment
+load_dotenv()
+
+from extraction import read_pdf_bytes, file_hash, get_pdf_text, PAGE_BUDGET
+from utils import analyze_contract
+from clause_parser import parse_verdict
+from crew import WarRoomCrew, SINGLE_PASS_CHARS
+from telemetry import RunMetrics
+from history import run_history
+import logsink
+
+MANIFEST_NAME = "manifest.json"
+
+
+class JobManifest:
+    """JSON manifest of per-file status, rewritten atomically after every change."""
+    def __init__(self, output_dir):
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self._lock = threading.Lock()
+        self.data = {"files": {}}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.data = json.load(f)
+
+    def is_done(self, name, digest, output_dir):
+        entry = self.data["files"].get(name)
+        return bool(
+            entry and entry.get("status") == "done" and entry.get("sha256") == digest
+            and os.path.exists(os.path.join(output_dir, entry.get("result", "")))
+        )
+
+    def update(self, name, **fields):
+        with self._lock:
+            self.data["files"].setdefault(name, {}).update(fields)
+            self._save()
+
+    def set_summary(self, **fields):
+        with self._lock:
+            self.data["last_batch"] = fields
+            self._save()
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def process_contract(path, output_dir, aggression_mode, page_budget, fast_path=True, max_rounds=1):
+    """Runs one contract end to end and writes <name>.json (and <name>.log) to output_dir."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    pdf_bytes = read_pdf_bytes(path)
+    metrics = RunMetrics(source=os.path.basename(path))
+
+    with open(os.path.join(output_dir, f"{stem}.log"), "w", encoding="utf-8") as log_file:
+        with logsink.bind(log_file):
+            # 1. Extraction & analysis
+            with metrics.stage("extraction"):
+                text = get_pdf_text(pdf_bytes, page_budget=page_budget)
+            if not text.strip():
+                raise ValueError("No extractable text (scanned PDF?)")
+            analysis = analyze_contract(text[:10000], metrics)
+            roles = analysis.get("roles", {})
+
+            # 2. Agents (long contracts go through the chunked map-reduce path)
+            use_chunks = len(text) > SINGLE_PASS_CHARS
+            war_room = WarRoomCrew(
+                text,
+                roles.get("user_role", "The User"),
+                roles.get("counter_party", "The Counterparty"),
+                aggression_mode,
+                chunked=use_chunks,
+                metrics=metrics,
+                risk_scores=analysis.get("risk_scores"),
+                fast_path=fast_path,
+                max_rounds=max_rounds
+            )
+            results = war_room.run()
+
+    record = {
+        "file": os.path.basename(path),
+        "sha256": file_hash(pdf_bytes),
+        "characters": len(text),
+        "chunked": use_chunks,
+        "fast_path": war_room.fast_path_reason,
+        "rounds": war_room.rounds,
+        "analysis": analysis,
+        "results": results,
+        "clause_changes": [change._asdict() for change in parse_verdict(results.get("final_verdict", ""))[0]],
+        "metrics": metrics.summary()
+    }
+    # Batch runs can be searched and reopened from the app's Case History too
+    run_history.record(
+        os.path.basename(path), text, analysis, results, record["clause_changes"], record["metrics"],
+        aggression_mode, {"fast_path": record["fast_path"], "rounds": record["rounds"]}
+    )
+    result_name = f"{stem}.json"
+    with open(os.path.join(output_dir, result_name), "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2)
+    return result_name
+
+
+def run_batch(input_dir, output_dir, workers=4, aggression_mode="Professional", page_budget=PAGE_BUDGET, fast_path=True, max_rounds=1):
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = JobManifest(output_dir)
+
+    pending = []
+    skipped = 0
+    for name in sorted(os.listdir(input_dir)):
+        if not name.lower().endswith(".pdf"):
+            continue
+        path = os.path.join(input_dir, name)
+        digest = file_hash(read_pdf_bytes(path))
+        if manifest.is_done(name, digest, output_dir):
+            skipped += 1
+            continue
+        manifest.update(name, sha256=digest, status="pending", error=None)
+        pending.append(path)
+
+    print(f"📁 {len(pending)} contracts to process, {skipped} already done.")
+
+    def job(path):
+        name = os.path.basename(path)
+        manifest.update(name, status="running", started_at=time.time())
+        start = time.perf_counter()
+        try:
+            result_name = process_contract(path, output_dir, aggression_mode, page_budget, fast_path, max_rounds)
+            manifest.update(name, status="done", result=result_name, seconds=round(time.perf_counter() - start, 2))
+            return True
+        except Exception as e:
+            manifest.update(name, status="failed", error=str(e), seconds=round(time.perf_counter() - start, 2))
+            print(f"❌ {name}: {e}")
+            return False
+
+    batch_start = time.perf_counter()
+    succeeded = failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(job, path): path for path in pending}
+        for future in as_completed(futures):
+            if future.result():
+                succeeded += 1
+                print(f"✅ {os.path.basename(futures[future])} ({succeeded + failed}/{len(pending)})")
+            else:
+                failed += 1
+
+    elapsed = time.perf_counter() - batch_start
+    per_hour = succeeded / elapsed * 3600 if elapsed > 0 else 0.0
+    manifest.set_summary(
+        finished_at=time.time(),
+        processed=succeeded,
+        failed=failed,
+        skipped=skipped,
+        seconds=round(elapsed, 2),
+        contracts_per_hour=round(per_hour, 1)
+    )
+    print(f"🏁 {succeeded} done, {failed} failed, {skipped} skipped in {elapsed:.1f}s ({per_hour:.1f} contracts/hour)")
+    return manifest.data
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="The War Room - headless batch negotiation")
+    parser.add_argument("input_dir", help="Directory containing PDF contracts")
+    parser.add_argument("output_dir", help="Where per-contract JSON results and the manifest go")
+    parser.add_argument("--workers", type=int, default=4, help="Contracts processed concurrently")
+    parser.add_argument("--aggression", default="Professional", choices=["Diplomat", "Professional", "Killer"])
+    parser.add_argument("--page-budget", type=int, default=PAGE_BUDGET)
+    parser.add_argument("--rounds", type=int, default=1, help="Max debate rounds; stops early once the verdict converges")
+    parser.add_argument("--full-debate", action="store_true", help="Run the full debate even on low-risk contracts")
+    args = parser.parse_args()
+
+    run_batch(args.input_dir, args.output_dir, args.workers, args.aggression, args.page_budget, not args.full_debate, args.rounds)
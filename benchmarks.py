@@ -0,0 +1,752 @@
+"""
+Offline performance benchmarks for The War Room.
+
+Nothing here touches the network: every LLM call goes to mock_openai_server,
+which answers deterministically with configurable latency and token rate.
+
+Usage:
+    python benchmarks.py                          # run every suite
+    python benchmarks.py pdf redline              # run selected suites
+    python benchmarks.py --json bench.json        # save results, tagged with the git commit
+    python benchmarks.py --compare bench.json     # print the change against a saved run
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+# Keep benchmark caches and metrics away from the app's real ones
+BENCH_DIR = os.path.join(tempfile.gettempdir(), "warroom_bench")
+os.environ.setdefault("WARROOM_CACHE_DIR", os.path.join(BENCH_DIR, "cache"))
+os.environ.setdefault("WARROOM_METRICS_PATH", os.path.join(BENCH_DIR, "metrics.jsonl"))
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.makedirs(BENCH_DIR, exist_ok=True)
+
+from fpdf import FPDF
+
+CLAUSE = (
+    "The Service Provider shall indemnify, defend and hold harmless the Client and its affiliates "
+    "from and against any and all claims, losses, damages, liabilities, costs and expenses arising "
+    "out of or relating to any breach of this Agreement. "
+)
+
+
+def make_synthetic_contract(clauses):
+    """Numbered boilerplate clauses, roughly 400 characters each."""
+    return "\n\n".join(f"{n + 1}. {CLAUSE * 2}" for n in range(clauses))
+
+
+def make_synthetic_pdf(pages, paragraphs_per_page=6):
+    """Builds an in-memory multi-page contract PDF."""
+    pdf = FPDF()
+    pdf.set_font("Arial", size=10)
+    for page in range(pages):
+        pdf.add_page()
+        for paragraph in range(paragraphs_per_page):
+            pdf.multi_cell(0, 5, f"{page + 1}.{paragraph + 1} {CLAUSE * 2}")
+    return pdf.output(dest='S').encode('latin-1')
+
+
+def make_clause_pair(words, edit_rate=0.05, seed=7):
+    """A long clause and a revision with scattered word substitutions and insertions."""
+    rng = random.Random(seed)
+    vocabulary = CLAUSE.split()
+    original = [vocabulary[i % len(vocabulary)] for i in range(words)]
+    revised = []
+    for word in original:
+        roll = rng.random()
+        if roll < edit_rate / 2:
+            revised.append(word.upper())
+        elif roll < edit_rate:
+            revised.extend([word, "reasonably"])
+        else:
+            revised.append(word)
+    return " ".join(original), " ".join(revised)
+
+
+def make_varied_contract(clauses, seed=11):
+    """Boilerplate clauses that differ only in a few terms (fees, days, parties), like real contracts."""
+    rng = random.Random(seed)
+    parties = ["the Client", "the Service Provider", "the Licensor", "the Licensee", "each Subcontractor"]
+    return [
+        f"{n + 1}. {CLAUSE}The fee for deliverable {n + 1} is {rng.randint(1, 900) * 1000} dollars, payable by "
+        f"{rng.choice(parties)} within {rng.randint(10, 90)} days of invoice. {CLAUSE}"
+        for n in range(clauses)
+    ]
+
+
+def misquote(clause, rng):
+    """How a model tends to quote a clause: case and punctuation drift plus a swapped word."""
+    words = clause.replace(",", "").split()
+    words[rng.randrange(len(words))] = "reasonably"
+    return " ".join(words).lower()
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def bench_pdf(page_counts=(30, 150, 400)):
+    from extraction import get_pdf_text, page_cache
+
+    results = []
+    for pages in page_counts:
+        pdf_bytes = make_synthetic_pdf(pages)
+        page_cache.clear()
+
+        serial_s, _ = timed(get_pdf_text, pdf_bytes, page_budget=pages, workers=1, use_cache=False)
+        parallel_s, _ = timed(get_pdf_text, pdf_bytes, page_budget=pages, use_cache=True)
+        cached_s, _ = timed(get_pdf_text, pdf_bytes, page_budget=pages, use_cache=True)
+
+        for mode, seconds in (("serial", serial_s), ("parallel", parallel_s), ("cached", cached_s)):
+            results.append({
+                "suite": "pdf",
+                "case": f"{pages}p/{mode}",
+                "seconds": round(seconds, 4),
+                "pages_per_second": round(pages / seconds, 1)
+            })
+    return results
+
+
+def bench_redline(word_counts=(1000, 10000, 20000, 50000)):
+    import difflib
+    from redline import diff_words
+    from utils import get_redline_html
+
+    def difflib_opcodes(a, b):
+        # The engine get_redline_html used before redline.py (default autojunk)
+        return difflib.SequenceMatcher(None, a, b).get_opcodes()
+
+    results = []
+    for words in word_counts:
+        original, revised = make_clause_pair(words)
+        a, b = original.split(), revised.split()
+        for engine, diff in (("difflib", difflib_opcodes), ("redline", diff_words)):
+            seconds, ops = timed(diff, a, b)
+            results.append({
+                "suite": "redline",
+                "case": f"{words}w/{engine}",
+                "seconds": round(seconds, 4),
+                # Words shown as changed; lower is a tighter alignment (true edits are ~5%)
+                "marked_words": sum(i2 - i1 + j2 - j1 for tag, i1, i2, j1, j2 in ops if tag != "equal")
+            })
+        seconds, html = timed(get_redline_html, original, revised)
+        results.append({
+            "suite": "redline",
+            "case": f"{words}w/html",
+            "seconds": round(seconds, 4),
+            "html_kb": round(len(html) / 1024, 1)
+        })
+    return results
+
+
+def bench_pipeline(latency=0.05, tokens_per_second=500, clauses=40, long_clauses=200):
+    from mock_openai_server import start_mock_server
+
+    server, state, base_url = start_mock_server(latency=latency, tokens_per_second=tokens_per_second)
+    os.environ.update({"OPENAI_API_BASE": base_url, "OPENAI_API_KEY": "mock", "OPENAI_MODEL_NAME": "gpt-4o-mini"})
+
+    from crew import WarRoomCrew, checkpoint_cache
+    from utils import analyze_contract, analysis_cache
+
+    contract = make_synthetic_contract(clauses)
+    long_contract = make_synthetic_contract(long_clauses)
+    analysis_cache.clear()
+    checkpoint_cache.clear()
+
+    cases = [
+        ("analysis/cold", lambda: analyze_contract(contract)),
+        ("analysis/cached", lambda: analyze_contract(contract)),
+        ("crew/single", lambda: WarRoomCrew(contract, "Tenant", "Landlord", use_checkpoints=False).run()),
+        ("crew/chunked", lambda: WarRoomCrew(long_contract, "Tenant", "Landlord", use_checkpoints=False, chunked=True).run()),
+        ("crew/checkpointed-cold", lambda: WarRoomCrew(contract, "Tenant", "Landlord").run()),
+        ("crew/checkpointed-warm", lambda: WarRoomCrew(contract, "Tenant", "Landlord").run()),
+    ]
+
+    results = []
+    original_stdout = sys.stdout
+    try:
+        for name, fn in cases:
+            state.requests, state.busy_seconds = 0, 0.0
+            sys.stdout = open(os.devnull, "w")  # CrewAI is verbose
+            try:
+                seconds, _ = timed(fn)
+            finally:
+                sys.stdout.close()
+                sys.stdout = original_stdout
+            results.append({
+                "suite": "pipeline",
+                "case": name,
+                "seconds": round(seconds, 4),
+                "llm_calls": state.requests,
+                "mock_llm_seconds": round(state.busy_seconds, 4),
+                # For sequential cases this is pure framework/app overhead on top of the model
+                "overhead_seconds": round(max(0.0, seconds - state.busy_seconds), 4)
+            })
+    finally:
+        server.shutdown()
+    return results
+
+
+def bench_revision(clause_counts=(60, 500), quotes=40):
+    """Locating misquoted ORIGINAL clauses in a contract (500 clauses is about 100 pages)."""
+    from clause_parser import ClauseChange
+    from revision import ClauseIndex, apply_revisions
+
+    results = []
+    for clauses in clause_counts:
+        rng = random.Random(clauses)
+        parts = make_varied_contract(clauses)
+        contract = "\n\n".join(parts)
+        picked = rng.sample(range(clauses), min(quotes, clauses))
+        quoted = [misquote(parts[n], rng) for n in picked]
+
+        # Naive: look each quote up verbatim
+        seconds, found = timed(lambda: [contract.find(q) != -1 for q in quoted])
+        results.append({"suite": "revision", "case": f"{clauses}c/naive-find", "seconds": round(seconds, 4), "located": sum(found), "quotes": len(quoted)})
+
+        build_seconds, index = timed(ClauseIndex, contract)
+        seconds, matches = timed(lambda: [index.locate(q) for q in quoted])
+        correct = sum(1 for n, m in zip(picked, matches) if m and contract[m.start:m.end].startswith(f"{n + 1}."))
+        results.append({"suite": "revision", "case": f"{clauses}c/index", "seconds": round(seconds, 4), "build_s": round(build_seconds, 4), "located": correct, "quotes": len(quoted)})
+
+        changes = [ClauseChange(q, f"Revised clause {n + 1}.", "", 0, 0) for n, q in zip(picked, quoted)]
+        seconds, revised = timed(apply_revisions, contract, changes)
+        results.append({"suite": "revision", "case": f"{clauses}c/apply", "seconds": round(seconds, 4), "applied": len(revised.applied)})
+    return results
+
+
+def bench_versions(clauses=40, edits=3, long_clauses=500):
+    """A counterparty's v2 with a few edited clauses: full re-run vs incremental re-negotiation."""
+    from clauses import chunk_contract
+    from mock_openai_server import start_mock_server
+    from versions import VersionStore, diff_versions
+
+    # 1. Chunk stability: groups of a long contract that survive the same edits
+    parts = make_varied_contract(long_clauses)
+    edited = list(parts)
+    rng = random.Random(5)
+    # Edits fall in the first `clauses` clauses, so the pipeline cases below see them too
+    for n in rng.sample(range(clauses), edits):
+        edited[n] = edited[n].replace("payable by", "payable in advance by")
+    old_groups = chunk_contract("\n\n".join(parts), 8000)
+    new_groups = chunk_contract("\n\n".join(edited), 8000)
+    seconds, diff = timed(diff_versions, parts, edited)
+    results = [{
+        "suite": "versions",
+        "case": f"{long_clauses}c/chunks",
+        "seconds": round(seconds, 4),
+        "changed_clauses": len(diff.changed),
+        "groups": len(new_groups),
+        "groups_reused": len(set(new_groups) & set(old_groups))
+    }]
+
+    # 2. Pipeline cost of v2
+    server, state, base_url = start_mock_server(latency=0.05, tokens_per_second=2000)
+    os.environ.update({"OPENAI_API_BASE": base_url, "OPENAI_API_KEY": "mock", "OPENAI_MODEL_NAME": "gpt-4o-mini"})
+    from crew import WarRoomCrew
+
+    store = VersionStore("bench_versions", directory=os.path.join(BENCH_DIR, "cache"))
+    store.clear()
+    v1 = "\n\n".join(parts[:clauses])
+    v2 = "\n\n".join(edited[:clauses])
+    cases = [
+        ("v1/full", lambda: WarRoomCrew(v1, "Tenant", "Landlord", use_checkpoints=False, versions=store).run()),
+        ("v2/full", lambda: WarRoomCrew(v2, "Tenant", "Landlord", use_checkpoints=False).run()),
+        ("v2/incremental", lambda: WarRoomCrew(v2, "Tenant", "Landlord", use_checkpoints=False, versions=store).run()),
+    ]
+    original_stdout = sys.stdout
+    try:
+        for name, fn in cases:
+            state.requests, state.prompt_tokens = 0, 0
+            sys.stdout = open(os.devnull, "w")  # CrewAI is verbose
+            try:
+                seconds, _ = timed(fn)
+            finally:
+                sys.stdout.close()
+                sys.stdout = original_stdout
+            results.append({
+                "suite": "versions",
+                "case": name,
+                "seconds": round(seconds, 4),
+                "llm_calls": state.requests,
+                "prompt_tokens": state.prompt_tokens
+            })
+    finally:
+        server.shutdown()
+    return results
+
+
+RISKY_CLAUSES = [
+    "The Landlord may enter the premises at any time without notice.",
+    "The Tenant shall indemnify and hold the Landlord harmless, and the Tenant's liability shall not be limited.",
+    "The Landlord may terminate this Agreement at any time for convenience, at its sole discretion.",
+    "Any late payment incurs a penalty of ten percent and the Landlord may retain the security deposit.",
+]
+
+
+def make_risky_contract(clauses, seed=13):
+    """A varied contract with the risky clauses above planted at random positions."""
+    rng = random.Random(seed)
+    parts = make_varied_contract(clauses)
+    for n, clause in enumerate(RISKY_CLAUSES):
+        parts.insert(rng.randrange(len(parts)), f"{clauses + n + 1}. {clause}")
+    return "\n\n".join(parts)
+
+
+def bench_screen(clauses=500, pipeline_clauses=200, top_k=25):
+    """Local risk scan on ~100 pages, then a long contract through chunked vs pre-screened pipelines."""
+    from mock_openai_server import start_mock_server
+    from screener import screen_contract, top_risks
+
+    contract = make_risky_contract(clauses)
+    seconds, screening = timed(screen_contract, contract, top_k)
+    planted = sum(1 for risk in top_risks(contract, len(RISKY_CLAUSES)) if any(c in contract[risk.start:risk.end] for c in RISKY_CLAUSES))
+    results = [{
+        "suite": "screen",
+        "case": f"{clauses}c/scan",
+        "seconds": round(seconds, 4),
+        "clauses": screening.clauses,
+        "kept_share": round(screening.kept_share, 3),
+        "planted_in_top": f"{planted}/{len(RISKY_CLAUSES)}"
+    }]
+
+    server, state, base_url = start_mock_server(latency=0.05, tokens_per_second=2000)
+    os.environ.update({"OPENAI_API_BASE": base_url, "OPENAI_API_KEY": "mock", "OPENAI_MODEL_NAME": "gpt-4o-mini"})
+    from crew import WarRoomCrew
+
+    long_contract = make_risky_contract(pipeline_clauses)
+    cases = [
+        ("crew/chunked", lambda: WarRoomCrew(long_contract, "Tenant", "Landlord", use_checkpoints=False, chunked=True).run()),
+        ("crew/screened", lambda: WarRoomCrew(long_contract, "Tenant", "Landlord", use_checkpoints=False, screen_top_k=top_k).run()),
+    ]
+    original_stdout = sys.stdout
+    try:
+        for name, fn in cases:
+            state.requests, state.prompt_tokens = 0, 0
+            sys.stdout = open(os.devnull, "w")  # CrewAI is verbose
+            try:
+                seconds, _ = timed(fn)
+            finally:
+                sys.stdout.close()
+                sys.stdout = original_stdout
+            results.append({
+                "suite": "screen",
+                "case": name,
+                "seconds": round(seconds, 4),
+                "llm_calls": state.requests,
+                "prompt_tokens": state.prompt_tokens
+            })
+    finally:
+        server.shutdown()
+    return results
+
+
+ROUTING_CASES = [
+    ("one-model/gpt-4o", {"default": {"model": "gpt-4o"}}),
+    ("routed", {
+        "default": {"model": "gpt-4o-mini"},
+        "attack": {"model": "gpt-4.1-nano"},
+        "verdict": {"model": "gpt-4o"}
+    }),
+    # The Mediator's budget is smaller than its prompt, so the fallback serves every call
+    ("routed/verdict-over-budget", {
+        "default": {"model": "gpt-4o-mini"},
+        "attack": {"model": "gpt-4.1-nano"},
+        "verdict": {"model": "gpt-4o", "fallback": "gpt-4o-mini", "max_seconds": 60, "max_tokens": 2000}
+    }),
+]
+
+
+def bench_routing(clauses=40, cases=ROUTING_CASES):
+    """One negotiation under different per-stage model routes: estimated cost and who served each stage."""
+    from mock_openai_server import start_mock_server
+    from routing import load_routes
+
+    server, state, base_url = start_mock_server(latency=0.05, tokens_per_second=2000)
+    os.environ.update({"OPENAI_API_BASE": base_url, "OPENAI_API_KEY": "mock", "OPENAI_MODEL_NAME": "gpt-4o-mini"})
+    from crew import WarRoomCrew
+
+    contract = make_synthetic_contract(clauses)
+    results = []
+    original_stdout = sys.stdout
+    try:
+        for name, config in cases:
+            war_room = WarRoomCrew(contract, "Tenant", "Landlord", use_checkpoints=False, routes=load_routes(config))
+            sys.stdout = open(os.devnull, "w")  # CrewAI is verbose
+            try:
+                seconds, _ = timed(war_room.run)
+            finally:
+                sys.stdout.close()
+                sys.stdout = original_stdout
+            summary = war_room.metrics.summary()
+            results.append({
+                "suite": "routing",
+                "case": name,
+                "seconds": round(seconds, 4),
+                "prompt_tokens": summary["totals"]["prompt_tokens"],
+                "cost_usd": round(summary["totals"]["cost_usd"], 5),
+                "fallback_calls": sum(stage["fallback_calls"] for stage in summary["stages"].values()),
+                "models": "/".join(stage["fallback_model"] or stage["model"] for stage in summary["stages"].values())
+            })
+    finally:
+        server.shutdown()
+    return results
+
+
+LOW_RISK_SCORES = {"liability_score": 15, "financial_risk": 10, "unfairness_score": 20, "summary": "Standard mutual NDA."}
+
+
+def bench_fastpath(clauses=40):
+    """A low-risk contract through the full debate and through the single-review fast path."""
+    from mock_openai_server import start_mock_server
+
+    server, state, base_url = start_mock_server(latency=0.05, tokens_per_second=500)
+    os.environ.update({"OPENAI_API_BASE": base_url, "OPENAI_API_KEY": "mock", "OPENAI_MODEL_NAME": "gpt-4o-mini"})
+    from crew import WarRoomCrew
+
+    contract = make_synthetic_contract(clauses)
+    results = []
+    original_stdout = sys.stdout
+    try:
+        for name, fast_path in (("full-debate", False), ("fast-path", True)):
+            war_room = WarRoomCrew(contract, "Receiving Party", "Disclosing Party", use_checkpoints=False, risk_scores=LOW_RISK_SCORES, fast_path=fast_path)
+            state.requests = 0
+            sys.stdout = open(os.devnull, "w")  # CrewAI is verbose
+            try:
+                seconds, _ = timed(war_room.run)
+            finally:
+                sys.stdout.close()
+                sys.stdout = original_stdout
+            results.append({
+                "suite": "fastpath",
+                "case": name,
+                "seconds": round(seconds, 4),
+                "llm_calls": state.requests,
+                "cost_usd": round(war_room.metrics.summary()["totals"]["cost_usd"], 5)
+            })
+    finally:
+        server.shutdown()
+    return results
+
+
+def bench_debate(clauses=40, max_rounds=4):
+    """Multi-round debate: every round run, against stopping once the verdict's revisions converge."""
+    from mock_openai_server import start_mock_server
+
+    server, state, base_url = start_mock_server(latency=0.05, tokens_per_second=2000)
+    os.environ.update({"OPENAI_API_BASE": base_url, "OPENAI_API_KEY": "mock", "OPENAI_MODEL_NAME": "gpt-4o-mini"})
+    from crew import WarRoomCrew
+
+    contract = make_synthetic_contract(clauses)
+    # Similarity never exceeds 1, so a threshold above it disables early stopping
+    cases = [("1-round", 1, 1.0), (f"{max_rounds}-rounds/fixed", max_rounds, 1.01), (f"{max_rounds}-rounds/converge", max_rounds, 0.9)]
+    results = []
+    original_stdout = sys.stdout
+    try:
+        for name, rounds, convergence in cases:
+            war_room = WarRoomCrew(contract, "Tenant", "Landlord", use_checkpoints=False, max_rounds=rounds, convergence=convergence)
+            state.requests = 0
+            sys.stdout = open(os.devnull, "w")  # CrewAI is verbose
+            try:
+                seconds, _ = timed(war_room.run)
+            finally:
+                sys.stdout.close()
+                sys.stdout = original_stdout
+            results.append({
+                "suite": "debate",
+                "case": name,
+                "seconds": round(seconds, 4),
+                "rounds_run": len(war_room.rounds) or 1,
+                "llm_calls": state.requests,
+                "cost_usd": round(war_room.metrics.summary()["totals"]["cost_usd"], 5)
+            })
+    finally:
+        server.shutdown()
+    return results
+
+
+HISTORY_QUERIES = ["unlimited indemnity", "subcontractor invoice", "licensee fee", "termination without notice"]
+
+
+def bench_history(runs=5000, queries=HISTORY_QUERIES):
+    """Fills a scratch run history with synthetic negotiations, then times full-text search and reopening."""
+    from history import RunHistory
+
+    rng = random.Random(3)
+    clauses = make_varied_contract(60)
+    history = RunHistory("bench_history", directory=BENCH_DIR)
+    history.clear()
+    analysis = {"roles": {"contract_type": "Service Agreement"}, "risk_scores": {"liability_score": 50}}
+
+    start = time.perf_counter()
+    for n in range(runs):
+        picked = rng.sample(clauses, 4)
+        changes = [{"original": clause, "revised": misquote(clause, rng), "explanation": "Caps the indemnity."} for clause in picked]
+        # One run in ten countered an unlimited indemnity
+        if n % 10 == 0:
+            changes[0]["original"] += " The Client's liability under this indemnity shall be unlimited."
+        verdict = "## Final Verdict\n" + " ".join(picked)
+        results = {"shark_report": picked[0], "shield_report": picked[1], "final_verdict": verdict, "negotiation_strategy": picked[2]}
+        history.record(f"contract_{n}.pdf", "\n\n".join(picked), analysis, results, changes, aggression_mode="Professional")
+    record_s = time.perf_counter() - start
+
+    results = [{
+        "suite": "history",
+        "case": f"record/{runs}",
+        "seconds": round(record_s, 4),
+        "runs_per_second": round(runs / record_s, 1),
+        "db_mb": round(os.path.getsize(history.path) / 1e6, 1)
+    }]
+    for query in queries:
+        seconds, hits = timed(history.search, query)
+        results.append({"suite": "history", "case": f"search/{query}", "seconds": round(seconds, 4), "hits": len(hits)})
+    seconds, _ = timed(history.search, "unlimited indemnity", time.time() - 90 * 86400)
+    results.append({"suite": "history", "case": "search/last-quarter", "seconds": round(seconds, 4)})
+    seconds, _ = timed(history.get, runs // 2)
+    results.append({"suite": "history", "case": "reopen", "seconds": round(seconds, 4)})
+    return results
+
+
+RISKY_QUERIES = [
+    "landlord enter premises notice",
+    "indemnify hold harmless liability limited",
+    "terminate agreement convenience discretion",
+    "late payment penalty security deposit",
+]
+
+
+def bench_retrieval(clause_counts=(50, 200, 500, 2000), queries=RISKY_QUERIES):
+    """BM25 index build and query time, and what the agents are sent, as the contract grows."""
+    from retrieval import ClauseRetriever
+
+    results = []
+    for clauses in clause_counts:
+        contract = make_risky_contract(clauses)
+        build_seconds, retriever = timed(ClauseRetriever, contract)
+        start = time.perf_counter()
+        top = [retriever.search(query, 1) for query in queries]
+        query_seconds = (time.perf_counter() - start) / len(queries)
+        hits = sum(1 for hit, clause in zip(top, RISKY_CLAUSES) if hit and clause in retriever.clause(hit[0][0]))
+        results.append({
+            "suite": "retrieval",
+            "case": f"{clauses}c",
+            "seconds": round(build_seconds, 4),
+            "query_ms": round(query_seconds * 1000, 3),
+            "top1_hits": f"{hits}/{len(queries)}",
+            # Same len/4 estimate as the mock server
+            "full_text_tokens": len(contract) // 4,
+            "outline_tokens": len(retriever.outline()) // 4,
+            "tool_result_tokens": max(len(retriever.format_results(query)) for query in queries) // 4
+        })
+    return results
+
+
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file(sys.argv[1], default_timeout=120)
+app.run()
+cold = time.perf_counter() - start
+start = time.perf_counter()
+app.run()
+rerun = time.perf_counter() - start
+start = time.perf_counter()
+app.sidebar.select_slider[0].set_value("Killer").run()
+widget = time.perf_counter() - start
+print(json.dumps({"cold": cold, "rerun": rerun, "widget": widget, "crewai_loaded": "crewai" in sys.modules, "errors": len(app.exception)}))
+"""
+
+
+def bench_startup(reruns=5):
+    """The Streamlit page in a fresh interpreter: cold start, plain reruns and a slider change."""
+    env = dict(os.environ, OPENAI_API_KEY=os.getenv("OPENAI_API_KEY", "mock"), OPENAI_MODEL_NAME="gpt-4o-mini", OTEL_SDK_DISABLED="true")
+    runs = []
+    for _ in range(reruns):
+        output = subprocess.check_output(
+            [sys.executable, "-c", STARTUP_SCRIPT, os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")],
+            env=env, text=True, stderr=subprocess.DEVNULL
+        )
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    results = []
+    for case, key in (("cold-start", "cold"), ("rerun", "rerun"), ("widget-change", "widget")):
+        results.append({
+            "suite": "startup",
+            "case": case,
+            "seconds": round(sorted(run[key] for run in runs)[len(runs) // 2], 4),  # median
+            "crewai_loaded": runs[-1]["crewai_loaded"],
+            "errors": runs[-1]["errors"]
+        })
+    return results
+
+
+RENDER_SCRIPT = """
+import json, os, random, sys, time
+sys.path.insert(0, os.path.dirname(sys.argv[1]))
+from benchmarks import make_synthetic_pdf, make_varied_contract, misquote
+from streamlit.testing.v1 import AppTest
+
+clauses, changes = int(sys.argv[2]), int(sys.argv[3])
+contract = make_varied_contract(clauses)
+rng = random.Random(5)
+blocks = [
+    f"---CLAUSE_COMPARISON_START---\\nORIGINAL: {clause}\\nREVISED: {misquote(clause, rng)}\\nEXPLANATION: Balanced.\\n---CLAUSE_COMPARISON_END---"
+    for clause in rng.sample(contract, changes)
+]
+app = AppTest.from_file(sys.argv[1], default_timeout=300)
+# A finished negotiation, as main.py keeps it in the session
+app.session_state["contract_text"] = "\\n\\n".join(contract)
+app.session_state["roles"] = {"user_role": "Tenant", "counter_party": "Landlord"}
+app.session_state["risk_scores"] = {"liability_score": 80, "summary": "Uncapped indemnity."}
+app.session_state["simulation_results"] = {
+    "shark_report": "Demand. " * 3000,
+    "shield_report": "Protect. " * 3000,
+    "final_verdict": "Balanced. " * 2000 + "\\n\\n" + "\\n\\n".join(blocks),
+    "negotiation_strategy": "Ask. " * 3000
+}
+app.run()
+app.file_uploader[0].set_value(("contract.pdf", make_synthetic_pdf(1), "application/pdf"))
+start = time.perf_counter()
+app.run()
+first = time.perf_counter() - start
+reruns = []
+for _ in range(5):
+    start = time.perf_counter()
+    app.run()
+    reruns.append(time.perf_counter() - start)
+start = time.perf_counter()
+app.sidebar.select_slider[0].set_value("Killer").run()
+widget = time.perf_counter() - start
+print(json.dumps({"first": first, "rerun": sorted(reruns)[len(reruns) // 2], "widget": widget, "errors": len(app.exception)}))
+"""
+
+
+def bench_render(clauses=500, changes=40):
+    """The results page of a finished negotiation: first paint, then reruns that should hit the render caches."""
+    env = dict(os.environ, OPENAI_API_KEY=os.getenv("OPENAI_API_KEY", "mock"), OPENAI_MODEL_NAME="gpt-4o-mini", OTEL_SDK_DISABLED="true")
+    output = subprocess.check_output(
+        [sys.executable, "-c", RENDER_SCRIPT, os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py"), str(clauses), str(changes)],
+        env=env, text=True, stderr=subprocess.DEVNULL
+    )
+    run = json.loads(output.strip().splitlines()[-1])
+    return [
+        {"suite": "render", "case": f"{clauses}c-{changes}ch/{case}", "seconds": round(run[key], 4), "errors": run["errors"]}
+        for case, key in (("first-paint", "first"), ("rerun", "rerun"), ("widget-change", "widget"))
+    ]
+
+
+def bench_ratelimit(requests=40, concurrency=16, rpm=600):
+    """Concurrent calls against a mock provider that answers 429 above `rpm`."""
+    from concurrent.futures import ThreadPoolExecutor
+    from mock_openai_server import start_mock_server
+    from llm_pool import LLMPool
+
+    cases = [
+        # Client-side pacing off: bursts run into 429s and rely on backoff alone
+        ("burst", LLMPool(rpm=1_000_000, tpm=1_000_000_000, max_retries=8)),
+        # Token buckets set just under the provider's limit
+        ("paced", LLMPool(rpm=int(rpm * 0.9), tpm=1_000_000_000, max_retries=8, burst_seconds=0.1)),
+    ]
+
+    results = []
+    original_stdout = sys.stdout
+    for name, pool in cases:
+        # A fresh server per case so one case's rate window can't leak into the next
+        server, state, base_url = start_mock_server(latency=0.05, tokens_per_second=2000, words=20, rpm=rpm)
+        llm = pool.chat(model="gpt-4o-mini", api_key="mock", base_url=base_url)
+
+        def call(i):
+            try:
+                llm.invoke(f"Summarise clause {i}.")
+                return True
+            except Exception:
+                return False
+
+        sys.stdout = open(os.devnull, "w")  # retry notices
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                seconds, outcomes = timed(lambda: list(executor.map(call, range(requests))))
+        finally:
+            sys.stdout.close()
+            sys.stdout = original_stdout
+            server.shutdown()
+        stats = pool.stats()
+        results.append({
+            "suite": "ratelimit",
+            "case": name,
+            "seconds": round(seconds, 4),
+            "completed_per_second": round(sum(outcomes) / seconds, 2),
+            "failed": outcomes.count(False),
+            "http_429": state.rejected,
+            "mean_queue_wait_s": round(stats["queue_wait_s"] / max(1, stats["requests"]), 3)
+        })
+    return results
+
+
+SUITES = {
+    "pdf": bench_pdf,
+    "redline": bench_redline,
+    "revision": bench_revision,
+    "pipeline": bench_pipeline,
+    "versions": bench_versions,
+    "screen": bench_screen,
+    "retrieval": bench_retrieval,
+    "startup": bench_startup,
+    "render": bench_render,
+    "routing": bench_routing,
+    "fastpath": bench_fastpath,
+    "debate": bench_debate,
+    "history": bench_history,
+    "ratelimit": bench_ratelimit,
+}
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return "unknown"
+
+
+def print_results(results, baseline=None):
+    previous = {(r["suite"], r["case"]): r for r in (baseline or {}).get("results", [])}
+    for row in results:
+        metrics = " | ".join(f"{k}={v}" for k, v in row.items() if k not in ("suite", "case"))
+        delta = ""
+        before = previous.get((row["suite"], row["case"]))
+        if before and before.get("seconds"):
+            change = (row["seconds"] - before["seconds"]) / before["seconds"] * 100
+            delta = f"  ({change:+.1f}% vs {baseline.get('commit', 'baseline')})"
+        print(f"[{row['suite']}] {row['case']:<28} {metrics}{delta}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="War Room offline benchmarks")
+    parser.add_argument("suites", nargs="*", help=f"Any of: {', '.join(SUITES)} (default: all)")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--compare", help="Compare against results previously saved with --json")
+    args = parser.parse_args()
+    unknown = set(args.suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suite(s): {', '.join(sorted(unknown))}")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results = []
+    for name in args.suites or list(SUITES):
+        results.extend(SUITES[name]())
+    print_results(results, baseline)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"commit": git_commit(), "timestamp": time.time(), "results": results}, f, indent=2)
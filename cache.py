@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+CACHE_DIR = os.getenv("WARROOM_CACHE_DIR", os.path.join(os.getcwd(), ".warroom_cache"))
+DEFAULT_TTL_SECONDS = int(os.getenv("WARROOM_CACHE_TTL", 7 * 24 * 3600))
+DEFAULT_MAX_ENTRIES = int(os.getenv("WARROOM_CACHE_MAX_ENTRIES", 500))
+
+
+def normalize_text(text):
+    """Collapses whitespace so re-extracted copies of the same PDF hash identically."""
+    return " ".join(str(text).split())
+
+
+def content_hash(*parts):
+    """Stable SHA-256 over any number of string parts."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    Persistent key/value store backed by a local SQLite file.
+    Values are JSON encoded. Entries expire after `ttl_seconds` and the
+    least recently used ones are evicted once `max_entries` is exceeded.
+    """
+    def __init__(self, name, ttl_seconds=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES, directory=None):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        directory = directory or CACHE_DIR
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{name}.sqlite3")
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or (self.ttl_seconds and now - row[1] > self.ttl_seconds):
+                if row is not None:
+                    self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return default
+
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        now = time.time()
+        payload = json.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, payload, now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def get_many(self, keys):
+        """{key: value} for those of `keys` that are present and unexpired, read in one transaction."""
+        now = time.time()
+        keys = list(keys)
+        found, expired = {}, []
+        with self._lock:
+            # Stays under SQLite's limit on bound parameters per statement
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, value, created_at FROM entries WHERE key IN ({', '.join('?' * len(batch))})", batch
+                ).fetchall()
+                for key, value, created_at in rows:
+                    if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                        expired.append((key,))
+                    else:
+                        found[key] = value
+            self._conn.executemany("DELETE FROM entries WHERE key = ?", expired)
+            self._conn.executemany("UPDATE entries SET accessed_at = ? WHERE key = ?", [(now, key) for key in found])
+            self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return {key: json.loads(value) for key, value in found.items()}
+
+    def set_many(self, items):
+        """Stores every (key, value) pair in one transaction, with a single eviction pass."""
+        now = time.time()
+        rows = [(key, json.dumps(value), now, now) for key, value in items]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)", rows
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        # 1. Drop anything past its TTL
+        if self.ttl_seconds:
+            self._conn.execute("DELETE FROM entries WHERE created_at < ?", (now - self.ttl_seconds,))
+
+        # 2. Trim least recently used entries down to the size limit
+        if self.max_entries:
+            self._conn.execute(
+                """DELETE FROM entries WHERE key IN (
+                    SELECT key FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )""",
+                (self.max_entries,)
+            )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0
+        }
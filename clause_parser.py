@@ -0,0 +1,138 @@
+"""
+Single-pass parser for the Mediator's clause comparison blocks:
+
+    ---CLAUSE_COMPARISON_START---
+    ORIGINAL: ...
+    REVISED: ...
+    EXPLANATION: ...
+    ---CLAUSE_COMPARISON_END---
+
+ClauseStreamParser consumes the verdict as it streams and reports each block as
+soon as its END marker arrives; parse_verdict() runs it once over a finished text.
+"""
+import functools
+from typing import NamedTuple
+
+START_MARKER = "---CLAUSE_COMPARISON_START---"
+END_MARKER = "---CLAUSE_COMPARISON_END---"
+DEFAULT_EXPLANATION = "No explanation provided."
+
+
+class ClauseChange(NamedTuple):
+    original: str
+    revised: str
+    explanation: str
+    start: int  # offset of the START marker in the verdict
+    end: int    # offset just past the END marker
+
+
+def _parse_block(text, start, end, base=0):
+    """
+    Reads the fields between offsets `start` and `end`; None if there is no REVISED part.
+    `base` is the verdict offset of `text`, for a text that is only the verdict's tail.
+    """
+    body_start = start + len(START_MARKER)
+    revised_at = text.find("REVISED:", body_start, end)
+    if revised_at == -1:
+        return None
+    original_at = text.find("ORIGINAL:", body_start, revised_at)
+    original_from = original_at + len("ORIGINAL:") if original_at != -1 else body_start
+    explanation_at = text.find("EXPLANATION:", revised_at, end)
+    revised_to = explanation_at if explanation_at != -1 else end
+    explanation = text[explanation_at + len("EXPLANATION:"):end].strip() if explanation_at != -1 else ""
+    return ClauseChange(
+        original=text[original_from:revised_at].strip(),
+        revised=text[revised_at + len("REVISED:"):revised_to].strip(),
+        explanation=explanation or DEFAULT_EXPLANATION,
+        start=base + start,
+        end=base + end + len(END_MARKER)
+    )
+
+
+class ClauseStreamParser:
+    """
+    Incremental parser: feed() text as it arrives and get back the clause changes
+    completed by it. Text outside the blocks is collected as the clean body.
+    Only the unconsumed tail (an open block, or a marker that may still be arriving)
+    is buffered, so nothing is copied or scanned twice however long the verdict grows.
+    """
+    def __init__(self):
+        self.length = 0         # characters fed so far
+        self.changes = []
+        self._body = []
+        self._tail = ""         # unconsumed text, starting at verdict offset self._pos
+        self._pos = 0           # everything before this is consumed
+        self._open_at = -1      # START marker of the block being streamed, if any
+        self._scan_from = 0     # where the next marker search resumes
+
+    def feed(self, chunk):
+        self._tail += chunk
+        self.length += len(chunk)
+        completed = []
+        # Offsets stay verdict offsets; `base` maps them into the buffered tail
+        text, base = self._tail, self._pos
+        while True:
+            if self._open_at == -1:
+                start = text.find(START_MARKER, self._scan_from - base)
+                if start == -1:
+                    # A marker may be split across chunks: keep its possible prefix unscanned
+                    self._scan_from = max(self._pos, self.length - len(START_MARKER) + 1)
+                    break
+                self._body.append(text[self._pos - base:start])
+                self._pos = self._open_at = base + start
+                self._scan_from = self._open_at + len(START_MARKER)
+
+            end = text.find(END_MARKER, self._scan_from - base)
+            if end == -1:
+                self._scan_from = max(self._scan_from, self.length - len(END_MARKER) + 1)
+                break
+
+            change = _parse_block(text, self._open_at - base, end, base)
+            if change is not None:
+                self.changes.append(change)
+                completed.append(change)
+            self._pos = self._scan_from = base + end + len(END_MARKER)
+            self._open_at = -1
+
+        if self._open_at == -1:
+            # Text before the scan point can't be part of a block any more
+            if self._scan_from > self._pos:
+                self._body.append(text[self._pos - base:self._scan_from - base])
+                self._pos = self._scan_from
+        self._tail = text[self._pos - base:]
+        return completed
+
+    @property
+    def in_block(self):
+        return self._open_at != -1
+
+    def body(self, final=False):
+        """
+        Verdict text with every complete block removed. While streaming, an open
+        block is hidden; with final=True an unterminated block is kept as plain text.
+        """
+        tail = self._tail
+        if self._open_at == -1:
+            if not final:
+                # Don't flash the first characters of a START marker that is still arriving
+                for size in range(len(START_MARKER) - 1, 0, -1):
+                    if tail.endswith(START_MARKER[:size]):
+                        tail = tail[:-size]
+                        break
+        elif final:
+            tail = tail[len(START_MARKER):]
+        else:
+            tail = ""
+        return "".join(self._body + [tail]).strip()
+
+
+@functools.lru_cache(maxsize=64)
+def parse_verdict(verdict_text):
+    """
+    Returns (changes, body) for a finished verdict: a tuple of ClauseChange records
+    and the verdict text without the comparison blocks. Cached, since Streamlit
+    re-renders the same verdict on every rerun.
+    """
+    parser = ClauseStreamParser()
+    parser.feed(verdict_text or "")
+    return tuple(parser.changes), parser.body(final=True)
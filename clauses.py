@@ -0,0 +1,117 @@
+import re
+from cache import content_hash, normalize_text
+
+# A new clause starts after a blank line, or on a line that opens with a numbered
+# heading ("4.", "12.3 ", "(b)") or a Section/Article/Clause label.
+CLAUSE_BOUNDARY = re.compile(
+    r"\n[ \t]*\n"
+    r"|\n(?=[ \t]*(?:\d{1,3}(?:\.\d{1,3})*[.)]?[ \t]+\S|\([a-z0-9]{1,3}\)[ \t]+\S"
+    r"|(?:Section|SECTION|Article|ARTICLE|Clause|CLAUSE)[ \t]+[\dIVXLC]+))"
+)
+SENTENCE_END = re.compile(r"(?<=[.;:])\s+")
+
+MIN_CLAUSE_CHARS = 40
+DEFAULT_GROUP_CHARS = 6000
+# Content-defined boundaries fall about once every max_chars * GROUP_BOUNDARY_SPACING characters;
+# max_chars cuts the groups in between. Lower means smaller groups (more calls), higher means
+# an edit can shift more cut-offs before the next content-defined boundary resynchronises them.
+GROUP_BOUNDARY_SPACING = 2.0
+
+
+def clause_spans(text, min_chars=MIN_CLAUSE_CHARS):
+    """
+    Returns (start, end) character offsets of each clause in `text`.
+    Fragments shorter than `min_chars` (usually bare headings) are merged
+    into the clause that follows them.
+    """
+    raw = []
+    start = 0
+    for match in CLAUSE_BOUNDARY.finditer(text):
+        raw.append((start, match.start()))
+        start = match.end()
+    raw.append((start, len(text)))
+
+    spans = []
+    pending_start = None
+    for s, e in raw:
+        # Trim surrounding whitespace without losing the offsets
+        while s < e and text[s].isspace():
+            s += 1
+        while e > s and text[e - 1].isspace():
+            e -= 1
+        if s == e:
+            continue
+        if pending_start is not None:
+            s = pending_start
+            pending_start = None
+        if e - s < min_chars:
+            pending_start = s
+            continue
+        spans.append((s, e))
+
+    if pending_start is not None:
+        if spans:
+            spans[-1] = (spans[-1][0], len(text.rstrip()))
+        else:
+            spans.append((pending_start, len(text.rstrip())))
+    return spans
+
+
+def split_clauses(text, min_chars=MIN_CLAUSE_CHARS):
+    """Splits contract text into clause-sized pieces."""
+    return [text[s:e] for s, e in clause_spans(text, min_chars)]
+
+
+def _split_long(clause, max_chars):
+    """Breaks an oversized clause on sentence boundaries."""
+    parts, current = [], ""
+    for sentence in SENTENCE_END.split(clause):
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            parts.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        parts.append(current)
+    return parts
+
+
+def clause_hash(clause):
+    return content_hash(normalize_text(clause))
+
+
+def _ends_group(piece, max_chars):
+    """
+    Content-defined boundary: decided by the clause's own hash (longer clauses are
+    likelier to close a group), never by its position, so an edit elsewhere in the
+    contract can't move it.
+    """
+    return int(clause_hash(piece)[:8], 16) / 0xFFFFFFFF < len(piece) / (max_chars * GROUP_BOUNDARY_SPACING)
+
+
+def group_clauses(clauses, max_chars=DEFAULT_GROUP_CHARS):
+    """
+    Packs consecutive clauses into groups of at most `max_chars` characters.
+    Boundaries are content-defined, so when a new version of the contract edits,
+    inserts or removes a clause only the group containing it changes and every
+    other group (and its checkpoints) stays identical.
+    """
+    groups, current, size = [], [], 0
+    for clause in clauses:
+        for piece in (_split_long(clause, max_chars) if len(clause) > max_chars else [clause]):
+            if current and size + len(piece) > max_chars:
+                groups.append("\n\n".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece) + 2
+            if _ends_group(piece, max_chars):
+                groups.append("\n\n".join(current))
+                current, size = [], 0
+    if current:
+        groups.append("\n\n".join(current))
+    return groups
+
+
+def chunk_contract(text, max_chars=DEFAULT_GROUP_CHARS):
+    """Clause-aligned chunks of the contract, ready for the map stage."""
+    return group_clauses(split_clauses(text), max_chars)
@@ -0,0 +1,32 @@
+import os
+import pytest
+from mock_openai_server import start_mock_server
+
+# test_manual.py runs the whole crew against the live API at import time; run it by hand
+collect_ignore = ["test_manual.py"]
+
+
+@pytest.fixture(scope="session")
+def mock_llm():
+    """The offline mock OpenAI server (see mock_openai_server.py), with the environment pointed at it. Yields its state."""
+    server, state, base_url = start_mock_server(latency=0.01, tokens_per_second=5000)
+    env = {"OPENAI_API_BASE": base_url, "OPENAI_API_KEY": "mock", "OPENAI_MODEL_NAME": "gpt-4o-mini", "OTEL_SDK_DISABLED": "true"}
+    saved = {key: os.environ.get(key) for key in env}
+    os.environ.update(env)
+    yield state
+    for key, value in saved.items():
+        if value is None:
+            os.environ.pop(key, None)
+        else:
+            os.environ[key] = value
+    server.shutdown()
+
+
+@pytest.fixture
+def checkpoints(tmp_path, monkeypatch):
+    """An empty stage checkpoint store for one test."""
+    import crew
+    from cache import DiskCache
+    store = DiskCache("checkpoints", directory=tmp_path)
+    monkeypatch.setattr(crew, "checkpoint_cache", store)
+    return store
@@ -1,71 +1,544 @@
 from crewai import Crew, Process
+from crewai.tasks.task_output import TaskOutput
 from agents import WarRoomAgents
-from tasks import WarRoomTasks
+from tasks import WarRoomTasks, PLAYBOOK_MARKER
+from cache import DiskCache, content_hash, normalize_text
+from clauses import chunk_contract, split_clauses
+from clause_parser import parse_verdict
+from redline import similarity
+from streaming import StageStreamHandler
+from prompts import stage_token_budget
+from telemetry import RunMetrics
+from versions import diff_versions, negotiation_profile
+from screener import screen_contract, top_risks
+from retrieval import clause_retriever
+from routing import Router
+import logsink
+from concurrent.futures import ThreadPoolExecutor
 import os
 
+# Bump whenever agent or task prompts change so old checkpoints stop matching
+STAGE_VERSION = "2"
+
+checkpoint_cache = DiskCache("checkpoints")
+
+ERROR_PREFIX = "⚠️"
+
+# Contracts longer than this are only safe to process in clause-chunked mode
+SINGLE_PASS_CHARS = 25000
+CHUNK_CHARS = int(os.getenv("WARROOM_CHUNK_CHARS", 8000))
+MAX_PARALLEL_CHUNKS = int(os.getenv("WARROOM_MAX_PARALLEL", 4))
+# New versions that change more than this share of clauses get a full run instead of an incremental one
+MAX_INCREMENTAL_SHARE = 0.5
+# Fast path: contracts whose analysis risk scores (0-100) are all at or below this skip the debate...
+FAST_PATH_MAX_RISK = int(os.getenv("WARROOM_FAST_PATH_MAX_RISK", 30))
+# ...as long as no single clause scores above this in the local scan (weights in screener.RISK_SIGNALS)
+FAST_PATH_MAX_CLAUSE_RISK = int(os.getenv("WARROOM_FAST_PATH_MAX_CLAUSE_RISK", 7))
+RISK_AXES = ("liability_score", "financial_risk", "unfairness_score")
+# WarRoomCrew arguments that only change how a run executes, not what the agents produce. Every
+# other argument is part of the run's versions.negotiation_profile, so new options are in it by default.
+RUN_ONLY_ARGS = ("contract_text", "use_checkpoints", "max_parallel", "chunks", "stream", "metrics", "output_dir", "versions")
+# Multi-round debates stop once a round's clause revisions are at least this similar (0-1) to the last round's
+DEBATE_CONVERGENCE = float(os.getenv("WARROOM_DEBATE_CONVERGENCE", 0.9))
+
+AGGRESSION_MODES = ["Diplomat", "Professional", "Killer"]
+
+
+def clean_garbage(text):
+    text = str(text)
+    if text.strip().startswith("description=") or "description='" in text:
+        return "⚠️ Data Cleaning Error: The agent returned metadata instead of text. Check terminal for raw output."
+    return text
+
+
+def get_output(task, filename):
+    """The "Source of Truth" Extractor: task memory first, then the output file."""
+    try:
+        task_output = task.output
+        if hasattr(task_output, 'raw'):
+            return clean_garbage(task_output.raw)
+        if hasattr(task_output, 'result'):
+            return clean_garbage(str(task_output.result))
+    except Exception as e:
+        print(f"Memory read failed for {filename}: {e}")
+
+    # Fallback: Read the File
+    try:
+        if filename and os.path.exists(filename):
+            with open(filename, "r", encoding='utf-8') as f:
+                return clean_garbage(f.read())
+    except Exception as e:
+        print(f"File read failed for {filename}: {e}")
+
+    return "⚠️ Simulation Error: Output not generated. Please check terminal logs."
+
+
+def restore_output(task, text):
+    """Attaches a checkpointed result to a task so downstream `context` can read it."""
+    task.output = TaskOutput(description=task.description, result=text)
+
+
+def merge_reports(title, reports):
+    """Reduce step: stitches per-chunk reports into one report, in contract order."""
+    if len(reports) == 1:
+        return reports[0]
+    sections = [
+        f"## {title} — Contract Part {idx + 1} of {len(reports)}\n\n{report}"
+        for idx, report in enumerate(reports)
+    ]
+    return "\n\n".join(sections)
+
+
+def merge_versions(title, changes_report, previous_report, previous_version):
+    """Report for an incremental round: the new findings first, then what still stands from before."""
+    return (
+        f"## {title} — Changes Since Version {previous_version}\n\n{changes_report}\n\n"
+        f"## {title} — Carried Over From Version {previous_version}\n\n{previous_report}"
+    )
+
+
+def fast_path_reason(risk_scores, contract_text, max_risk=FAST_PATH_MAX_RISK, max_clause_risk=FAST_PATH_MAX_CLAUSE_RISK):
+    """Why a contract can skip the Shark/Shield debate, or None if it needs the full one."""
+    if not risk_scores or len(contract_text) > SINGLE_PASS_CHARS:
+        return None
+    try:
+        scores = [float(risk_scores[axis]) for axis in RISK_AXES]
+    except (KeyError, TypeError, ValueError):
+        return None
+    if max(scores) > max_risk:
+        return None
+    # The analysis only reads the first 10k characters; the local scan covers the rest
+    riskiest = top_risks(contract_text, 1)
+    if riskiest and riskiest[0].score > max_clause_risk:
+        return None
+    return f"every risk score is at most {max_risk}/100 and no clause scored above {max_clause_risk} in the local scan"
+
+
+def split_review(text):
+    """(verdict, playbook) from the fast path's single review output."""
+    verdict, marker, playbook = text.partition(PLAYBOOK_MARKER)
+    if not marker:
+        return text, text if text.startswith(ERROR_PREFIX) else "The review did not include a separate playbook; see the Mediator's verdict."
+    return verdict.strip(), playbook.strip()
+
+
+def revision_similarity(previous_verdict, verdict):
+    """0..1 word similarity of two verdicts' clause revisions, matched up by their ORIGINAL text."""
+    def revisions(text):
+        changes, _ = parse_verdict(text)
+        return "\n".join(change.revised for change in sorted(changes, key=lambda change: " ".join(change.original.lower().split())))
+    return similarity(revisions(previous_verdict), revisions(verdict))
+
+
+def merge_rounds(title, reports):
+    """A debate's reports from every round, in order."""
+    if len(reports) == 1:
+        return reports[0]
+    return "\n\n".join(f"## {title} — Round {idx + 1}\n\n{report}" for idx, report in enumerate(reports))
+
+
+def change_excerpt(diff):
+    """What the agents see in an incremental round: only the clauses that differ from the last version."""
+    parts = ["CLAUSES CHANGED OR ADDED IN THIS VERSION:", *diff.changed]
+    if diff.removed:
+        parts += ["PREVIOUS WORDING OF CHANGED OR REMOVED CLAUSES:", *diff.removed]
+    return "\n\n".join(parts)
+
+
 class WarRoomCrew:
-    def __init__(self, contract_text, user_role="The User", counter_party="The Counterparty", aggression_mode="Professional"):
+    def __init__(self, contract_text, user_role="The User", counter_party="The Counterparty", aggression_mode="Professional", use_checkpoints=True, chunked=False, max_parallel=MAX_PARALLEL_CHUNKS, chunk_chars=CHUNK_CHARS, chunks=None, stream=None, metrics=None, output_dir=None, versions=None, screen_top_k=None, retrieval=False, routes=None, risk_scores=None, fast_path=True, max_rounds=1, convergence=DEBATE_CONVERGENCE):
+        self.options = {name: value for name, value in locals().items() if name != "self" and name not in RUN_ONLY_ARGS}
         self.contract_text = contract_text
         self.user_role = user_role
         self.counter_party = counter_party
         self.aggression_mode = aggression_mode
-        self.agents = WarRoomAgents()
+        self.use_checkpoints = use_checkpoints
+        self.chunked = chunked
+        self.max_parallel = max_parallel
+        self.chunk_chars = chunk_chars
+        self.chunks = chunks
+        self.contract_hash = content_hash(normalize_text(contract_text))
+        self.resumed_stages = []
+        self.token_budget = {}
+        # Optional StreamBuffer: agents stream tokens into it, finished stages are posted to it
+        self.stream = stream
+        self.metrics = metrics or RunMetrics()
+        # Where stage outputs are written (and read back from as a fallback); None keeps the
+        # old shared files in the working directory
+        self.output_dir = output_dir
+        # Optional versions.VersionStore: new versions of a known contract only re-run what changed
+        self.versions = versions
+        self.incremental = None
+        # When set, agents only see the screen_top_k riskiest clauses (see screener.py) plus a summary of the rest
+        self.screen_top_k = screen_top_k
+        self.screening = None
+        # When True, the Shark, Shield and Mediator search the contract with a BM25 tool (see retrieval.py)
+        # and their prompts carry an outline instead of the full text
+        self.retrieval = retrieval
+        # {stage: routing.Route}; None reads WARROOM_MODEL_ROUTES
+        self.router = Router(routes)
+        # analyze_contract's risk_scores: low-risk contracts get a single review instead of the debate,
+        # unless fast_path is False (force the full debate)
+        self.risk_scores = risk_scores
+        self.fast_path = fast_path
+        self.fast_path_reason = None
+        # max_rounds > 1: after the first pass the Shark rebuts, the Shield answers and the Mediator rules
+        # again, until the Mediator's revisions converge (see revision_similarity) or the rounds run out
+        self.max_rounds = max_rounds
+        self.convergence = convergence
+        self.rounds = []
+        self.agents = WarRoomAgents(self._callbacks_for, self.router, streaming=self.stream is not None)
         self.tasks = WarRoomTasks()
 
+    @property
+    def profile(self):
+        """
+        The versions.negotiation_profile a stored version must share to be reused for this run:
+        what _stage_key hashes (STAGE_VERSION, the stage models, sides and persona) plus every other option.
+        """
+        options = {name: value for name, value in self.options.items() if name not in ("user_role", "counter_party", "aggression_mode")}
+        # The resolved models, not the argument: routes=None reads them from the environment
+        options["routes"] = sorted(self.router.routes.items())
+        return negotiation_profile(self.user_role, self.counter_party, self.aggression_mode, stage_version=STAGE_VERSION, **options)
+
+    def _callbacks_for(self, stream_key):
+        callbacks = [self.metrics.handler(stream_key, self.router.route(stream_key).model)]
+        if self.stream is not None:
+            callbacks.append(StageStreamHandler(self.stream, stream_key))
+        return callbacks
+
+    def _stage_key(self, stage, upstream_outputs, text_hash=None):
+        return content_hash(
+            STAGE_VERSION, stage, self.router.route(stage).model, text_hash or self.contract_hash,
+            self.user_role, self.counter_party, self.aggression_mode,
+            *upstream_outputs
+        )
+
+    def _output_path(self, filename):
+        if not filename:
+            return None
+        return os.path.join(self.output_dir or os.getcwd(), filename)
+
+    def _save_output(self, filename, output):
+        if not (self.output_dir and filename):
+            return
+        try:
+            with open(self._output_path(filename), "w", encoding="utf-8") as f:
+                f.write(output)
+        except OSError as e:
+            print(f"Output write failed for {filename}: {e}")
+
+    def _run_stage(self, stage, agent, task, filename, upstream_outputs, text_hash=None, label=None):
+        """
+        Runs a single stage as its own one-task crew, unless a checkpoint for
+        the exact same inputs (including every upstream output) already exists.
+        `text_hash` scopes the key to a chunk (or excerpt) instead of the whole contract.
+        """
+        key = self._stage_key(stage, upstream_outputs, text_hash)
+        label = label or stage
+
+        if self.use_checkpoints:
+            cached = checkpoint_cache.get(key)
+            if cached is not None:
+                print(f"♻️ Resuming '{label}' from checkpoint")
+                self.metrics.record(label, cached=True)
+                restore_output(task, cached)
+                self._save_output(filename, cached)
+                self.resumed_stages.append(label)
+                self._publish(label, cached)
+                return cached
+
+        self.token_budget[label] = stage_token_budget(
+            agent, task, upstream_outputs,
+            getattr(agent.llm, "contract_prefix", ""), getattr(agent.llm, "model_name", None)
+        )
+
+        crew = Crew(
+            agents=[agent],
+            tasks=[task],
+            process=Process.sequential,
+            verbose=True
+        )
+        with self.metrics.stage(label):
+            crew.kickoff()
+
+        output = get_output(task, self._output_path(filename))
+        if self.use_checkpoints and not output.startswith(ERROR_PREFIX):
+            checkpoint_cache.set(key, output)
+        self._save_output(filename, output)
+        self._publish(label, output)
+        return output
+
+    def _publish(self, label, output):
+        if self.stream is not None:
+            self.stream.complete(label, output)
+
+    def _run_chunk(self, idx, chunk_text):
+        """Map step: Shark then Shield on a single clause group, with their own agents."""
+        shark = self.agents.shark_agent(self.counter_party, self.aggression_mode, stream_key=f"attack[{idx + 1}]", contract_text=chunk_text)
+        shield = self.agents.shield_agent(self.user_role, stream_key=f"defense[{idx + 1}]", contract_text=chunk_text)
+        attack = self.tasks.attack_task(shark, self.counter_party)
+        defense = self.tasks.defense_task(shield, [attack], self.user_role)
+
+        chunk_hash = content_hash(normalize_text(chunk_text))
+        # Keys depend on the chunk's text, not its position, so unchanged chunks stay reusable
+        shark_report = self._run_stage("attack", shark, attack, None, [], chunk_hash, f"attack[{idx + 1}]")
+        shield_report = self._run_stage("defense", shield, defense, None, [shark_report], chunk_hash, f"defense[{idx + 1}]")
+        return shark_report, shield_report
+
+    def _run_chunked(self, chunks):
+        """Runs the map step over all chunks with bounded parallelism, then reduces."""
+        with ThreadPoolExecutor(max_workers=max(1, self.max_parallel)) as pool:
+            chunk_reports = list(pool.map(logsink.propagate(self._run_chunk), range(len(chunks)), chunks))
+
+        shark_report = merge_reports("Red Report", [shark for shark, _ in chunk_reports])
+        shield_report = merge_reports("Blue Report", [shield for _, shield in chunk_reports])
+        return shark_report, shield_report
+
     def run(self):
+        self.resumed_stages = []
+        self.token_budget = {}
+        self.incremental = None
+        self.screening = None
+        self.fast_path_reason = None
+        self.rounds = []
+        self.metrics.context.update({
+            "model": os.getenv("OPENAI_MODEL_NAME"),
+            "routes": self.router.summary(),
+            "contract_hash": self.contract_hash,
+            "aggression_mode": self.aggression_mode,
+            "chunked": self.chunked
+        })
+
+        previous = self.versions.find_previous(self.contract_text, self.profile) if self.versions else None
+        diff = diff_versions(previous["clauses"], split_clauses(self.contract_text)) if previous else None
+        if diff and diff.changed_share <= MAX_INCREMENTAL_SHARE and len(change_excerpt(diff)) <= SINGLE_PASS_CHARS:
+            results = self._run_incremental(previous, diff)
+        else:
+            reason = fast_path_reason(self.risk_scores, self.contract_text) if self.fast_path else None
+            results = self._run_fast(reason) if reason else self._run_full()
+        self.metrics.write()
+
+        # A single review is no base for a later debate: only full (or incremental) results are stored
+        if self.versions and not self.fast_path_reason and not any(str(output).startswith(ERROR_PREFIX) for output in results.values()):
+            self.versions.record(self.contract_text, self.profile, results, previous)
+        return results
+
+    def _run_incremental(self, previous, diff):
+        """
+        Re-negotiates only the clauses that changed since `previous` (a stored version):
+        the Shark and Shield review the changed clauses, the Mediator updates its last
+        verdict, and the reports for unchanged clauses are carried over.
+        """
+        old = previous["results"]
+        version = previous["version"]
+        self.incremental = {"previous_version": version, "changed": len(diff.changed), "removed": len(diff.removed), "unchanged": diff.unchanged}
+        self.metrics.context["incremental"] = self.incremental
+
+        if not diff.changed and not diff.removed:
+            print(f"♻️ No clause changed since version {version}; reusing its results")
+            for label, key in (("attack", "shark_report"), ("defense", "shield_report"), ("verdict", "final_verdict"), ("negotiation", "negotiation_strategy")):
+                self.metrics.record(label, cached=True)
+                self.resumed_stages.append(label)
+                self._publish(label, old[key])
+            return dict(old)
+
+        print(f"🔁 Version {version} found: re-negotiating {len(diff.changed)} changed clause(s), keeping {diff.unchanged}")
+        excerpt = change_excerpt(diff)
+        excerpt_hash = content_hash(normalize_text(excerpt))
+        shark = self.agents.shark_agent(self.counter_party, self.aggression_mode, contract_text=excerpt)
+        shield = self.agents.shield_agent(self.user_role, contract_text=excerpt)
+        mediator = self.agents.mediator_agent(contract_text=excerpt)
+        negotiator = self.agents.negotiator_agent()
+
+        attack = self.tasks.attack_task(shark, self.counter_party)
+        defense = self.tasks.defense_task(shield, [attack], self.user_role)
+        verdict = self.tasks.verdict_update_task(mediator, [attack, defense], old["final_verdict"])
+        negotiation = self.tasks.negotiation_task(negotiator, [verdict], self.user_role, self.counter_party)
+
+        shark_changes = self._run_stage("attack", shark, attack, None, [], excerpt_hash)
+        shield_changes = self._run_stage("defense", shield, defense, None, [shark_changes], excerpt_hash)
+        final_verdict = self._run_stage("verdict-update", mediator, verdict, "verdict_output.md", [shark_changes, shield_changes, old["final_verdict"]], excerpt_hash, "verdict")
+        negotiation_strategy = self._run_stage("negotiation", negotiator, negotiation, "negotiation_output.md", [final_verdict])
+
+        shark_report = merge_versions("Red Report", shark_changes, old["shark_report"], version)
+        shield_report = merge_versions("Blue Report", shield_changes, old["shield_report"], version)
+        self._save_output("shark_output.md", shark_report)
+        self._save_output("shield_output.md", shield_report)
+        return {
+            "shark_report": shark_report,
+            "shield_report": shield_report,
+            "final_verdict": final_verdict,
+            "negotiation_strategy": negotiation_strategy
+        }
+
+    def _run_fast(self, reason):
+        """
+        Low-risk contracts: one Reviewer pass writes both the verdict and the playbook,
+        and the Shark and Shield reports just record that the debate was skipped.
+        """
+        self.fast_path_reason = reason
+        self.metrics.context["fast_path"] = reason
+        print(f"⚡ Fast path: {reason}")
+        reviewer = self.agents.reviewer_agent(self.user_role, contract_text=self.contract_text)
+        review = self.tasks.review_task(reviewer, self.user_role, self.counter_party)
+        output = self._run_stage("review", reviewer, review, "verdict_output.md", [])
+
+        final_verdict, negotiation_strategy = split_review(output)
+        skipped = f"⚡ **Fast path:** the debate was skipped because {reason}. Turn off the fast path to force the full debate."
+        for label, filename, text in (("verdict", "verdict_output.md", final_verdict), ("negotiation", "negotiation_output.md", negotiation_strategy)):
+            self._save_output(filename, text)
+            self._publish(label, text)
+        return {
+            "shark_report": skipped,
+            "shield_report": skipped,
+            "final_verdict": final_verdict,
+            "negotiation_strategy": negotiation_strategy
+        }
+
+    def _run_full(self):
+        text, text_hash = self.contract_text, None
+        if self.screen_top_k:
+            screening = screen_contract(self.contract_text, self.screen_top_k)
+            text, text_hash = screening.text, content_hash(normalize_text(screening.text))
+            self.screening = {"kept": len(screening.selected), "clauses": screening.clauses, "kept_share": round(screening.kept_share, 3)}
+            self.metrics.context["screening"] = self.screening
+            print(f"🎯 Pre-screen kept the {len(screening.selected)} riskiest of {screening.clauses} clauses ({screening.kept_share:.0%} of the text)")
+
+        tools = []
+        if self.retrieval:
+            retriever = clause_retriever(self.contract_text)
+            tools = [retriever.as_tool()]
+            if not self.screen_top_k:
+                # With the pre-screen on, its excerpt stays in the prompt and the tool covers the rest
+                text = retriever.outline()
+            text_hash = content_hash("retrieval", normalize_text(text))
+
+        # With the retrieval tool every agent can search the whole contract, so nothing needs splitting
+        chunks = []
+        if not self.retrieval and self.screen_top_k:
+            # Precomputed chunks are of the full text; the screened text usually fits one prompt
+            if self.chunked or len(text) > SINGLE_PASS_CHARS:
+                chunks = chunk_contract(text, self.chunk_chars)
+        elif not self.retrieval and self.chunked:
+            chunks = self.chunks or chunk_contract(self.contract_text, self.chunk_chars)
+
         # 1. Init Agents
-        shark = self.agents.shark_agent(self.counter_party, self.aggression_mode)
-        shield = self.agents.shield_agent(self.user_role)
-        mediator = self.agents.mediator_agent()
+        # The Shark, Shield and Mediator share one contract prefix so provider-side prefix caching
+        # applies from the second stage on. In chunked mode the full text would be too large,
+        # so only the per-chunk agents carry (their own chunk of) the contract.
+        use_map = len(chunks) > 1
+        shared_text = None if use_map else text
+        shark = self.agents.shark_agent(self.counter_party, self.aggression_mode, contract_text=shared_text, tools=tools)
+        shield = self.agents.shield_agent(self.user_role, contract_text=shared_text, tools=tools)
+        mediator = self.agents.mediator_agent(contract_text=shared_text, tools=tools)
         negotiator = self.agents.negotiator_agent()
 
         # 2. Init Tasks
-        attack = self.tasks.attack_task(shark, self.contract_text, self.counter_party)
-        defense = self.tasks.defense_task(shield, self.contract_text, [attack], self.user_role)
-        verdict = self.tasks.verdict_task(mediator, self.contract_text, [attack, defense])
+        attack = self.tasks.attack_task(shark, self.counter_party)
+        defense = self.tasks.defense_task(shield, [attack], self.user_role)
+        verdict = self.tasks.verdict_task(mediator, [attack, defense])
         negotiation = self.tasks.negotiation_task(negotiator, [verdict], self.user_role, self.counter_party)
 
-        # 3. Run Crew
-        crew = Crew(
-            agents=[shark, shield, mediator, negotiator],
-            tasks=[attack, defense, verdict, negotiation],
-            process=Process.sequential,
-            verbose=True
-        )
+        # 3. Run stages in order; each one is checkpointed and keyed on its upstream outputs,
+        #    so a rerun resumes at the first stage whose inputs changed
+        if use_map:
+            # Map-reduce: Shark/Shield run per clause group, merged reports feed the Mediator
+            shark_report, shield_report = self._run_chunked(chunks)
+            restore_output(attack, shark_report)
+            restore_output(defense, shield_report)
+        else:
+            shark_report = self._run_stage("attack", shark, attack, "shark_output.md", [], text_hash)
+            shield_report = self._run_stage("defense", shield, defense, "shield_output.md", [shark_report], text_hash)
+        final_verdict = self._run_stage("verdict", mediator, verdict, "verdict_output.md", [shark_report, shield_report], text_hash)
+        if self.max_rounds > 1:
+            if use_map:
+                print("ℹ️ Multi-round debate needs the whole contract in one prompt; clause-chunked runs get one round")
+            else:
+                shark_report, shield_report, final_verdict = self._debate(
+                    [shark_report, shield_report, final_verdict], [defense, verdict], shared_text, tools, text_hash
+                )
+                self._save_output("shark_output.md", shark_report)
+                self._save_output("shield_output.md", shield_report)
+                # The Negotiator coaches on the last round's verdict
+                restore_output(verdict, final_verdict)
+        negotiation_strategy = self._run_stage("negotiation", negotiator, negotiation, "negotiation_output.md", [final_verdict])
 
-        crew.kickoff()
-
-        # 4. The "Source of Truth" Extractor
-        def get_output(task_index, filename):
-            try:
-                task_output = crew.tasks[task_index].output
-                if hasattr(task_output, 'raw'):
-                    return clean_garbage(task_output.raw)
-                if hasattr(task_output, 'result'):
-                    return clean_garbage(str(task_output.result))
-            except Exception as e:
-                print(f"Memory read failed for {filename}: {e}")
-
-            # Fallback: Read the File
-            try:
-                if os.path.exists(filename):
-                    with open(filename, "r", encoding='utf-8') as f:
-                        return clean_garbage(f.read())
-            except Exception as e:
-                print(f"File read failed for {filename}: {e}")
-
-            return "⚠️ Simulation Error: Output not generated. Please check terminal logs."
-
-        def clean_garbage(text):
-            text = str(text)
-            if text.strip().startswith("description=") or "description='" in text:
-                return "⚠️ Data Cleaning Error: The agent returned metadata instead of text. Check terminal for raw output."
-            return text
-
-        # Return using INDEX
         return {
-            "shark_report": get_output(0, "shark_output.md"),
-            "shield_report": get_output(1, "shield_output.md"),
-            "final_verdict": get_output(2, "verdict_output.md"),
-            "negotiation_strategy": get_output(3, "negotiation_output.md")
-        }
\ No newline at end of file
+            "shark_report": shark_report,
+            "shield_report": shield_report,
+            "final_verdict": final_verdict,
+            "negotiation_strategy": negotiation_strategy
+        }
+
+    def _debate(self, outputs, tasks, shared_text, tools, text_hash):
+        """
+        Debate rounds 2..max_rounds after the first pass (`outputs` are its Shark, Shield and
+        Mediator outputs, `tasks` its defense and verdict tasks). Each round the Shark rebuts
+        the Shield's report and the verdict, the Shield answers and the Mediator rules again;
+        the debate stops as soon as the verdict's revisions stop moving.
+        Returns the Shark and Shield reports of every round, and the last verdict.
+        """
+        shark_report, shield_report, final_verdict = outputs
+        defense, verdict = tasks
+        shark_reports, shield_reports = [shark_report], [shield_report]
+        self.rounds = [{"round": 1, "similarity": None, "converged": False}]
+        self.metrics.context["rounds"] = self.rounds
+
+        for number in range(2, self.max_rounds + 1):
+            suffix = f"-round{number}"
+            shark = self.agents.shark_agent(self.counter_party, self.aggression_mode, stream_key=f"attack{suffix}", contract_text=shared_text, tools=tools)
+            shield = self.agents.shield_agent(self.user_role, stream_key=f"defense{suffix}", contract_text=shared_text, tools=tools)
+            mediator = self.agents.mediator_agent(stream_key=f"verdict{suffix}", contract_text=shared_text, tools=tools)
+            attack = self.tasks.rebuttal_task(shark, [defense, verdict], self.counter_party, number)
+            defense = self.tasks.defense_task(shield, [attack], self.user_role)
+            verdict = self.tasks.verdict_round_task(mediator, [attack, defense, verdict])
+
+            shark_report = self._run_stage(f"attack{suffix}", shark, attack, None, [shield_report, final_verdict], text_hash)
+            shield_report = self._run_stage(f"defense{suffix}", shield, defense, None, [shark_report], text_hash)
+            previous, final_verdict = final_verdict, self._run_stage(f"verdict{suffix}", mediator, verdict, "verdict_output.md", [shark_report, shield_report, final_verdict], text_hash)
+            shark_reports.append(shark_report)
+            shield_reports.append(shield_report)
+            if final_verdict.startswith(ERROR_PREFIX):
+                break
+
+            score = revision_similarity(previous, final_verdict)
+            self.rounds.append({"round": number, "similarity": round(score, 3), "converged": score >= self.convergence})
+            if score >= self.convergence:
+                print(f"🤝 Debate converged after round {number}: revisions {score:.0%} unchanged")
+                break
+            print(f"🗣️ Round {number}: revisions {score:.0%} unchanged, debating on")
+
+        return merge_rounds("Red Report", shark_reports), merge_rounds("Blue Report", shield_reports), final_verdict
+
+
+def sweep_crews(contract_text, user_role="The User", counter_party="The Counterparty", modes=AGGRESSION_MODES, analysis_stages=None, **crew_kwargs):
+    """
+    One WarRoomCrew per Shark persona, all with the same `crew_kwargs`.
+    Contract preprocessing (clause chunking) is done once and shared; each crew gets its
+    own output subdirectory and its own RunMetrics, seeded with `analysis_stages`.
+    """
+    if crew_kwargs.get("chunked") and not crew_kwargs.get("chunks"):
+        crew_kwargs["chunks"] = chunk_contract(contract_text, crew_kwargs.get("chunk_chars", CHUNK_CHARS))
+    output_dir = crew_kwargs.pop("output_dir", None)
+
+    crews = {}
+    for mode in modes:
+        # One subdirectory per persona, so their stage files don't overwrite each other
+        mode_dir = os.path.join(output_dir, mode) if output_dir else None
+        if mode_dir:
+            os.makedirs(mode_dir, exist_ok=True)
+        crews[mode] = WarRoomCrew(contract_text, user_role, counter_party, mode, output_dir=mode_dir, metrics=RunMetrics(stages=analysis_stages), **crew_kwargs)
+    return crews
+
+
+def run_crews(crews):
+    """Runs {mode: WarRoomCrew} concurrently. Returns {mode: results_dict}."""
+    with ThreadPoolExecutor(max_workers=len(crews)) as pool:
+        futures = {mode: pool.submit(logsink.propagate(war_room.run)) for mode, war_room in crews.items()}
+        return {mode: future.result() for mode, future in futures.items()}
+
+
+def run_sweep(contract_text, user_role="The User", counter_party="The Counterparty", modes=AGGRESSION_MODES, **crew_kwargs):
+    """Runs the full pipeline once per Shark persona, concurrently. Returns {mode: results_dict}."""
+    return run_crews(sweep_crews(contract_text, user_role, counter_party, modes, **crew_kwargs))
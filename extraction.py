@@ -0,0 +1,115 @@
+import hashlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pypdf import PdfReader
+from cache import DiskCache
+
+# The old hard 30-page cut-off is now a budget that can be raised per call or via env
+PAGE_BUDGET = int(os.getenv("PDF_PAGE_BUDGET", 200))
+EXTRACTION_WORKERS = int(os.getenv("PDF_EXTRACTION_WORKERS", os.cpu_count() or 2))
+PAGES_PER_BATCH = 8
+# Below this many uncached pages a process pool costs more than it saves
+PARALLEL_THRESHOLD = 16
+
+page_cache = DiskCache("pdf_pages", max_entries=20000)
+
+# Per-worker parsed document, set up once by the pool initializer
+_worker_reader = None
+
+
+def _init_worker(pdf_bytes):
+    global _worker_reader
+    _worker_reader = PdfReader(io.BytesIO(pdf_bytes))
+
+
+def _extract_batch(page_numbers):
+    return [(n, _worker_reader.pages[n].extract_text() or "") for n in page_numbers]
+
+
+def read_pdf_bytes(source):
+    """Accepts raw bytes, a path, or a file-like object (e.g. a Streamlit UploadedFile)."""
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            return f.read()
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    source.seek(0)
+    return source.read()
+
+
+def file_hash(pdf_bytes):
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def iter_pdf_pages(source, page_budget=PAGE_BUDGET, workers=EXTRACTION_WORKERS, use_cache=True):
+    """
+    Yields (page_number, text) in page order, up to `page_budget` pages.
+
+    Cached pages (keyed by file hash + page number) are yielded immediately.
+    Uncached pages are split into batches across a process pool, and each page is
+    yielded as soon as its batch finishes, so callers can start working before
+    the whole document has been extracted.
+    """
+    pdf_bytes = read_pdf_bytes(source)
+    digest = file_hash(pdf_bytes)
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    page_count = min(len(reader.pages), page_budget)
+
+    # 1. Look up every page in the cache first, in one transaction
+    cached = {}
+    if use_cache:
+        found = page_cache.get_many(f"{digest}:{n}" for n in range(page_count))
+        cached = {n: found[f"{digest}:{n}"] for n in range(page_count) if f"{digest}:{n}" in found}
+    missing = [n for n in range(page_count) if n not in cached]
+
+    # New pages are written in one transaction (and one eviction pass) once the document is done,
+    # or once the caller stops reading early
+    extracted = []
+
+    def remember(n, text):
+        extracted.append((f"{digest}:{n}", text))
+        return text
+
+    try:
+        # 2. Small jobs: extract in-process, one page at a time
+        if len(missing) < PARALLEL_THRESHOLD or workers <= 1:
+            for n in range(page_count):
+                if n in cached:
+                    yield n, cached[n]
+                else:
+                    yield n, remember(n, reader.pages[n].extract_text() or "")
+            return
+
+        # 3. Large jobs: fan batches out to a process pool, yield in page order
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(pdf_bytes,))
+        try:
+            batch_of = {}
+            futures = []
+            for start in range(0, len(missing), PAGES_PER_BATCH):
+                batch = missing[start:start + PAGES_PER_BATCH]
+                futures.append(executor.submit(_extract_batch, batch))
+                for n in batch:
+                    batch_of[n] = len(futures) - 1
+
+            results = {}
+            for n in range(page_count):
+                if n in cached:
+                    yield n, cached[n]
+                    continue
+                if n not in results:
+                    for page_number, text in futures[batch_of[n]].result():
+                        results[page_number] = remember(page_number, text)
+                yield n, results.pop(n)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+    finally:
+        if use_cache:
+            page_cache.set_many(extracted)
+
+
+def get_pdf_text(source, page_budget=PAGE_BUDGET, workers=EXTRACTION_WORKERS, use_cache=True):
+    """Extracts the full text of a PDF (up to `page_budget` pages) as one string."""
+    return "\n".join(text for _, text in iter_pdf_pages(source, page_budget, workers, use_cache))
@@ -0,0 +1,180 @@
+"""
+Searchable history of finished negotiations.
+
+Every run (contract, analysis, the four reports, parsed clause changes, metrics)
+is stored in a local SQLite file, so a past case can be reopened without paying
+for the pipeline again. An FTS5 index over the verdicts, reports and clause
+changes (porter-stemmed, so "indemnity" also finds "indemnities") answers
+searches across thousands of runs in milliseconds.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from cache import CACHE_DIR, content_hash, normalize_text
+
+# Searches and the recent list return at most this many runs
+DEFAULT_LIMIT = 20
+# bm25() weights for title, contract_type, clauses, verdict, reports, playbook: clause changes matter most
+FTS_WEIGHTS = (2.0, 2.0, 4.0, 2.0, 1.0, 1.0)
+SNIPPET_WORDS = 12
+
+WORD = re.compile(r"\w+")
+
+
+def fts_query(text):
+    """User text as an FTS5 query: every word must match, as a prefix; FTS syntax is never interpreted."""
+    return " ".join(f'"{word}"*' for word in WORD.findall(text.lower()))
+
+
+def clause_text(clause_changes):
+    return "\n\n".join(
+        f"ORIGINAL: {change['original']}\nREVISED: {change['revised']}\nEXPLANATION: {change['explanation']}"
+        for change in clause_changes
+    )
+
+
+class RunHistory:
+    """SQLite-backed, like versions.VersionStore; runs are kept until deleted."""
+    def __init__(self, name="history", directory=None):
+        directory = directory or CACHE_DIR
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{name}.sqlite3")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_at REAL NOT NULL,
+                title TEXT NOT NULL,
+                contract_type TEXT,
+                aggression_mode TEXT,
+                contract_hash TEXT NOT NULL,
+                contract_text TEXT NOT NULL,
+                analysis TEXT NOT NULL,
+                results TEXT NOT NULL,
+                clause_changes TEXT NOT NULL,
+                metrics TEXT NOT NULL,
+                details TEXT NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS runs_created_at ON runs (created_at)")
+        # Some SQLite builds ship without FTS5; search then falls back to a (slow) LIKE scan
+        try:
+            self._conn.execute(
+                """CREATE VIRTUAL TABLE IF NOT EXISTS runs_fts USING fts5(
+                    title, contract_type, clauses, verdict, reports, playbook,
+                    tokenize='porter unicode61'
+                )"""
+            )
+            self.fts = True
+        except sqlite3.OperationalError as e:
+            print(f"⚠️ FTS5 unavailable, history search will scan: {e}")
+            self.fts = False
+        self._conn.commit()
+
+    def record(self, title, contract_text, analysis, results, clause_changes, metrics=None, aggression_mode=None, details=None):
+        """Stores one finished run; `clause_changes` are ClauseChange._asdict() dicts. Returns its id."""
+        contract_type = analysis.get("roles", {}).get("contract_type")
+        with self._lock:
+            cursor = self._conn.execute(
+                """INSERT INTO runs (created_at, title, contract_type, aggression_mode, contract_hash, contract_text,
+                                     analysis, results, clause_changes, metrics, details)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (time.time(), title, contract_type, aggression_mode, content_hash(normalize_text(contract_text)), contract_text,
+                 json.dumps(analysis), json.dumps(results), json.dumps(clause_changes), json.dumps(metrics or {}), json.dumps(details or {}))
+            )
+            if self.fts:
+                self._conn.execute(
+                    "INSERT INTO runs_fts (rowid, title, contract_type, clauses, verdict, reports, playbook) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (cursor.lastrowid, title, contract_type or "", clause_text(clause_changes), results.get("final_verdict", ""),
+                     f"{results.get('shark_report', '')}\n\n{results.get('shield_report', '')}", results.get("negotiation_strategy", ""))
+                )
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def search(self, query, since=None, limit=DEFAULT_LIMIT):
+        """
+        Runs matching every word of `query` (best first), optionally only those created
+        after the `since` timestamp. Each is a dict with id, created_at, title,
+        contract_type, aggression_mode and a highlighted snippet.
+        """
+        match = fts_query(query)
+        if not match:
+            return self.recent(since, limit)
+        since = since or 0
+        with self._lock:
+            if self.fts:
+                rows = self._conn.execute(
+                    f"""SELECT r.id, r.created_at, r.title, r.contract_type, r.aggression_mode,
+                               snippet(runs_fts, -1, '**', '**', '…', {SNIPPET_WORDS})
+                        FROM runs_fts JOIN runs r ON r.id = runs_fts.rowid
+                        WHERE runs_fts MATCH ? AND r.created_at >= ?
+                        ORDER BY bm25(runs_fts, {', '.join(map(str, FTS_WEIGHTS))}) LIMIT ?""",
+                    (match, since, limit)
+                ).fetchall()
+            else:
+                words = WORD.findall(query.lower())
+                rows = self._conn.execute(
+                    f"""SELECT id, created_at, title, contract_type, aggression_mode, ''
+                        FROM runs WHERE created_at >= ? AND {' AND '.join(['lower(results || clause_changes || title) LIKE ?'] * len(words))}
+                        ORDER BY created_at DESC LIMIT ?""",
+                    (since, *(f"%{word}%" for word in words), limit)
+                ).fetchall()
+        return [self._summary(row) for row in rows]
+
+    def recent(self, since=None, limit=DEFAULT_LIMIT):
+        with self._lock:
+            rows = self._conn.execute(
+                """SELECT id, created_at, title, contract_type, aggression_mode, ''
+                   FROM runs WHERE created_at >= ? ORDER BY created_at DESC LIMIT ?""",
+                (since or 0, limit)
+            ).fetchall()
+        return [self._summary(row) for row in rows]
+
+    def get(self, run_id):
+        """Everything stored for one run, with the JSON columns decoded, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                """SELECT id, created_at, title, contract_type, aggression_mode, contract_text,
+                          analysis, results, clause_changes, metrics, details
+                   FROM runs WHERE id = ?""",
+                (run_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ("id", "created_at", "title", "contract_type", "aggression_mode", "contract_text",
+                "analysis", "results", "clause_changes", "metrics", "details")
+        run = dict(zip(keys, row))
+        for key in ("analysis", "results", "clause_changes", "metrics", "details"):
+            run[key] = json.loads(run[key])
+        return run
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM runs")
+            if self.fts:
+                self._conn.execute("DELETE FROM runs_fts")
+            self._conn.commit()
+
+    @staticmethod
+    def _summary(row):
+        run_id, created_at, title, contract_type, aggression_mode, snippet = row
+        return {
+            "id": run_id,
+            "created_at": created_at,
+            "title": title,
+            "contract_type": contract_type,
+            "aggression_mode": aggression_mode,
+            "snippet": snippet
+        }
+
+
+run_history = RunHistory()
@@ -0,0 +1,166 @@
+"""
+Background job queue for negotiations.
+
+Runs are submitted to a bounded worker pool and get an ID and their own output
+directory (runs/<job_id>/), so concurrent users never share stage files or
+results. The UI only keeps the job ID and polls the Job, which means a Streamlit
+rerun (or a closed tab) doesn't stop a negotiation that is in progress.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from logsink import LogSink, bind
+
+JOBS_DIR = os.getenv("WARROOM_JOBS_DIR", os.path.join(os.getcwd(), "runs"))
+MAX_CONCURRENT_JOBS = int(os.getenv("WARROOM_MAX_JOBS", "4"))
+# Finished jobs kept in memory for polling
+MAX_FINISHED_JOBS = 100
+# runs/<job_id>/ directories kept on disk; the oldest beyond this are deleted (finished runs stay in the Case History)
+MAX_RUN_DIRS = int(os.getenv("WARROOM_MAX_RUN_DIRS", "200"))
+
+
+class Job:
+    def __init__(self, job_id, kind, output_dir, stream=None, **info):
+        self.id = job_id
+        self.kind = kind
+        self.output_dir = output_dir
+        # Optional StreamBuffer the job's agents write tokens into
+        self.stream = stream
+        self.info = info
+        self.log = LogSink()
+        self.status = "queued"
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self._done = threading.Event()
+
+    def is_alive(self):
+        """Same contract as threading.Thread.is_alive(), so UI loops can watch either."""
+        return not self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def progress(self):
+        now = self.finished_at or time.time()
+        state = {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "queued_s": round((self.started_at or now) - self.submitted_at, 1),
+            "running_s": round(now - self.started_at, 1) if self.started_at else 0.0,
+            "error": self.error,
+            **self.info
+        }
+        if self.stream is not None:
+            _, snapshot = self.stream.snapshot()
+            state["stages_done"] = sorted(key for key, (_, done) in snapshot.items() if done)
+        return state
+
+    def save(self):
+        """Writes job.json (status, timing, result) atomically into the job's directory."""
+        record = {**self.progress(), "submitted_at": self.submitted_at, "started_at": self.started_at, "finished_at": self.finished_at, "result": self.result}
+        path = os.path.join(self.output_dir, "job.json")
+        try:
+            with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+                json.dump(record, f, indent=2, default=str)
+            os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            print(f"Job state write failed for {path}: {e}")
+
+
+def _fail(job, error):
+    job.error = f"{type(error).__name__}: {error}"
+    job.status = "failed"
+    print(f"❌ Job {job.id} failed: {job.error}")
+
+
+class JobManager:
+    """Process-wide queue: submit(fn) runs fn(job) on the pool and returns the Job at once."""
+    def __init__(self, max_workers=MAX_CONCURRENT_JOBS, jobs_dir=JOBS_DIR, max_run_dirs=MAX_RUN_DIRS):
+        self.jobs_dir = jobs_dir
+        self.max_run_dirs = max_run_dirs
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="warroom-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, kind="negotiation", stream=None, **info):
+        job_id = uuid.uuid4().hex[:12]
+        output_dir = os.path.join(self.jobs_dir, job_id)
+        os.makedirs(output_dir, exist_ok=True)
+        job = Job(job_id, kind, output_dir, stream, **info)
+        with self._lock:
+            self._jobs[job_id] = job
+        job.save()
+        self._pool.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job, fn):
+        # finished_at, job.json and the done flag are written however the job ends, so wait() never hangs
+        try:
+            job.status = "running"
+            job.started_at = time.time()
+            job.save()
+            # Everything the job prints goes to its own log (and log file), never to another session
+            with open(os.path.join(job.output_dir, "run.log"), "w", encoding="utf-8") as log_file:
+                job.log.mirror = log_file
+                try:
+                    with bind(job.log):
+                        try:
+                            job.result = fn(job)
+                            job.status = "done"
+                        except Exception as e:
+                            _fail(job, e)
+                finally:
+                    job.log.mirror = None
+        except Exception as e:
+            # The job's directory or log file is unusable
+            _fail(job, e)
+        finally:
+            job.finished_at = time.time()
+            job.save()
+            job._done.set()
+        self._prune()
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        """All known jobs, newest first."""
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.submitted_at, reverse=True)
+
+    def counts(self):
+        jobs = self.jobs()
+        return {status: sum(1 for job in jobs if job.status == status) for status in ("queued", "running", "done", "failed")}
+
+    def _prune(self):
+        with self._lock:
+            finished = sorted((job for job in self._jobs.values() if not job.is_alive()), key=lambda job: job.finished_at)
+            for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+                del self._jobs[job.id]
+            known = set(self._jobs)
+        self._prune_run_dirs(known)
+
+    def _prune_run_dirs(self, keep):
+        """Deletes the oldest job directories beyond max_run_dirs, never those of jobs still in memory."""
+        try:
+            entries = [entry for entry in os.scandir(self.jobs_dir) if entry.is_dir() and entry.name not in keep]
+        except OSError:
+            return
+        excess = len(entries) + len(keep) - self.max_run_dirs
+        if excess <= 0:
+            return
+        # A job's directory is last written when it finishes (job.json)
+        for entry in sorted(entries, key=lambda entry: entry.stat().st_mtime)[:excess]:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
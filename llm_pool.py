@@ -0,0 +1,358 @@
+"""
+Process-wide LLM client pool.
+
+Every model in the app (agents and the upfront analysis) is built through
+get_pool().chat(...), so they share:
+  - one OpenAI client per (api_key, base_url), i.e. one pooled set of HTTP connections
+  - one scheduler that spaces requests with token buckets for requests-per-minute
+    and tokens-per-minute, instead of bursting into 429s
+  - retries with jittered exponential backoff (honouring Retry-After), which also
+    pause every other caller so one rate-limit error does not cascade into many
+
+Time spent waiting for a slot and retries are reported to any callback handler
+that implements on_pool_event (see telemetry.MetricsCallbackHandler).
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Any
+import httpx
+import openai
+from langchain_core.messages import AIMessageChunk
+from langchain_core.outputs import ChatGenerationChunk
+from prompts import ContractPrefixChatOpenAI, count_prefix_tokens, count_tokens
+
+RPM_LIMIT = int(os.getenv("WARROOM_RPM_LIMIT", "500"))
+TPM_LIMIT = int(os.getenv("WARROOM_TPM_LIMIT", "200000"))
+MAX_RETRIES = int(os.getenv("WARROOM_LLM_RETRIES", "5"))
+MAX_CONNECTIONS = int(os.getenv("WARROOM_MAX_CONNECTIONS", "20"))
+# How much unused capacity may be spent in one burst (60 = a full minute's quota)
+BURST_SECONDS = float(os.getenv("WARROOM_RATE_BURST_SECONDS", "60"))
+# Completion tokens reserved per call before the real usage is known
+COMPLETION_ESTIMATE = int(os.getenv("WARROOM_COMPLETION_ESTIMATE", "1000"))
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_CAP_SECONDS = 60.0
+REQUEST_TIMEOUT_SECONDS = 120.0
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+class TokenBucket:
+    """
+    Reservation-style token bucket: callers take tokens immediately (the balance may
+    go negative) and are told how long to sleep, so waiters are served in order.
+    """
+    def __init__(self, capacity, refill_per_second):
+        self.capacity = float(capacity)
+        self.rate = float(refill_per_second)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount):
+        """Takes `amount` tokens and returns the seconds to wait before using them."""
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= amount
+            return max(0.0, -self.tokens / self.rate)
+
+    def adjust(self, delta):
+        """Gives back (negative delta) or takes extra tokens once real usage is known."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens - delta)
+
+    def drain(self, seconds):
+        """Empties the bucket and borrows `seconds` of refill, delaying every later reservation."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+
+class RateLimiter:
+    """RPM and TPM buckets; a rate-limit response pushes every later reservation back."""
+    def __init__(self, rpm=RPM_LIMIT, tpm=TPM_LIMIT, burst_seconds=BURST_SECONDS):
+        self.requests = TokenBucket(max(1.0, rpm / 60.0 * burst_seconds), rpm / 60.0)
+        self.tokens = TokenBucket(tpm / 60.0 * burst_seconds, tpm / 60.0)
+
+    def reserve(self, tokens):
+        return max(self.requests.reserve(1), self.tokens.reserve(tokens))
+
+    def pause(self, seconds):
+        # Queued callers stay spaced out after the pause instead of all firing when it ends
+        self.requests.drain(seconds)
+
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def _notify(run_manager, event="on_pool_event", handlers=None, **values):
+    for handler in getattr(run_manager, "handlers", None) or handlers or []:
+        callback = getattr(handler, event, None)
+        if callback:
+            callback(**values)
+
+
+class LLMPool:
+    def __init__(self, rpm=RPM_LIMIT, tpm=TPM_LIMIT, max_retries=MAX_RETRIES, max_connections=MAX_CONNECTIONS, burst_seconds=BURST_SECONDS):
+        self.limiter = RateLimiter(rpm, tpm, burst_seconds)
+        self.max_retries = max_retries
+        self.max_connections = max_connections
+        self._clients = {}
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "retries": 0, "failures": 0, "queue_wait_s": 0.0, "max_queue_wait_s": 0.0}
+
+    # --- Clients ---
+    def _limits(self):
+        return httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+
+    def clients(self, api_key=None, base_url=None):
+        """Shared (sync, async) chat completion clients; SDK retries are off, the pool retries."""
+        api_key = api_key or os.getenv("OPENAI_API_KEY")
+        base_url = base_url or os.getenv("OPENAI_API_BASE") or None
+        with self._lock:
+            key = (api_key, base_url)
+            if key not in self._clients:
+                common = {"api_key": api_key, "base_url": base_url, "max_retries": 0, "timeout": REQUEST_TIMEOUT_SECONDS}
+                sync_client = openai.OpenAI(http_client=openai.DefaultHttpxClient(limits=self._limits(), timeout=REQUEST_TIMEOUT_SECONDS), **common)
+                async_client = openai.AsyncOpenAI(http_client=openai.DefaultAsyncHttpxClient(limits=self._limits(), timeout=REQUEST_TIMEOUT_SECONDS), **common)
+                self._clients[key] = (sync_client.chat.completions, async_client.chat.completions)
+            return self._clients[key]
+
+    def chat(self, fallback=None, budget=None, **kwargs):
+        """
+        Builds a PooledChatOpenAI (same arguments as ContractPrefixChatOpenAI) on the shared clients.
+        With a `fallback` model name and a routing.StageBudget, calls switch to the fallback once the budget is spent.
+        """
+        client, async_client = self.clients(kwargs.get("api_key"), kwargs.get("base_url"))
+        if fallback and budget is not None:
+            # The fallback runs inside the primary's call, under its callbacks
+            fallback_llm = self.chat(**{**kwargs, "model": fallback, "callbacks": None})
+            return RoutedChatOpenAI(client=client, async_client=async_client, max_retries=0, pool=self, fallback=fallback_llm, budget=budget, **kwargs)
+        return PooledChatOpenAI(client=client, async_client=async_client, max_retries=0, pool=self, **kwargs)
+
+    # --- Scheduling ---
+    def _estimate(self, messages, model_name):
+        prompt = "\n".join(str(m.content) for m in messages)
+        return count_tokens(prompt, model_name) + COMPLETION_ESTIMATE
+
+    def _record(self, **values):
+        with self._lock:
+            for key, value in values.items():
+                self._stats[key] += value
+            if "queue_wait_s" in values:
+                self._stats["max_queue_wait_s"] = max(self._stats["max_queue_wait_s"], values["queue_wait_s"])
+
+    def _reserve(self, estimate):
+        wait = self.limiter.reserve(estimate)
+        self._record(requests=1, queue_wait_s=wait)
+        return wait
+
+    def _backoff(self, attempt, error, run_manager):
+        """Returns the delay before the next attempt, or re-raises once retries are exhausted."""
+        if attempt >= self.max_retries:
+            self._record(failures=1)
+            raise error
+        delay = random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        if isinstance(error, openai.RateLimitError):
+            # Everyone backs off, not just this caller
+            self.limiter.pause(delay)
+        self._record(retries=1)
+        _notify(run_manager, retries=1)
+        print(f"⏳ LLM call failed ({type(error).__name__}), retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+        return delay
+
+    def _settle(self, estimate, result):
+        usage = (getattr(result, "llm_output", None) or {}).get("token_usage") or {}
+        if usage.get("total_tokens"):
+            self.limiter.tokens.adjust(usage["total_tokens"] - estimate)
+
+    def run(self, call, messages, model_name, run_manager=None):
+        estimate = self._estimate(messages, model_name)
+        attempt = 0
+        while True:
+            wait = self._reserve(estimate)
+            _notify(run_manager, queue_wait_s=wait)
+            if wait:
+                time.sleep(wait)
+            try:
+                result = call()
+            except RETRYABLE_ERRORS as e:
+                time.sleep(self._backoff(attempt, e, run_manager))
+                attempt += 1
+                continue
+            self._settle(estimate, result)
+            return result
+
+    async def arun(self, call, messages, model_name, run_manager=None):
+        estimate = self._estimate(messages, model_name)
+        attempt = 0
+        while True:
+            wait = self._reserve(estimate)
+            _notify(run_manager, queue_wait_s=wait)
+            if wait:
+                await asyncio.sleep(wait)
+            try:
+                result = await call()
+            except RETRYABLE_ERRORS as e:
+                await asyncio.sleep(self._backoff(attempt, e, run_manager))
+                attempt += 1
+                continue
+            self._settle(estimate, result)
+            return result
+
+    def stream(self, make_iter, messages, model_name, run_manager=None):
+        """Like run() for a chunk iterator; only retries if nothing has been yielded yet."""
+        estimate = self._estimate(messages, model_name)
+        attempt = 0
+        while True:
+            wait = self._reserve(estimate)
+            _notify(run_manager, queue_wait_s=wait)
+            if wait:
+                time.sleep(wait)
+            pieces = []
+            try:
+                for chunk in make_iter():
+                    pieces.append(chunk.text)
+                    yield chunk
+                # Streams carry no usage block; settle the reservation from the text instead
+                completion = count_tokens("".join(pieces), model_name)
+                self.limiter.tokens.adjust(completion - COMPLETION_ESTIMATE)
+                return
+            except RETRYABLE_ERRORS as e:
+                if pieces:
+                    self._record(failures=1)
+                    raise
+                time.sleep(self._backoff(attempt, e, run_manager))
+                attempt += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+
+def _as_chunk(result):
+    """A ChatResult as a single stream chunk, carrying the call's usage block in generation_info."""
+    generation = result.generations[0]
+    usage = (result.llm_output or {}).get("token_usage")
+    return ChatGenerationChunk(
+        message=AIMessageChunk(content=generation.text),
+        generation_info={**(generation.generation_info or {}), "token_usage": usage}
+    )
+
+
+class PooledChatOpenAI(ContractPrefixChatOpenAI):
+    """ContractPrefixChatOpenAI whose calls are scheduled and retried by an LLMPool."""
+    pool: Any = None
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        generate = super()._generate
+        if self.pool is None or kwargs.get("stream", self.streaming):
+            # Streaming goes through _stream below, which does its own scheduling
+            return generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        return self.pool.run(
+            lambda: generate(messages, stop=stop, run_manager=run_manager, **kwargs),
+            self._with_prefix(messages), self.model_name, run_manager
+        )
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        if not self.streaming:
+            # BaseChatModel.stream() always lands here; with no live view attached one plain call
+            # does the job, and its usage block gives telemetry and the limiter real token counts
+            result = PooledChatOpenAI._generate(self, messages, stop=stop, run_manager=run_manager, **kwargs)
+            return iter([_as_chunk(result)])
+        stream = super()._stream
+        if self.pool is None:
+            return stream(messages, stop=stop, run_manager=run_manager, **kwargs)
+        return self.pool.stream(
+            lambda: stream(messages, stop=stop, run_manager=run_manager, **kwargs),
+            self._with_prefix(messages), self.model_name, run_manager
+        )
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        agenerate = super()._agenerate
+        if self.pool is None or kwargs.get("stream", self.streaming):
+            return await agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        return await self.pool.arun(
+            lambda: agenerate(messages, stop=stop, run_manager=run_manager, **kwargs),
+            self._with_prefix(messages), self.model_name, run_manager
+        )
+
+
+class RoutedChatOpenAI(PooledChatOpenAI):
+    """
+    PooledChatOpenAI that hands a call to `fallback` when its stage's `budget` is spent.
+    The fallback reports to the same callbacks, so metrics and live streams don't change.
+    Async calls are not budgeted; the pipeline makes none.
+    """
+    fallback: Any = None
+    budget: Any = None
+
+    def _prompt_tokens(self, messages):
+        # The contract prefix is most of every stage's prompt; it is counted once per text and model
+        prefix = count_prefix_tokens(self.contract_prefix, self.model_name) if self._with_prefix(messages) is not messages else 0
+        return prefix + count_tokens("\n".join(str(m.content) for m in messages), self.model_name)
+
+    def _use_fallback(self, prompt_tokens, run_manager):
+        if not self.budget.exceeded(prompt_tokens):
+            return False
+        print(f"💸 Stage over budget: {self.fallback.model_name} takes over from {self.model_name}")
+        # BaseChatModel.stream() gives _stream no run manager; the model's own callbacks still get told
+        _notify(run_manager, "on_model_fallback", handlers=self.callbacks, model=self.fallback.model_name, run_id=getattr(run_manager, "run_id", None))
+        return True
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if kwargs.get("stream", self.streaming):
+            # Streaming goes through _stream below, which does its own routing
+            return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        self.budget.start()
+        prompt_tokens = self._prompt_tokens(messages)
+        model = self.fallback if self._use_fallback(prompt_tokens, run_manager) else super()
+        result = model._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        self.budget.spend(prompt_tokens + count_tokens("".join(g.text for g in result.generations), self.model_name))
+        return result
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        self.budget.start()
+        prompt_tokens = self._prompt_tokens(messages)
+        model = self.fallback if self._use_fallback(prompt_tokens, run_manager) else super()
+        pieces = []
+        try:
+            for chunk in model._stream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                pieces.append(chunk.text)
+                yield chunk
+        finally:
+            self.budget.spend(prompt_tokens + count_tokens("".join(pieces), self.model_name))
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """The process-wide pool, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = LLMPool()
+        return _pool
@@ -0,0 +1,176 @@
+import collections
+import functools
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+ANSI_ESCAPE = re.compile(r'\x1B\[[0-9;]*[mK]')
+
+# Checked in order; the first agent named in a line tags it
+AGENT_TAGS = [
+    (re.compile(r"Shark"), "🦈 SHARK:"),
+    (re.compile(r"Shield"), "🛡️ SHIELD:"),
+    (re.compile(r"Mediator"), "⚖️ MEDIATOR:"),
+    (re.compile(r"Negotiator"), "🤝 COACH:"),
+]
+DEFAULT_TAG = "🤖"
+
+MAX_LINES = 400
+MAX_LINE_CHARS = 2000
+
+
+def tag_line(line):
+    for pattern, tag in AGENT_TAGS:
+        if pattern.search(line):
+            return tag
+    return DEFAULT_TAG
+
+
+class LogSink:
+    """
+    Bounded, per-session log buffer. Writers (agent threads) only append to a
+    fixed-size ring buffer; the UI decides when to read it, so memory stays flat
+    however much the agents print.
+    """
+    def __init__(self, max_lines=MAX_LINES, mirror=None):
+        self.lines = collections.deque(maxlen=max_lines)
+        # Optional file object that receives the full, untrimmed log
+        self.mirror = mirror
+        self.version = 0
+        self.total_lines = 0
+        self._partial = ""
+        self._lock = threading.Lock()
+
+    def write(self, data):
+        cleaned = ANSI_ESCAPE.sub('', data)
+        with self._lock:
+            if self.mirror is not None:
+                self.mirror.write(cleaned)
+            *complete, self._partial = (self._partial + cleaned).split("\n")
+            if len(self._partial) > MAX_LINE_CHARS:
+                complete.append(self._partial)
+                self._partial = ""
+            for line in complete:
+                line = line.strip()
+                if line:
+                    self.lines.append(f"**{tag_line(line)}** {line[:MAX_LINE_CHARS]}")
+                    self.total_lines += 1
+                    self.version += 1
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def tail(self, count):
+        with self._lock:
+            return list(self.lines)[-count:]
+
+    # --- File-object compatibility for libraries that inspect stdout ---
+    def isatty(self):
+        return False
+
+    @property
+    def encoding(self):
+        return 'utf-8'
+
+
+class ThrottledLogView:
+    """Renders the tail of a LogSink into one Streamlit placeholder, at most `max_rate` times per second."""
+    def __init__(self, sink, placeholder, max_rate=4, tail_lines=30):
+        self.sink = sink
+        self.placeholder = placeholder
+        self.min_interval = 1.0 / max_rate
+        self.tail_lines = tail_lines
+        self._rendered_version = -1
+        self._last_render = 0.0
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if self.sink.version == self._rendered_version:
+            return
+        if not force and now - self._last_render < self.min_interval:
+            return
+        self._rendered_version = self.sink.version
+        self._last_render = now
+
+        hidden = self.sink.total_lines - len(self.sink.lines)
+        header = f"*… {hidden} earlier lines trimmed*\n\n" if hidden > 0 else ""
+        try:
+            self.placeholder.markdown(header + "\n\n".join(self.sink.tail(self.tail_lines)))
+        except Exception:
+            pass
+
+
+class StdoutRouter:
+    """
+    Process-wide stdout proxy. Writes from a thread bound to a LogSink go to
+    that sink; everything else falls through to the real stdout. This keeps
+    concurrent sessions from seeing each other's agent output.
+    """
+    def __init__(self, fallback):
+        self.fallback = fallback
+        self.sinks = {}
+
+    def write(self, data):
+        return self.sinks.get(threading.get_ident(), self.fallback).write(data)
+
+    def flush(self):
+        sink = self.sinks.get(threading.get_ident(), self.fallback)
+        sink.flush()
+
+    def isatty(self):
+        return False
+
+    @property
+    def encoding(self):
+        return getattr(self.fallback, 'encoding', 'utf-8')
+
+
+_install_lock = threading.Lock()
+
+
+def install():
+    """Installs the router over sys.stdout once per process and returns it."""
+    with _install_lock:
+        if not isinstance(sys.stdout, StdoutRouter):
+            sys.stdout = StdoutRouter(sys.stdout)
+        return sys.stdout
+
+
+def current_sink():
+    router = sys.stdout
+    if isinstance(router, StdoutRouter):
+        return router.sinks.get(threading.get_ident())
+    return None
+
+
+@contextmanager
+def bind(sink):
+    """Routes this thread's stdout to `sink` for the duration of the block."""
+    if sink is None:
+        yield
+        return
+    router = install()
+    ident = threading.get_ident()
+    previous = router.sinks.get(ident)
+    router.sinks[ident] = sink
+    try:
+        yield
+    finally:
+        if previous is None:
+            router.sinks.pop(ident, None)
+        else:
+            router.sinks[ident] = previous
+
+
+def propagate(fn):
+    """Wraps `fn` so it logs to the caller's sink when run on a pool thread."""
+    sink = current_sink()
+
+    @functools.wraps(fn)
+    def runner(*args, **kwargs):
+        with bind(sink):
+            return fn(*args, **kwargs)
+    return runner
@@ -1,14 +1,30 @@
 import streamlit as st
+import importlib
+import json
+import threading
 import time
-import re
-import sys
-from pypdf import PdfReader
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
 from fpdf import FPDF
 
+# Settings (API key, cache dir, rate limits) are read from the environment at import time
+load_dotenv()
+
 # --- BACKEND IMPORTS ---
+# Only modules that import quickly are loaded here. crew, streaming and telemetry pull in
+# CrewAI / LangChain (seconds on a cold start), so they are imported where a run needs them.
 try:
-    from crew import WarRoomCrew
-    from utils import analyze_contract, get_redline_html
+    from utils import analyze_contract, get_redline_html, analysis_cache, compare_clause_revisions
+    from clause_parser import ClauseStreamParser, parse_verdict
+    from extraction import iter_pdf_pages, PAGE_BUDGET
+    from logsink import ThrottledLogView
+    from jobs import JobManager
+    from redline import REDLINE_CSS
+    from cache import content_hash
+    from revision import apply_revisions, redlined_document_html
+    from versions import version_store
+    from history import run_history
+    from screener import DEFAULT_TOP_K, top_risks
 except ImportError:
     st.error("⚠️ Critical Error: 'crew.py' or 'utils.py' not found. Please ensure backend files are in the directory.")
     st.stop()
@@ -66,50 +82,115 @@ st.markdown("""
     }
 </style>
 """, unsafe_allow_html=True)
+st.markdown(f"<style>{REDLINE_CSS}</style>", unsafe_allow_html=True)
 
 # --- HELPER CLASSES & FUNCTIONS ---
 
-class StreamToExpander:
+# Stage label -> result tab, in pipeline order
+TAB_TITLES = {
+    "attack": "🦈 The Shark",
+    "defense": "🛡️ The Shield",
+    "verdict": "⚖️ The Mediator",
+    "negotiation": "🤝 The Coach"
+}
+
+# Case History period filter -> days back (None = any time)
+HISTORY_PERIODS = {"Any time": None, "Last 30 days": 30, "Last quarter": 91, "Last year": 365}
+# Run details saved with each single negotiation and restored when it is reopened
+HISTORY_DETAILS = ("token_budget", "incremental", "screening", "fast_path", "rounds")
+
+@st.cache_resource
+def get_job_manager():
+    """One job queue per server process, shared by every session."""
+    return JobManager()
+
+@st.cache_resource
+def preload_backend():
+    """Imports the agent backend on a background thread, once per process, while the user reads the dashboard."""
+    thread = threading.Thread(target=importlib.import_module, args=("crew",), daemon=True)
+    thread.start()
+    return thread
+
+def follow_run(job, log_view, stream=None, slots=None, interval=0.25):
     """
-    Robust stdout wrapper that handles Streamlit threading issues
-    and mocks a real file object to prevent internal crashes.
+    Repaints the live log and (optionally) each live tab until the background job
+    finishes. All Streamlit calls happen here, on the script thread.
     """
-    def __init__(self, expander):
-        self.expander = expander
-        self.buffer = []
-        self.full_text = ""
-
-    def write(self, data):
-        # 1. Clean ANSI codes
-        cleaned_data = re.sub(r'\x1B\[[0-9;]*[mK]', '', data)
-        
-        # 2. Only update if there is actual text
-        if cleaned_data.strip():
-            self.full_text += cleaned_data + "\n"
-            
-            # 3. Detect Agent
-            prefix = "🤖"
-            if "Shark" in cleaned_data: prefix = "🦈 SHARK:"
-            elif "Shield" in cleaned_data: prefix = "🛡️ SHIELD:"
-            elif "Mediator" in cleaned_data: prefix = "⚖️ MEDIATOR:"
-            elif "Negotiator" in cleaned_data: prefix = "🤝 COACH:"
-            
-            # 4. SAFE UPDATE: Try/Except to prevent crashing the whole app
-            try:
-                self.expander.markdown(f"**{prefix}** {cleaned_data.strip()}")
-            except Exception:
-                pass
+    from streaming import stage_keys, stage_view
+
+    seen_version = -1
+    live_verdict = {"parser": ClauseStreamParser(), "text": "", "redlines": {}}
+    while True:
+        alive = job.is_alive()
+        log_view.refresh(force=not alive)
+
+        if stream is not None:
+            version, snapshot = stream.snapshot()
+            if version != seen_version:
+                seen_version = version
+                for stage, slot in slots.items():
+                    # The fast path's review streams into the Mediator tab until its verdict is split out
+                    key = "review" if stage == "verdict" and "review" in snapshot and stage not in snapshot else stage
+                    body, done, total = stage_view(snapshot, key)
+                    if total:
+                        label = "✅ Complete" if done == total else f"✍️ Writing... ({done}/{total} sections done)"
+                        if stage == "verdict":
+                            # Only the latest debate round's verdict is drawn, with its live redlines
+                            paint_live_verdict(slot, label, snapshot[stage_keys(snapshot, key)[-1]], live_verdict)
+                        else:
+                            slot.markdown(f"*{label}*\n\n{body}")
+        if not alive:
+            break
+        time.sleep(interval)
+
+def paint_live_verdict(slot, label, entry, live):
+    """Streams the Mediator's verdict with each clause redline drawn as soon as its block closes."""
+    from streaming import visible_text
 
-    def flush(self):
-        pass
+    text, done = entry
+    text = visible_text(text)
+    parser = live["parser"]
+    if not text.startswith(live["text"]):
+        # The final answer replaced the streamed scratchpad; start over on the new text
+        parser = live["parser"] = ClauseStreamParser()
+    parser.feed(text[parser.length:])
+    live["text"] = text
 
-    # --- CRITICAL FIXES FOR STREAMLIT COMPATIBILITY ---
-    def isatty(self):
-        return False  
+    with slot.container():
+        st.markdown(f"*{label}*\n\n{parser.body(final=done)}{'' if done else ' ▌'}")
+        for idx, change in enumerate(parser.changes):
+            key = (change.original, change.revised)
+            if key not in live["redlines"]:
+                live["redlines"][key] = get_redline_html(change.original, change.revised)
+            st.markdown(f"**Change #{idx+1}:** *{change.explanation}*")
+            st.markdown(f"<div class='diff-container'>{live['redlines'][key]}</div>", unsafe_allow_html=True)
 
-    @property
-    def encoding(self):
-        return 'utf-8'
+def render_run_summary(summary):
+    """Compact per-stage latency / token / cost view for the sidebar."""
+    totals = summary['totals']
+    st.header("📈 Last Run")
+    m1, m2 = st.columns(2)
+    m1.metric("Wall Time", f"{totals['wall_time_s']:.0f}s")
+    m2.metric("Est. Cost", f"${totals['cost_usd']:.4f}")
+    st.caption(f"{totals['prompt_tokens']:,} prompt + {totals['completion_tokens']:,} completion tokens · {totals['llm_calls']} calls · {totals['retries']} retries · {totals.get('queue_wait_s', 0):.1f}s queued")
+    st.dataframe(
+        [
+            {
+                "stage": label,
+                "model": stage.get('model') or "",
+                # Calls the route's fallback model served after the stage went over budget
+                "fallback": f"{stage['fallback_model']} ×{stage['fallback_calls']}" if stage.get('fallback_calls') else "",
+                "time_s": round(stage['wall_time_s'], 1),
+                "ttft_s": stage['ttft_s'],
+                "tokens": stage['prompt_tokens'] + stage['completion_tokens'],
+                "cost_$": round(stage['cost_usd'], 4),
+                "cached": "✓" if stage['cached'] else ""
+            }
+            for label, stage in summary['stages'].items()
+        ],
+        hide_index=True,
+        use_container_width=True
+    )
 
 def clean_text(text):
     """Sanitizes LLM output to remove artifacts."""
@@ -119,25 +200,37 @@ def clean_text(text):
     text = text.replace("```", "").replace("`", "")
     return text.strip()
 
-def get_pdf_text(uploaded_file):
-    """Extracts text from the uploaded PDF (limit 30 pages)."""
-    text = ""
+def get_pdf_text(uploaded_file, page_budget=PAGE_BUDGET, on_snippet=None, snippet_chars=10000):
+    """
+    Extracts text from the uploaded PDF (up to `page_budget` pages).
+    `on_snippet` is called once with the first `snippet_chars` characters as soon
+    as they are available, so risk analysis can overlap the rest of the extraction.
+    """
+    pages = []
+    extracted_chars = 0
+    snippet_sent = False
     try:
-        pdf_reader = PdfReader(uploaded_file)
-        for i, page in enumerate(pdf_reader.pages):
-            if i >= 30: break 
-            text += page.extract_text()
+        for _, page_text in iter_pdf_pages(uploaded_file, page_budget=page_budget):
+            pages.append(page_text)
+            extracted_chars += len(page_text) + 1
+            if on_snippet and not snippet_sent and extracted_chars >= snippet_chars:
+                on_snippet("\n".join(pages)[:snippet_chars])
+                snippet_sent = True
     except Exception as e:
         st.error(f"Error reading PDF: {e}")
         return None
+
+    text = "\n".join(pages)
+    if on_snippet and not snippet_sent:
+        on_snippet(text[:snippet_chars])
     return text
 
-def create_pdf(text):
-    """Generates a downloadable PDF of the verdict."""
+def create_pdf(text, title='The War Room - Legal Verdict'):
+    """Generates a downloadable PDF of the verdict (or any other text, e.g. the revised contract)."""
     class PDF(FPDF):
         def header(self):
             self.set_font('Arial', 'B', 12)
-            self.cell(0, 10, 'The War Room - Legal Verdict', 0, 1, 'C')
+            self.cell(0, 10, title, 0, 1, 'C')
             self.ln(10)
     
     pdf = PDF()
@@ -147,6 +240,94 @@ def create_pdf(text):
     pdf.multi_cell(0, 10, safe_text)
     return pdf.output(dest='S').encode('latin-1')
 
+# --- MEMOIZED RENDERING ---
+# Finished results never change, so everything derived from them is computed once per
+# result set and looked up by its hash on later reruns. Underscored arguments are not
+# hashed by Streamlit; the key stands in for them.
+
+def results_key(results):
+    return content_hash(json.dumps(results, sort_keys=True, default=str))
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def render_reports(key, _results):
+    """Cleaned report texts, the verdict split into body and clause changes, and one redline per change."""
+    if isinstance(_results, dict):
+        shark_text = clean_text(_results.get('shark_report', "No report generated."))
+        shield_text = clean_text(_results.get('shield_report', "No report generated."))
+        verdict_text = clean_text(_results.get('final_verdict', str(_results)))
+        negotiation_text = clean_text(_results.get('negotiation_strategy', "No strategy generated."))
+    else:
+        shark_text = "See Mediator Verdict."
+        shield_text = "See Mediator Verdict."
+        verdict_text = clean_text(str(_results))
+        negotiation_text = "Strategy not available."
+    clause_changes, verdict_content = parse_verdict(verdict_text)
+    return {
+        "shark": shark_text,
+        "shield": shield_text,
+        "verdict": verdict_content,
+        "negotiation": negotiation_text,
+        "changes": list(clause_changes),
+        "redlines": [get_redline_html(change.original, change.revised) for change in clause_changes]
+    }
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def render_revised_contract(key, _contract_text, _clause_changes):
+    return apply_revisions(_contract_text, _clause_changes)
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def render_pdf(key, _text, title='The War Room - Legal Verdict'):
+    return create_pdf(_text, title)
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def render_redlined_document(key, _revised):
+    return redlined_document_html(_revised)
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def render_sweep(key, _sweep):
+    """Per-persona verdict bodies and the per-clause comparison, with its redlines."""
+    verdicts = {mode: clean_text(res.get('final_verdict', '')) for mode, res in _sweep.items()}
+    bodies = {mode: parse_verdict(verdict)[1] for mode, verdict in verdicts.items()}
+    comparison = compare_clause_revisions(verdicts)
+    for row in comparison:
+        for revision in row['revisions'].values():
+            revision['redline'] = get_redline_html(row['original'], revision['revised'])
+    return bodies, comparison
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def flagged_clauses(key, _contract_text, top_k=5):
+    """The local risk scan's top clauses as (signals, score, clause text)."""
+    return [
+        (risk.signals, risk.score, _contract_text[risk.start:risk.end])
+        for risk in top_risks(_contract_text, top_k)
+    ]
+
+def save_run(title, contract_text, analysis, results, aggression_mode, metrics=None, details=None):
+    """Stores a finished run in the case history. Runs on the job thread; a failed write never fails the run."""
+    try:
+        changes, _ = parse_verdict(results.get("final_verdict", ""))
+        run_history.record(title, contract_text, analysis, results, [change._asdict() for change in changes], metrics, aggression_mode, details)
+    except Exception as e:
+        print(f"History write failed: {e}")
+
+def open_run(run_id):
+    """Button callback: replaces the session with a stored run, as if it had just finished."""
+    run = run_history.get(run_id)
+    if run is None:
+        return
+    for key in list(st.session_state.keys()):
+        del st.session_state[key]
+    st.session_state.update({
+        'contract_text': run['contract_text'],
+        'roles': run['analysis'].get('roles', {}),
+        'risk_scores': run['analysis'].get('risk_scores', {}),
+        'simulation_results': run['results'],
+        'history_run': {key: run[key] for key in ('id', 'title', 'created_at', 'aggression_mode')},
+        **run['details']
+    })
+    if run['metrics']:
+        st.session_state['run_summary'] = run['metrics']
+
 # --- MAIN APP LAYOUT ---
 
 st.title("⚖️ The War Room")
@@ -167,8 +348,89 @@ with st.sidebar:
         value="Professional",
         help="Diplomat = Polite | Professional = Standard | Killer = Ruthless"
     )
+
+    debate_rounds = st.slider(
+        "🗣️ Max Debate Rounds",
+        min_value=1,
+        max_value=5,
+        value=1,
+        help="From round 2 on, the Shark rebuts the Shield and the Mediator rules again. The debate stops early once the Mediator's revisions stop changing."
+    )
+
+    page_budget = st.number_input(
+        "📄 PDF Page Budget",
+        min_value=1,
+        max_value=2000,
+        value=PAGE_BUDGET,
+        help="Maximum number of pages extracted from the uploaded contract."
+    )
+
+    chunked_mode = st.toggle(
+        "🧩 Clause-Chunked Mode",
+        value=False,
+        help="Runs the Shark and Shield on clause groups in parallel. Enabled automatically for long contracts so nothing gets truncated."
+    )
+
+    sweep_mode = st.toggle(
+        "🔀 Persona Sweep",
+        value=False,
+        help="Runs Diplomat, Professional and Killer concurrently and compares their verdicts side by side."
+    )
+
+    screen_mode = st.toggle(
+        "🎯 Risk Pre-Screen",
+        value=False,
+        help="Scans every clause locally for risk signals and sends the agents only the riskiest ones, plus a summary of the rest. Much cheaper on long contracts."
+    )
+    screen_top_k = st.slider("Clauses sent to the agents", 5, 100, DEFAULT_TOP_K, 5) if screen_mode else None
+
+    retrieval_mode = st.toggle(
+        "🔎 Clause Retrieval Tool",
+        value=False,
+        help="Gives the agents a search tool over the contract's clauses instead of the full text in every prompt. Keeps prompts small on very long contracts."
+    )
+
+    fast_mode = st.toggle(
+        "⚡ Fast Path for Low-Risk Contracts",
+        value=True,
+        help="Contracts the analysis scores as low risk on every axis get a single review and playbook instead of the full Shark/Shield/Mediator debate. Turn off to force the full debate."
+    )
+
+    incremental_mode = st.toggle(
+        "🔁 Incremental Re-negotiation",
+        value=True,
+        help="When you upload a new version of a contract negotiated before, only the clauses that changed go back through the agents."
+    )
     
+    if 'run_summary' in st.session_state:
+        st.divider()
+        render_run_summary(st.session_state['run_summary'])
+
+    # --- CASE HISTORY ---
     st.divider()
+    st.header("🗂️ Case History")
+    history_query = st.text_input("Search past runs", placeholder="e.g. unlimited indemnity", help="Searches every stored verdict, report and clause change. All words must match.")
+    history_days = HISTORY_PERIODS[st.selectbox("Period", list(HISTORY_PERIODS))]
+    since = time.time() - history_days * 86400 if history_days else None
+    past_runs = run_history.search(history_query, since) if history_query.strip() else run_history.recent(since, limit=5)
+    st.caption(f"{len(past_runs)} match(es)" if history_query.strip() else f"{run_history.count()} runs stored · most recent:")
+    for run in past_runs:
+        st.button(
+            f"📂 {time.strftime('%Y-%m-%d', time.localtime(run['created_at']))} · {run['title']} · {run['contract_type'] or 'Contract'} ({run['aggression_mode']})",
+            key=f"history-{run['id']}",
+            on_click=open_run,
+            args=(run['id'],),
+            use_container_width=True
+        )
+        if run['snippet']:
+            st.caption(run['snippet'])
+
+    st.divider()
+    cache_stats = analysis_cache.stats()
+    st.caption(f"🗄️ Analysis cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses · {cache_stats['entries']} stored")
+    job_counts = get_job_manager().counts()
+    st.caption(f"🧵 Negotiation jobs: {job_counts['running']} running · {job_counts['queued']} queued")
+
     if st.button("🔄 Start New Negotiation", use_container_width=True):
         for key in list(st.session_state.keys()):
             del st.session_state[key]
@@ -176,16 +438,30 @@ with st.sidebar:
 
 # --- LOGIC CONTROLLER ---
 
-if uploaded_file:
+# A run reopened from the case history shows without its PDF
+if uploaded_file or 'history_run' in st.session_state:
     # 1. TEXT EXTRACTION & ANALYSIS
     if 'contract_text' not in st.session_state:
         with st.spinner("🔍 Extracting Text & Analyzing Risks..."):
-            text = get_pdf_text(uploaded_file)
+            from telemetry import RunMetrics
+            # Analysis starts on the first 10k characters while later pages are still extracting
+            analysis_pool = ThreadPoolExecutor(max_workers=1)
+            analysis_jobs = []
+            analysis_metrics = RunMetrics()
+            text = get_pdf_text(
+                uploaded_file,
+                page_budget,
+                on_snippet=lambda snippet: analysis_jobs.append(analysis_pool.submit(analyze_contract, snippet, analysis_metrics))
+            )
+            analysis_pool.shutdown(wait=False)
             if text:
                 st.session_state['contract_text'] = text
                 
                 try:
-                    analysis_result = analyze_contract(text[:10000]) 
+                    analysis_result = analysis_jobs[0].result()
+                    # Read from this run's metrics: the cache's hit counter is shared by every session
+                    st.session_state['analysis_cached'] = analysis_metrics.stages.get('analysis', {}).get('cached', False)
+                    st.session_state['analysis_metrics'] = analysis_metrics.stages
                     st.session_state['roles'] = analysis_result.get('roles', {})
                     st.session_state['risk_scores'] = analysis_result.get('risk_scores', {})
                 except Exception as e:
@@ -193,11 +469,14 @@ if uploaded_file:
                     st.stop()
     
     if 'roles' in st.session_state and 'risk_scores' in st.session_state:
+        preload_backend()
         roles = st.session_state['roles']
         scores = st.session_state['risk_scores']
         
         # --- RISK DASHBOARD ---
         st.markdown("### 📊 Risk Assessment")
+        if st.session_state.get('analysis_cached'):
+            st.caption("⚡ Loaded instantly from the analysis cache (this contract was analyzed before).")
         kpi1, kpi2, kpi3 = st.columns(3)
         
         def get_color(score):
@@ -214,6 +493,14 @@ if uploaded_file:
         kpi3.metric(label="Unfairness Score", value=f"{u_score}/100", delta="High" if u_score > 70 else "OK", delta_color=get_color(u_score))
         
         st.warning(f"⚠️ **Key Red Flag:** {clean_text(scores.get('summary', 'Review required.'))}")
+
+        contract_key = content_hash(st.session_state['contract_text'])
+        flagged = flagged_clauses(contract_key, st.session_state['contract_text'])
+        if flagged:
+            with st.expander("🔎 Riskiest Clauses (local scan)"):
+                for signals, score, clause in flagged:
+                    st.markdown(f"**{', '.join(signal.replace('_', ' ') for signal in signals)}** · score {score}")
+                    st.caption(clause[:300] + ("…" if len(clause) > 300 else ""))
         st.divider()
 
         # --- ROLE DISPLAY ---
@@ -227,129 +514,275 @@ if uploaded_file:
         # 3. NEGOTIATION SIMULATION
         st.subheader("⚔️ The Negotiation Arena")
         
-        if 'simulation_results' not in st.session_state:
+        if 'simulation_results' not in st.session_state and 'active_job' not in st.session_state:
             if st.button("🚀 Enter The Arena (Run AI Agents)", type="primary", use_container_width=True):
-                
+                from crew import WarRoomCrew, SINGLE_PASS_CHARS, run_crews, sweep_crews
+                from streaming import StreamBuffer
+                from telemetry import RunMetrics
+
+                user_role = roles.get('user_role', 'Tenant')
+                counter_role = roles.get('counter_party', 'Landlord')
+
+                contract_text = st.session_state['contract_text']
+                # The pre-screen and the retrieval tool shrink long contracts themselves, so they need
+                # neither chunking nor truncation
+                reduced = screen_mode or retrieval_mode
+                use_chunks = chunked_mode or (len(contract_text) > SINGLE_PASS_CHARS and not reduced)
+                # Single-pass mode still has to fit one prompt
+                crew_text = contract_text if use_chunks or reduced else contract_text[:SINGLE_PASS_CHARS]
+                analysis_stages = st.session_state.get('analysis_metrics')
+                history_title = uploaded_file.name if uploaded_file else "Untitled contract"
+                analysis = {"roles": roles, "risk_scores": scores}
+                versions = version_store if incremental_mode else None
+
+                # Every sidebar option applies to a sweep's personas just as to a single run
+                crew_options = dict(
+                    chunked=use_chunks,
+                    versions=versions,
+                    screen_top_k=screen_top_k,
+                    retrieval=retrieval_mode,
+                    risk_scores=scores,
+                    fast_path=fast_mode,
+                    max_rounds=debate_rounds
+                )
+
+                if sweep_mode:
+                    # All three personas run concurrently; the slider picks which one fills the tabs
+                    def run_pipeline(job):
+                        crews = sweep_crews(crew_text, user_role, counter_role, output_dir=job.output_dir, analysis_stages=analysis_stages, **crew_options)
+                        sweep = run_crews(crews)
+                        for mode, results in sweep.items():
+                            war_room = crews[mode]
+                            details = {
+                                "token_budget": war_room.token_budget, "incremental": war_room.incremental, "screening": war_room.screening,
+                                "fast_path": war_room.fast_path_reason, "rounds": war_room.rounds
+                            }
+                            save_run(history_title, contract_text, analysis, results, mode, war_room.metrics.summary(), details)
+                        return {"sweep": sweep, "run_summary": crews[aggression_mode].metrics.summary()}
+                else:
+                    def run_pipeline(job):
+                        war_room = WarRoomCrew(
+                            crew_text,
+                            user_role,
+                            counter_role,
+                            aggression_mode,
+                            stream=job.stream,
+                            metrics=RunMetrics(stages=analysis_stages),
+                            output_dir=job.output_dir,
+                            **crew_options
+                        )
+                        payload = {
+                            "results": war_room.run(),
+                            "resumed_stages": war_room.resumed_stages,
+                            "token_budget": war_room.token_budget,
+                            "run_summary": war_room.metrics.summary(),
+                            "incremental": war_room.incremental,
+                            "screening": war_room.screening,
+                            "fast_path": war_room.fast_path_reason,
+                            "rounds": war_room.rounds
+                        }
+                        save_run(
+                            history_title, contract_text, analysis, payload["results"], aggression_mode,
+                            payload["run_summary"], {key: payload[key] for key in HISTORY_DETAILS}
+                        )
+                        return payload
+
+                # The run happens on the job pool, not in this script: reruns and other sessions never block on it
+                job = get_job_manager().submit(
+                    run_pipeline,
+                    kind="sweep" if sweep_mode else "negotiation",
+                    stream=None if sweep_mode else StreamBuffer(),
+                    aggression_mode=aggression_mode
+                )
+                st.session_state['active_job'] = job.id
+
+        if 'active_job' in st.session_state:
+            job = get_job_manager().get(st.session_state['active_job'])
+            if job is None:
+                # The server restarted (or pruned the job) since it was submitted
+                del st.session_state['active_job']
+                st.warning("⚠️ The previous negotiation is no longer available. Please run it again.")
+            else:
                 # --- LIVE FEED CONTAINER ---
-                status_box = st.status("🧠 Agents are debating strategies...", expanded=True)
-                original_stdout = sys.stdout 
-                
-                try:
-                    # Redirect stdout
-                    sys.stdout = StreamToExpander(status_box)
-                    
-                    user_role = roles.get('user_role', 'Tenant')
-                    counter_role = roles.get('counter_party', 'Landlord')
-                    
-                    # Initialize Crew
-                    war_room = WarRoomCrew(
-                        st.session_state['contract_text'][:25000], 
-                        user_role, 
-                        counter_role,
-                        aggression_mode 
-                    )
-                    # Run Crew
-                    result = war_room.run()
-                    st.session_state['simulation_results'] = result
-                    
+                # Re-attaches on every rerun until the job finishes
+                status_box = st.status(f"🧠 Agents are debating strategies... (job `{job.id}`)", expanded=True)
+                if job.status == "queued":
+                    status_box.caption("⏳ Queued: waiting for a free worker.")
+                log_view = ThrottledLogView(job.log, status_box.empty())
+
+                live_slots = None
+                if job.stream is not None:
+                    live_tabs = st.tabs(list(TAB_TITLES.values()))
+                    live_slots = {stage: tab.empty() for stage, tab in zip(TAB_TITLES, live_tabs)}
+                follow_run(job, log_view, job.stream, live_slots)
+                del st.session_state['active_job']
+
+                if job.status == "failed":
+                    status_box.update(label="❌ Negotiation Failed", state="error")
+                    st.error(f"Simulation Error: {job.error}")
+                else:
+                    if job.kind == "sweep":
+                        st.session_state['sweep_results'] = job.result['sweep']
+                        st.session_state['simulation_results'] = job.result['sweep'][job.info['aggression_mode']]
+                        st.session_state['run_summary'] = job.result['run_summary']
+                    else:
+                        st.session_state['simulation_results'] = job.result['results']
+                        st.session_state['resumed_stages'] = job.result['resumed_stages']
+                        st.session_state['token_budget'] = job.result['token_budget']
+                        st.session_state['run_summary'] = job.result['run_summary']
+                        st.session_state['incremental'] = job.result['incremental']
+                        st.session_state['screening'] = job.result['screening']
+                        st.session_state['fast_path'] = job.result['fast_path']
+                        st.session_state['rounds'] = job.result['rounds']
                     status_box.update(label="✅ Negotiation Complete!", state="complete", expanded=False)
-                    
-                except Exception as e:
-                    st.error(f"Simulation Error: {e}")
-                
-                finally:
-                    # RESTORE TERMINAL TO PREVENT CRASHES
-                    sys.stdout = original_stdout
-                
-                # Trigger Rerun
-                if 'simulation_results' in st.session_state:
                     st.rerun()
 
         # 4. DISPLAY RESULTS
         if 'simulation_results' in st.session_state:
             results = st.session_state['simulation_results']
+            if 'sweep_results' in st.session_state:
+                # After a sweep, the slider switches the tabs between personas without rerunning
+                results = st.session_state['sweep_results'].get(aggression_mode, results)
             
-            if isinstance(results, dict):
-                shark_text = clean_text(results.get('shark_report', "No report generated."))
-                shield_text = clean_text(results.get('shield_report', "No report generated."))
-                verdict_text = clean_text(results.get('final_verdict', str(results)))
-                negotiation_text = clean_text(results.get('negotiation_strategy', "No strategy generated."))
-            else:
-                shark_text = "See Mediator Verdict."
-                shield_text = "See Mediator Verdict."
-                verdict_text = clean_text(str(results))
-                negotiation_text = "Strategy not available."
+            history_run = st.session_state.get('history_run')
+            if history_run:
+                st.caption(
+                    f"📂 Reopened from the case history: {history_run['title']} ({history_run['aggression_mode']}), "
+                    f"negotiated {time.strftime('%Y-%m-%d %H:%M', time.localtime(history_run['created_at']))}."
+                )
+
+            incremental = st.session_state.get('incremental')
+            if incremental:
+                st.caption(
+                    f"🔁 New version of a contract negotiated before (version {incremental['previous_version']}): "
+                    f"re-negotiated {incremental['changed']} changed clause(s), carried over {incremental['unchanged']} unchanged."
+                )
+
+            screening = st.session_state.get('screening')
+            if screening:
+                st.caption(f"🎯 Pre-screen: the agents saw the {screening['kept']} riskiest of {screening['clauses']} clauses ({screening['kept_share']:.0%} of the text).")
+
+            if st.session_state.get('fast_path'):
+                st.caption(f"⚡ Fast path: a single review replaced the debate because {st.session_state['fast_path']}.")
+
+            rounds = st.session_state.get('rounds')
+            if rounds:
+                st.caption(
+                    f"🗣️ Debate ran {len(rounds)} round(s)"
+                    + (f" and converged: the last round left {rounds[-1]['similarity']:.0%} of the revisions unchanged." if rounds[-1].get('converged') else ".")
+                )
+
+            if st.session_state.get('resumed_stages'):
+                st.caption(f"♻️ Reused checkpointed stages: {', '.join(st.session_state['resumed_stages'])}")
+
+            if st.session_state.get('token_budget'):
+                with st.expander("🧮 Prompt Token Budget per Stage"):
+                    st.caption("prefix_tokens = shared contract prefix, eligible for provider-side prompt caching after the first stage.")
+                    st.table([{"stage": stage, **budget} for stage, budget in st.session_state['token_budget'].items()])
+
+            key = results_key(results)
+            rendered = render_reports(key, results)
 
             # TABS Layout
-            tab_shark, tab_shield, tab_mediator, tab_coach = st.tabs(["🦈 The Shark", "🛡️ The Shield", "⚖️ The Mediator", "🤝 The Coach"])
+            tab_shark, tab_shield, tab_mediator, tab_coach = st.tabs(list(TAB_TITLES.values()))
 
             with tab_shark:
                 st.markdown("#### 🔴 Aggressive Strategy")
-                st.markdown(f"<div class='st-card shark-card'>{shark_text}</div>", unsafe_allow_html=True)
+                st.markdown(f"<div class='st-card shark-card'>{rendered['shark']}</div>", unsafe_allow_html=True)
 
             with tab_shield:
                 st.markdown("#### 🔵 Defensive Strategy")
-                st.markdown(f"<div class='st-card shield-card'>{shield_text}</div>", unsafe_allow_html=True)
+                st.markdown(f"<div class='st-card shield-card'>{rendered['shield']}</div>", unsafe_allow_html=True)
 
             with tab_mediator:
                 st.markdown("#### 🟢 Final Consensus")
                 
-                verdict_content = verdict_text
-                
+                clause_changes = rendered['changes']
+
                 # --- MULTI-CLAUSE REDLINE VISUALIZER ---
-                pattern = r"---CLAUSE_COMPARISON_START---(.*?)---CLAUSE_COMPARISON_END---"
-                matches = list(re.finditer(pattern, verdict_content, re.DOTALL))
-                
-                if matches:
+                if clause_changes:
                     st.markdown("### 📝 Clause Redlines (AI Auto-Diff)")
-                    st.caption(f"Visualizing {len(matches)} specific changes made to the contract.")
-                    
-                    for idx, match in enumerate(matches):
-                        block = match.group(1).strip()
-                        try:
-                            parts = block.split("REVISED:")
-                            original_part = parts[0].replace("ORIGINAL:", "").strip()
-                            
-                            remaining = parts[1]
-                            if "EXPLANATION:" in remaining:
-                                subparts = remaining.split("EXPLANATION:")
-                                revised_part = subparts[0].strip()
-                                explanation = subparts[1].strip()
-                            else:
-                                revised_part = remaining.strip()
-                                explanation = "No explanation provided."
-
-                            diff_html = get_redline_html(original_part, revised_part)
-                            
-                            with st.expander(f"Change #{idx+1}: {explanation[:60]}..."):
-                                st.markdown(f"**Reasoning:** *{explanation}*")
-                                st.markdown(f"<div class='diff-container'>{diff_html}</div>", unsafe_allow_html=True)
-                                
-                        except Exception as e:
-                            print(f"Parsing error on match {idx}: {e}")
-                            
-                    # Cleanup Text for display
-                    for match in reversed(matches):
-                        verdict_content = verdict_content.replace(match.group(0), "")
-                        verdict_content = verdict_content.replace("---CLAUSE_COMPARISON_START---", "")
-                        verdict_content = verdict_content.replace("---CLAUSE_COMPARISON_END---", "")
+                    st.caption(f"Visualizing {len(clause_changes)} specific changes made to the contract.")
+
+                    for idx, (change, diff_html) in enumerate(zip(clause_changes, rendered['redlines'])):
+                        with st.expander(f"Change #{idx+1}: {change.explanation[:60]}..."):
+                            st.markdown(f"**Reasoning:** *{change.explanation}*")
+                            st.markdown(f"<div class='diff-container'>{diff_html}</div>", unsafe_allow_html=True)
 
                 # Display Clean Text
-                st.markdown(f"<div class='st-card mediator-card'>{verdict_content}</div>", unsafe_allow_html=True)
+                st.markdown(f"<div class='st-card mediator-card'>{rendered['verdict']}</div>", unsafe_allow_html=True)
                 
                 st.divider()
-                pdf_data = create_pdf(verdict_content)
+                # Downloads are built only when clicked (and then cached), and clicking doesn't rerun the page
                 st.download_button(
                     label="📥 Download Final Verdict (PDF)",
-                    data=pdf_data,
+                    data=lambda: render_pdf(key, rendered['verdict']),
                     file_name="War_Room_Verdict.pdf",
                     mime="application/pdf",
+                    on_click="ignore",
                     use_container_width=True
                 )
+
+                # --- FULL REVISED CONTRACT ---
+                if clause_changes and st.session_state.get('contract_text'):
+                    revision_key = content_hash(contract_key, key)
+                    revised = render_revised_contract(revision_key, st.session_state['contract_text'], clause_changes)
+                    st.markdown("### 📄 Full Revised Contract")
+                    st.caption(f"Applied {len(revised.applied)} of {len(clause_changes)} revisions to the full contract.")
+                    if revised.unmatched:
+                        st.warning(f"⚠️ {len(revised.unmatched)} ORIGINAL clause(s) could not be located in the contract and were left out.")
+                    if revised.applied:
+                        col_pdf, col_html = st.columns(2)
+                        with col_pdf:
+                            st.download_button(
+                                label="📥 Download Revised Contract (PDF)",
+                                data=lambda: render_pdf(revision_key, revised.text, title='The War Room - Revised Contract'),
+                                file_name="War_Room_Revised_Contract.pdf",
+                                mime="application/pdf",
+                                on_click="ignore",
+                                use_container_width=True
+                            )
+                        with col_html:
+                            st.download_button(
+                                label="📥 Download Redlined Contract (HTML)",
+                                data=lambda: render_redlined_document(revision_key, revised),
+                                file_name="War_Room_Redline.html",
+                                mime="text/html",
+                                on_click="ignore",
+                                use_container_width=True
+                            )
             
             with tab_coach:
                 st.markdown("#### 🤝 Negotiation Playbook")
-                st.markdown(f"<div class='st-card negotiator-card'>{negotiation_text}</div>", unsafe_allow_html=True)
+                st.markdown(f"<div class='st-card negotiator-card'>{rendered['negotiation']}</div>", unsafe_allow_html=True)
+
+        # 5. PERSONA SWEEP COMPARISON
+        if 'sweep_results' in st.session_state:
+            sweep = st.session_state['sweep_results']
+            bodies, comparison = render_sweep(results_key(sweep), sweep)
+
+            st.divider()
+            st.markdown("### 🔀 Persona Sweep: Verdicts Side by Side")
+            columns = st.columns(len(bodies))
+            for column, (mode, body) in zip(columns, bodies.items()):
+                with column:
+                    st.markdown(f"#### 🦈 {mode}")
+                    st.markdown(f"<div class='st-card mediator-card'>{body}</div>", unsafe_allow_html=True)
+
+            if comparison:
+                st.markdown("### 🧾 Per-Clause Comparison")
+                for idx, row in enumerate(comparison):
+                    with st.expander(f"Clause #{idx+1}: {row['original'][:60]}..."):
+                        st.markdown(f"**Original:** {row['original']}")
+                        for column, mode in zip(st.columns(len(bodies)), bodies):
+                            with column:
+                                st.markdown(f"**{mode}**")
+                                revision = row['revisions'].get(mode)
+                                if revision:
+                                    st.markdown(f"<div class='diff-container'>{revision['redline']}</div>", unsafe_allow_html=True)
+                                    st.caption(revision['explanation'])
+                                else:
+                                    st.caption("Left unchanged.")
 
 else:
     # Empty State
@@ -0,0 +1,217 @@
+"""
+Deterministic, local OpenAI-compatible chat completions server for offline benchmarks.
+
+Usage:
+    python mock_openai_server.py --port 8765 --latency 0.2 --tps 200
+    python mock_openai_server.py --rpm 120          # answer 429 above 120 requests/minute
+    export OPENAI_API_BASE=http://127.0.0.1:8765/v1 OPENAI_API_KEY=mock
+"""
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = (
+    "indemnity liability termination notice payment confidentiality warranty remedy breach "
+    "cap exclusion governing law assignment audit renewal schedule deliverable acceptance"
+).split()
+
+ANALYSIS_RESPONSE = {
+    "roles": {
+        "contract_type": "Lease",
+        "user_role": "Tenant",
+        "counter_party": "Landlord",
+        "user_name": "The Tenant",
+        "counter_party_name": "The Landlord"
+    },
+    "risk_scores": {
+        "liability_score": 72,
+        "financial_risk": 55,
+        "unfairness_score": 81,
+        "summary": "Landlord may enter without notice and seize property on breach."
+    }
+}
+
+CLAUSE_BLOCK = """---CLAUSE_COMPARISON_START---
+ORIGINAL: The Landlord retains the right to enter the premises at any time without notice for inspections.
+REVISED: The Landlord may enter the premises for inspections with at least 24 hours' written notice, except in emergencies.
+EXPLANATION: Balances the Landlord's inspection right with the Tenant's right to quiet enjoyment.
+---CLAUSE_COMPARISON_END---"""
+
+
+def _prompt_text(payload):
+    return "\n".join(str(m.get("content", "")) for m in payload.get("messages", []))
+
+
+def build_reply(prompt, words):
+    """Picks a reply shape from the prompt, deterministically (same prompt -> same reply)."""
+    if "Return ONLY a valid JSON object" in prompt:
+        return json.dumps(ANALYSIS_RESPONSE)
+
+    if "Return a valid schema for the tool" in prompt:
+        # CrewAI's tool-call parsing step
+        names = re.findall(r"Tool Name: ([^\n]+)", prompt)
+        arguments = re.findall(r"Tool Arguments: ([^\n`]+)", prompt)
+        return json.dumps({
+            "tool_name": names[-1].strip() if names else "",
+            "arguments": {"tool_input": arguments[-1].strip() if arguments else ""}
+        })
+    if "Action: Search the contract" not in prompt and "[Search the contract]" in prompt:
+        # Agents with the retrieval tool search once before answering
+        return "Thought: Do I need to use a tool? Yes\nAction: Search the contract\nAction Input: liability indemnity termination"
+
+    seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest(), 16)
+    body = " ".join(WORDS[(seed >> (i % 64)) % len(WORDS)] for i in range(words))
+    if "CLAUSE_COMPARISON_START" in prompt:
+        body = f"{body}\n\n{CLAUSE_BLOCK}"
+    if "---PLAYBOOK---" in prompt:
+        # The fast path's review writes its playbook after this marker
+        body = f"{body}\n\n---PLAYBOOK---\n\n{' '.join(body.split()[:words // 4])}"
+    return f"Thought: Do I need to use a tool? No\nFinal Answer: {body}"
+
+
+class MockState:
+    def __init__(self, latency, tokens_per_second, words, rpm=None):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.words = words
+        self.rpm = rpm
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.rejected = 0
+        self.busy_seconds = 0.0
+        self.lock = threading.Lock()
+        self._recent = deque()
+
+    def admit(self):
+        """Enforces `rpm` over a one-second sliding window, like a provider's short-term limiter."""
+        if not self.rpm:
+            return True
+        now = time.monotonic()
+        with self.lock:
+            while self._recent and now - self._recent[0] >= 1.0:
+                self._recent.popleft()
+            if len(self._recent) >= max(1, self.rpm // 60):
+                self.rejected += 1
+                return False
+            self._recent.append(now)
+            return True
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+
+        started = time.perf_counter()
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if not self.state.admit():
+            self._send_json({"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}}, status=429, headers={"Retry-After": "1"})
+            return
+        prompt = _prompt_text(payload)
+        reply = build_reply(prompt, self.state.words)
+        tokens = reply.split(" ")
+        model = payload.get("model", "mock")
+        usage = {
+            "prompt_tokens": len(prompt) // 4 + 1,
+            "completion_tokens": len(tokens),
+            "total_tokens": len(prompt) // 4 + 1 + len(tokens)
+        }
+
+        # Counted before replying: a client that has its response may read the state right away
+        with self.state.lock:
+            self.state.requests += 1
+            self.state.prompt_tokens += usage["prompt_tokens"]
+
+        time.sleep(self.state.latency)
+        if payload.get("stream"):
+            self._stream(reply, tokens, model)
+        else:
+            time.sleep(len(tokens) / self.state.tokens_per_second)
+            self._send_json({
+                "id": "chatcmpl-mock",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+                "usage": usage
+            })
+
+        with self.state.lock:
+            self.state.busy_seconds += time.perf_counter() - started
+
+    def _send_json(self, body, status=200, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, reply, tokens, model):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        def event(delta, finish_reason=None):
+            chunk = {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+
+        # Tokens are sent in small batches to keep sleep overhead out of the measurement
+        batch = max(1, self.state.tokens_per_second // 50)
+        event({"role": "assistant", "content": ""})
+        for start in range(0, len(tokens), batch):
+            piece = " ".join(tokens[start:start + batch])
+            event({"content": piece if start == 0 else " " + piece})
+            self.wfile.flush()
+            time.sleep(len(tokens[start:start + batch]) / self.state.tokens_per_second)
+        event({}, "stop")
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def start_mock_server(port=0, latency=0.05, tokens_per_second=500, words=120, rpm=None):
+    """Starts the server on a daemon thread. Returns (server, state, base_url)."""
+    state = MockState(latency, tokens_per_second, words, rpm)
+    handler = type("BoundMockHandler", (MockHandler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local mock OpenAI server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before the first token")
+    parser.add_argument("--tps", type=int, default=200, help="Completion tokens per second")
+    parser.add_argument("--words", type=int, default=120, help="Words per agent reply")
+    parser.add_argument("--rpm", type=int, default=None, help="Reject requests above this rate with 429")
+    args = parser.parse_args()
+
+    server, _, base_url = start_mock_server(args.port, args.latency, args.tps, args.words, args.rpm)
+    print(f"Mock OpenAI server listening on {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,98 @@
+import functools
+from langchain_core.messages import SystemMessage
+from langchain_openai import ChatOpenAI
+
+# Kept byte-for-byte stable: provider-side prefix caching only applies to identical leading tokens
+CONTRACT_PREFIX_TEMPLATE = """SHARED CONTRACT CONTEXT
+Every task in this session concerns the contract below. Refer to it as "the contract".
+
+<contract>
+{contract_text}
+</contract>"""
+
+
+def build_contract_prefix(contract_text):
+    if not contract_text:
+        return ""
+    return CONTRACT_PREFIX_TEMPLATE.format(contract_text=contract_text.strip())
+
+
+@functools.lru_cache(maxsize=8)
+def _encoding(model_name):
+    # None is cached too: offline, tiktoken retries its download (for seconds) on every call
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text, model_name="gpt-4o-mini"):
+    """Token count via tiktoken, falling back to a 4-chars-per-token estimate offline."""
+    if not text:
+        return 0
+    encoding = _encoding(model_name or "gpt-4o-mini")
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text))
+
+
+@functools.lru_cache(maxsize=32)
+def count_prefix_tokens(contract_prefix, model_name="gpt-4o-mini"):
+    """count_tokens() for the shared prefix, which is resent (and recounted) on every call."""
+    return count_tokens(contract_prefix, model_name)
+
+
+class ContractPrefixChatOpenAI(ChatOpenAI):
+    """
+    ChatOpenAI that sends the contract once, as a leading system message shared by
+    every agent and task, instead of pasting it into each task description.
+    """
+    contract_prefix: str = ""
+
+    def _with_prefix(self, messages):
+        if not self.contract_prefix:
+            return messages
+        if messages and isinstance(messages[0], SystemMessage) and messages[0].content == self.contract_prefix:
+            return messages
+        return [SystemMessage(content=self.contract_prefix)] + list(messages)
+
+    def _get_invocation_params(self, stop=None, **kwargs):
+        # Callbacks only see the messages before _with_prefix; this lets them bill the prefix too
+        params = super()._get_invocation_params(stop=stop, **kwargs)
+        params["contract_prefix_tokens"] = count_prefix_tokens(self.contract_prefix, self.model_name)
+        return params
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return super()._generate(self._with_prefix(messages), stop=stop, run_manager=run_manager, **kwargs)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        return super()._stream(self._with_prefix(messages), stop=stop, run_manager=run_manager, **kwargs)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        return await super()._agenerate(self._with_prefix(messages), stop=stop, run_manager=run_manager, **kwargs)
+
+    def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        return super()._astream(self._with_prefix(messages), stop=stop, run_manager=run_manager, **kwargs)
+
+
+def stage_token_budget(agent, task, upstream_outputs, contract_prefix="", model_name="gpt-4o-mini"):
+    """
+    Estimates the input tokens a stage sends: the shared contract prefix (cacheable
+    across stages), the agent persona + task instructions, and chained context.
+    """
+    prefix_tokens = count_tokens(contract_prefix, model_name)
+    task_tokens = count_tokens(
+        "\n".join([agent.role, agent.backstory, agent.goal, task.description, task.expected_output or ""]),
+        model_name
+    )
+    context_tokens = count_tokens("\n".join(upstream_outputs), model_name)
+    return {
+        "prefix_tokens": prefix_tokens,
+        "task_tokens": task_tokens,
+        "context_tokens": context_tokens,
+        "total_tokens": prefix_tokens + task_tokens + context_tokens
+    }
@@ -0,0 +1,271 @@
+"""
+Redline diff engine behind utils.get_redline_html.
+
+Texts are compared top-down: unique sentences first, then words inside the changed
+stretches, then characters inside short replaced word spans. Each level uses a patience diff
+(anchored on tokens that occur exactly once on both sides) and falls back to
+Myers' O(ND) algorithm for stretches with no unique anchors, so long clauses stay
+close to linear and repetitive boilerplate aligns on the right sentences.
+
+Markup is plain <del>/<ins> styled by REDLINE_CSS instead of per-span inline styles.
+"""
+import html
+from bisect import bisect_left
+
+# Myers cost guard: stretches needing more edits than this are reported as replaced wholesale
+MAX_EDIT_DISTANCE = 4000
+# Replaced spans up to this many characters (per side) are refined to character level...
+CHAR_REFINE_MAX_CHARS = 80
+# ...when at least this share of their characters still match
+CHAR_REFINE_MIN_SIMILARITY = 0.5
+SENTENCE_ENDINGS = (".", ";", ":", "!", "?")
+
+REDLINE_CSS = """
+.diff-container del { color: #ff4b4b; background-color: #331b1b; text-decoration: line-through; opacity: 0.8; padding: 2px 4px; }
+.diff-container ins { color: #4caf50; background-color: #1b3320; text-decoration: none; font-weight: bold; padding: 2px 4px; border-radius: 4px; }
+.diff-container .c { padding: 0; border-radius: 0; }
+"""
+
+
+def _intern(a, b):
+    """Maps tokens to small ints so comparisons in the hot loops are cheap."""
+    ids = {}
+    return [ids.setdefault(t, len(ids)) for t in a], [ids.setdefault(t, len(ids)) for t in b]
+
+
+def _unique_anchors(a, b, a0, a1, b0, b1):
+    """Longest increasing run of tokens that occur exactly once in both ranges (patience diff)."""
+    seen = {}
+    for i in range(a0, a1):
+        entry = seen.get(a[i])
+        if entry is None:
+            seen[a[i]] = [1, 0, i, -1]
+        else:
+            entry[0] += 1
+    for j in range(b0, b1):
+        entry = seen.get(b[j])
+        if entry is not None:
+            entry[1] += 1
+            entry[3] = j
+    pairs = sorted((e[2], e[3]) for e in seen.values() if e[0] == 1 and e[1] == 1)
+    if not pairs:
+        return []
+
+    tails, tail_index, previous = [], [], [None] * len(pairs)
+    for index, (_, j) in enumerate(pairs):
+        pos = bisect_left(tails, j)
+        if pos == len(tails):
+            tails.append(j)
+            tail_index.append(index)
+        else:
+            tails[pos] = j
+            tail_index[pos] = index
+        previous[index] = tail_index[pos - 1] if pos else None
+
+    anchors = []
+    index = tail_index[-1]
+    while index is not None:
+        anchors.append(pairs[index])
+        index = previous[index]
+    anchors.reverse()
+    return anchors
+
+
+def _myers_blocks(a, b, a0, a1, b0, b1, max_d=MAX_EDIT_DISTANCE):
+    """Matching blocks of a shortest edit script, or None if it needs more than max_d edits."""
+    n, m = a1 - a0, b1 - b0
+    max_d = min(max_d, n + m)
+    offset = max_d + 1
+    v = [0] * (2 * max_d + 3)
+    trace = []
+
+    for d in range(max_d + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[a0 + x] == b[b0 + y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return _backtrack(trace, x, y, d, a0, b0)
+        trace.append(v[offset - d:offset + d + 1])
+    return None
+
+
+def _backtrack(trace, x, y, d, a0, b0):
+    blocks = []
+    while d > 0:
+        k = x - y
+        previous = trace[d - 1]  # diagonals -(d-1)..(d-1)
+        if k == -d or (k != d and previous[k - 1 + d - 1] < previous[k + 1 + d - 1]):
+            prev_k = k + 1
+            prev_x = previous[prev_k + d - 1]
+            start_x, start_y = prev_x, prev_x - prev_k + 1
+        else:
+            prev_k = k - 1
+            prev_x = previous[prev_k + d - 1]
+            start_x, start_y = prev_x + 1, prev_x - prev_k
+        if x > start_x:
+            blocks.append((a0 + start_x, b0 + start_y, x - start_x))
+        x, y = prev_x, prev_x - prev_k
+        d -= 1
+    if x > 0:
+        blocks.append((a0, b0, x))
+    return blocks
+
+
+def matching_blocks(a, b, edit_script=True):
+    """
+    Sorted, merged (i, j, size) runs of equal tokens, like difflib's get_matching_blocks().
+    With edit_script=False, stretches without unique anchors are left unmatched for the
+    caller to refine instead of being aligned by Myers.
+    """
+    a, b = _intern(a, b)
+    blocks = []
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        a0, a1, b0, b1 = stack.pop()
+
+        # 1. Common prefix & suffix
+        start = 0
+        while a0 + start < a1 and b0 + start < b1 and a[a0 + start] == b[b0 + start]:
+            start += 1
+        if start:
+            blocks.append((a0, b0, start))
+            a0, b0 = a0 + start, b0 + start
+        end = 0
+        while a1 - end > a0 and b1 - end > b0 and a[a1 - end - 1] == b[b1 - end - 1]:
+            end += 1
+        if end:
+            blocks.append((a1 - end, b1 - end, end))
+            a1, b1 = a1 - end, b1 - end
+        if a0 == a1 or b0 == b1:
+            continue
+
+        # 2. Split on unique anchors and diff the gaps between them
+        anchors = _unique_anchors(a, b, a0, a1, b0, b1)
+        if anchors:
+            prev_a, prev_b = a0, b0
+            for i, j in anchors:
+                stack.append((prev_a, i, prev_b, j))
+                blocks.append((i, j, 1))
+                prev_a, prev_b = i + 1, j + 1
+            stack.append((prev_a, a1, prev_b, b1))
+            continue
+
+        # 3. No anchors (repetitive text): shortest edit script
+        if edit_script:
+            blocks.extend(_myers_blocks(a, b, a0, a1, b0, b1) or [])
+
+    merged = []
+    for i, j, size in sorted(blocks):
+        if merged and merged[-1][0] + merged[-1][2] == i and merged[-1][1] + merged[-1][2] == j:
+            merged[-1] = (merged[-1][0], merged[-1][1], merged[-1][2] + size)
+        else:
+            merged.append((i, j, size))
+    return merged
+
+
+def opcodes(a, b, blocks=None):
+    """difflib-style (tag, i1, i2, j1, j2) operations turning a into b."""
+    ops = []
+    i = j = 0
+    for bi, bj, size in (blocks if blocks is not None else matching_blocks(a, b)) + [(len(a), len(b), 0)]:
+        if i < bi and j < bj:
+            ops.append(("replace", i, bi, j, bj))
+        elif i < bi:
+            ops.append(("delete", i, bi, j, bj))
+        elif j < bj:
+            ops.append(("insert", i, bi, j, bj))
+        if size:
+            ops.append(("equal", bi, bi + size, bj, bj + size))
+        i, j = bi + size, bj + size
+    return ops
+
+
+def _sentences(words):
+    """Word index ranges of sentences (a word ending in . ; : ! ? closes one)."""
+    spans, start = [], 0
+    for index, word in enumerate(words):
+        if word.endswith(SENTENCE_ENDINGS):
+            spans.append((start, index + 1))
+            start = index + 1
+    if start < len(words):
+        spans.append((start, len(words)))
+    return spans
+
+
+def diff_words(a_words, b_words):
+    """
+    Word-level opcodes. Unique sentences are matched first, which splits long texts
+    into small independent pieces; repeated boilerplate sentences are left to the
+    word-level diff, where a shortest edit script can't pair them up out of place.
+    """
+    a_spans, b_spans = _sentences(a_words), _sentences(b_words)
+    a_sentences = [" ".join(a_words[s:e]) for s, e in a_spans]
+    b_sentences = [" ".join(b_words[s:e]) for s, e in b_spans]
+
+    ops = []
+    for tag, i1, i2, j1, j2 in opcodes(a_sentences, b_sentences, matching_blocks(a_sentences, b_sentences, edit_script=False)):
+        a0 = a_spans[i1][0] if i1 < i2 else (a_spans[i1 - 1][1] if i1 else 0)
+        a1 = a_spans[i2 - 1][1] if i1 < i2 else a0
+        b0 = b_spans[j1][0] if j1 < j2 else (b_spans[j1 - 1][1] if j1 else 0)
+        b1 = b_spans[j2 - 1][1] if j1 < j2 else b0
+        if tag == "equal":
+            ops.append(("equal", a0, a1, b0, b1))
+        elif tag == "replace":
+            ops.extend(
+                (t, a0 + x1, a0 + x2, b0 + y1, b0 + y2)
+                for t, x1, x2, y1, y2 in opcodes(a_words[a0:a1], b_words[b0:b1])
+            )
+        else:
+            ops.append((tag, a0, a1, b0, b1))
+    return ops
+
+
+def similarity(original_text, revised_text):
+    """0..1 share of words the two texts have in common (difflib ratio() semantics)."""
+    a, b = original_text.split(), revised_text.split()
+    if not a and not b:
+        return 1.0
+    matched = sum(i2 - i1 for tag, i1, i2, _, _ in diff_words(a, b) if tag == "equal")
+    return 2.0 * matched / (len(a) + len(b))
+
+
+def _refine(old, new):
+    """Character-level markup for a short replaced span, or None if it barely overlaps."""
+    if len(old) > CHAR_REFINE_MAX_CHARS or len(new) > CHAR_REFINE_MAX_CHARS:
+        return None
+    blocks = matching_blocks(old, new)
+    if 2.0 * sum(size for _, _, size in blocks) / (len(old) + len(new)) < CHAR_REFINE_MIN_SIMILARITY:
+        return None
+    parts = []
+    for tag, i1, i2, j1, j2 in opcodes(old, new, blocks):
+        if tag in ("delete", "replace"):
+            parts.append(f'<del class="c">{html.escape(old[i1:i2])}</del>')
+        if tag in ("insert", "replace"):
+            parts.append(f'<ins class="c">{html.escape(new[j1:j2])}</ins>')
+        if tag == "equal":
+            parts.append(html.escape(old[i1:i2]))
+    return "".join(parts)
+
+
+def redline_html(original_text, revised_text):
+    """Track-changes HTML: deletions in <del>, additions in <ins>, everything escaped."""
+    a, b = original_text.split(), revised_text.split()
+    parts = []
+    for tag, i1, i2, j1, j2 in diff_words(a, b):
+        old, new = " ".join(a[i1:i2]), " ".join(b[j1:j2])
+        if tag == "equal":
+            parts.append(html.escape(old))
+        elif tag == "delete":
+            parts.append(f"<del>{html.escape(old)}</del>")
+        elif tag == "insert":
+            parts.append(f"<ins>{html.escape(new)}</ins>")
+        else:
+            parts.append(_refine(old, new) or f"<del>{html.escape(old)}</del> <ins>{html.escape(new)}</ins>")
+    return " ".join(parts)
@@ -0,0 +1,108 @@
+"""
+BM25 clause retrieval for the agents.
+
+Instead of pasting the whole contract into every prompt, the Shark, Shield and
+Mediator get a short outline plus a "Search the contract" tool backed by an
+in-memory BM25 index over the contract's clauses. The index is built once per
+contract text; each query touches only the posting lists of its own terms, so
+prompt size stays roughly constant however long the contract is.
+"""
+import functools
+import math
+import re
+from collections import Counter
+from langchain.tools import Tool
+from clauses import clause_spans
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+DEFAULT_RESULTS = 5
+# Tool output is capped so one search can't blow up the prompt
+MAX_RESULT_CHARS = 6000
+OUTLINE_MAX_CLAUSES = 40
+OUTLINE_WORDS = 8
+
+TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or shall that the this to was were will with "
+    "any all such other which who whom under upon into than then there these those be been being".split()
+)
+
+
+def tokenize(text):
+    return [token for token in TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class ClauseRetriever:
+    def __init__(self, text):
+        self.text = text
+        self.spans = clause_spans(text)
+        self.postings = {}  # term -> [(clause index, term frequency)]
+        self.lengths = []
+        for index, (start, end) in enumerate(self.spans):
+            tokens = tokenize(text[start:end])
+            self.lengths.append(len(tokens))
+            for term, count in Counter(tokens).items():
+                self.postings.setdefault(term, []).append((index, count))
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+
+    def clause(self, index):
+        start, end = self.spans[index]
+        return self.text[start:end]
+
+    def search(self, query, k=DEFAULT_RESULTS):
+        """(clause index, score) of the `k` best BM25 matches for `query`, best first."""
+        scores = Counter()
+        clause_count = len(self.spans)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (clause_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for index, count in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[index] / (self.average_length or 1))
+                scores[index] += idf * count * (BM25_K1 + 1) / (count + norm)
+        return scores.most_common(k)
+
+    def outline(self):
+        """What the agents get in place of the contract: its size and how the first clauses begin."""
+        lines = []
+        for start, end in self.spans[:OUTLINE_MAX_CLAUSES]:
+            words = self.text[start:end].split()
+            lines.append(f"- [Clause {len(lines) + 1}] {' '.join(words[:OUTLINE_WORDS])}{' …' if len(words) > OUTLINE_WORDS else ''}")
+        if len(self.spans) > OUTLINE_MAX_CLAUSES:
+            lines.append(f"- … and {len(self.spans) - OUTLINE_MAX_CLAUSES} more clauses")
+        return (
+            f"CONTRACT OUTLINE: the contract has {len(self.spans)} clauses ({len(self.text.split())} words) and is NOT "
+            f"included here. Use the 'Search the contract' tool to read the exact clauses relevant to each point you make, "
+            f"and quote them from the tool's results.\n\n" + "\n".join(lines)
+        )
+
+    def format_results(self, query, k=DEFAULT_RESULTS):
+        hits = self.search(query, k)
+        if not hits:
+            return "No clause matches that query. Try other keywords (e.g. 'indemnity', 'termination notice')."
+        parts, size = [], 0
+        for index, _ in hits:
+            clause = f"[Clause {index + 1}] {self.clause(index)}"
+            if parts and size + len(clause) > MAX_RESULT_CHARS:
+                break
+            parts.append(clause[:MAX_RESULT_CHARS])
+            size += len(clause)
+        return "\n\n".join(parts)
+
+    def as_tool(self, k=DEFAULT_RESULTS):
+        return Tool(
+            name="Search the contract",
+            func=lambda tool_input: self.format_results(tool_input, k),
+            description=(
+                "Finds the contract clauses most relevant to a query. Input: a few keywords or a short question "
+                "(e.g. 'liability cap', 'landlord entry notice'). Returns the matching clauses verbatim."
+            )
+        )
+
+
+@functools.lru_cache(maxsize=4)
+def clause_retriever(text):
+    """Index for a contract text, built once per text."""
+    return ClauseRetriever(text)
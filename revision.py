@@ -0,0 +1,164 @@
+"""
+Applies the Mediator's clause revisions to the whole contract.
+
+ClauseIndex maps every k-word shingle of the (normalized) contract to its
+positions, so a quoted ORIGINAL clause is located by letting its shingles vote
+for an alignment. Each quote costs a handful of dictionary lookups however long
+the contract is, and small misquotes (punctuation, casing, a changed word) only
+remove a few votes instead of breaking the match.
+"""
+import functools
+import html
+import re
+from collections import Counter
+from typing import NamedTuple
+from redline import REDLINE_CSS, redline_html, similarity
+
+WORD = re.compile(r"\w+(?:['’]\w+)*")
+SHINGLE_WORDS = 5
+# Shingles that occur more often than this (boilerplate) carry no location information
+MAX_SHINGLE_HITS = 64
+# Located text must share at least this share of words with the quote
+MIN_MATCH_SIMILARITY = 0.6
+CLOSING_PUNCTUATION = ".;:,"
+
+
+class ClauseMatch(NamedTuple):
+    start: int  # character offsets into the contract
+    end: int
+    score: float
+
+
+class ClauseIndex:
+    def __init__(self, text, k=SHINGLE_WORDS):
+        self.text = text
+        self.k = k
+        self.spans = []
+        words = []
+        for match in WORD.finditer(text):
+            words.append(match.group(0).lower())
+            self.spans.append(match.span())
+        self.words = words
+        # Shingle tables by length; quotes shorter than k words get a table of their own size
+        self._tables = {k: self._build(k)}
+
+    def _build(self, k):
+        table = {}
+        for pos in range(len(self.words) - k + 1):
+            table.setdefault(tuple(self.words[pos:pos + k]), []).append(pos)
+        return table
+
+    def locate(self, quote):
+        """Best ClauseMatch for `quote` in the contract, or None."""
+        quote_words = [w.lower() for w in WORD.findall(quote)]
+        if not quote_words:
+            return None
+        k = min(self.k, len(quote_words))
+        if k not in self._tables:
+            self._tables[k] = self._build(k)
+        shingles = self._tables[k]
+
+        # 1. Every shingle of the quote votes for the offset (contract pos - quote pos) it implies
+        votes = Counter()
+        hits = {}
+        for q in range(len(quote_words) - k + 1):
+            positions = shingles.get(tuple(quote_words[q:q + k]), ())
+            if len(positions) > MAX_SHINGLE_HITS:
+                continue
+            for p in positions:
+                votes[p - q] += 1
+                hits.setdefault(p - q, []).append((p, q))
+        if not votes:
+            return None
+
+        # 2. Take the best offset plus nearby ones (insertions/deletions shift the diagonal a little)
+        best = votes.most_common(1)[0][0]
+        drift = max(3, len(quote_words) // 10)
+        aligned = [hit for offset in range(best - drift, best + drift + 1) for hit in hits.get(offset, ())]
+        first_p, first_q = min(aligned)
+        last_p, last_q = max(aligned)
+        start_word = max(0, first_p - first_q)
+        end_word = min(len(self.words), last_p + len(quote_words) - last_q)
+
+        # 3. Verify the candidate really reads like the quote
+        score = similarity(" ".join(self.words[start_word:end_word]), " ".join(quote_words))
+        if score < MIN_MATCH_SIMILARITY:
+            return None
+        return ClauseMatch(self.spans[start_word][0], self.spans[end_word - 1][1], score)
+
+
+@functools.lru_cache(maxsize=4)
+def clause_index(text):
+    """Index for a contract text, built once per text."""
+    return ClauseIndex(text)
+
+
+class RevisedContract(NamedTuple):
+    text: str       # the full contract with every located revision applied
+    segments: list  # (original_text, revised_text or None, change or None) pieces in document order
+    applied: list   # changes that were located and applied
+    unmatched: list  # changes whose ORIGINAL could not be found
+
+
+def apply_revisions(contract_text, changes):
+    """
+    Locates every change's ORIGINAL text and rebuilds the contract in one pass.
+    When two changes claim overlapping text, the better match wins.
+    """
+    index = clause_index(contract_text)
+    located, unmatched = [], []
+    for change in changes:
+        match = index.locate(change.original)
+        if match is None:
+            unmatched.append(change)
+            continue
+        # Matches end on a word; take the closing punctuation too if the revision brings its own
+        end = match.end
+        if end < len(contract_text) and contract_text[end] in CLOSING_PUNCTUATION and change.revised.rstrip().endswith(contract_text[end]):
+            match = match._replace(end=end + 1)
+        located.append((match, change))
+
+    # Keep non-overlapping matches, preferring higher scores
+    chosen = []
+    for match, change in sorted(located, key=lambda item: -item[0].score):
+        if all(match.end <= other.start or match.start >= other.end for other, _ in chosen):
+            chosen.append((match, change))
+        else:
+            unmatched.append(change)
+    chosen.sort(key=lambda item: item[0].start)
+
+    segments, pos = [], 0
+    for match, change in chosen:
+        if match.start > pos:
+            segments.append((contract_text[pos:match.start], None, None))
+        segments.append((contract_text[match.start:match.end], change.revised, change))
+        pos = match.end
+    if pos < len(contract_text):
+        segments.append((contract_text[pos:], None, None))
+
+    text = "".join(revised if revised is not None else original for original, revised, _ in segments)
+    return RevisedContract(text, segments, [change for _, change in chosen], unmatched)
+
+
+REDLINE_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>
+body {{ background: #0e1117; color: #e0e0e0; font-family: Georgia, serif; max-width: 900px; margin: 40px auto; }}
+.diff-container {{ white-space: pre-wrap; line-height: 1.8; }}
+{css}
+</style></head>
+<body><h1>{title}</h1>
+<div class="diff-container">{body}</div>
+</body></html>"""
+
+
+def redlined_document_html(revised, title="Revised Contract (Track Changes)"):
+    """Standalone HTML page of the whole contract with each applied revision redlined in place."""
+    parts = []
+    for original, new_text, change in revised.segments:
+        if change is None:
+            parts.append(html.escape(original))
+        else:
+            explanation = html.escape(change.explanation, quote=True)
+            parts.append(f'<span title="{explanation}">{redline_html(original, new_text)}</span>')
+    return REDLINE_PAGE.format(title=html.escape(title), css=REDLINE_CSS, body="".join(parts))
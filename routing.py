@@ -0,0 +1,85 @@
+"""
+Per-stage model routing.
+
+Each pipeline stage (analysis, attack, defense, verdict, negotiation, and the fast
+path's review) is served by its own model, with an optional budget: the wall time and
+tokens the whole stage may spend. Once a stage is over budget, or its next call would
+take it over the token limit, its remaining calls go to the route's fallback model
+(typically a cheaper or faster one). Clause-chunked runs share one budget across all
+chunks of a stage.
+
+Routes come from WARROOM_MODEL_ROUTES, a JSON object keyed by stage, e.g.
+    {"analysis": {"model": "gpt-4.1-nano"},
+     "verdict": {"model": "gpt-4o", "fallback": "gpt-4o-mini", "max_seconds": 90, "max_tokens": 60000}}
+A "default" entry applies to stages that aren't listed; without one, stages use OPENAI_MODEL_NAME.
+The switch itself happens in llm_pool.RoutedChatOpenAI.
+"""
+import json
+import os
+import threading
+import time
+from typing import NamedTuple
+
+STAGES = ("analysis", "attack", "defense", "verdict", "negotiation", "review")
+
+
+class Route(NamedTuple):
+    model: str
+    fallback: str = None
+    max_seconds: float = None
+    max_tokens: int = None
+
+
+def load_routes(config=None):
+    """{stage: Route} from `config` (a dict like WARROOM_MODEL_ROUTES), else from the environment."""
+    if config is None:
+        config = json.loads(os.getenv("WARROOM_MODEL_ROUTES", "{}"))
+    default = {"model": os.getenv("OPENAI_MODEL_NAME"), **config.get("default", {})}
+    return {stage: Route(**{**default, **config.get(stage, {})}) for stage in STAGES}
+
+
+def stage_of(label):
+    """The stage a metrics label belongs to: "attack[3]" -> "attack", "verdict-update" -> "verdict"."""
+    return label.split("[")[0].split("-")[0]
+
+
+class StageBudget:
+    """Wall time and tokens spent by one stage, across all its calls, against a Route's limits."""
+    def __init__(self, max_seconds=None, max_tokens=None):
+        self.max_seconds = max_seconds
+        self.max_tokens = max_tokens
+        self.started_at = None
+        self.tokens = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self.started_at is None:
+                self.started_at = time.perf_counter()
+
+    def spend(self, tokens):
+        with self._lock:
+            self.tokens += tokens
+
+    def exceeded(self, next_tokens=0):
+        """True once the stage has run past max_seconds, or if `next_tokens` more would take it past max_tokens."""
+        with self._lock:
+            if self.max_seconds is not None and self.started_at is not None and time.perf_counter() - self.started_at > self.max_seconds:
+                return True
+            return self.max_tokens is not None and self.tokens + next_tokens > self.max_tokens
+
+
+class Router:
+    """Routes and budgets for one pipeline run (budgets are per run, not per process)."""
+    def __init__(self, routes=None):
+        self.routes = routes or load_routes()
+        self.budgets = {stage: StageBudget(route.max_seconds, route.max_tokens) for stage, route in self.routes.items()}
+
+    def route(self, label):
+        return self.routes[stage_of(label)]
+
+    def budget(self, label):
+        return self.budgets[stage_of(label)]
+
+    def summary(self):
+        return {stage: route._asdict() for stage, route in self.routes.items()}
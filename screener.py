@@ -0,0 +1,117 @@
+"""
+Local clause risk pre-screener.
+
+Scores every clause of the contract against a lexicon of legal risk signals
+(indemnities, uncapped liability, unilateral termination, entry without notice...)
+with cheap keyword triggers gating each pattern, so 100-page contracts take milliseconds.
+screen_contract() keeps the top-K risky clauses verbatim and summarises the rest,
+which is what the Shark, Shield and Mediator then see instead of the full contract.
+"""
+import re
+from typing import NamedTuple
+from clauses import clause_spans
+
+DEFAULT_TOP_K = 25
+# How many skipped clauses the summary names before it just counts them
+SUMMARY_MAX_CLAUSES = 40
+SUMMARY_WORDS = 8
+
+# (signal, weight, trigger words, pattern). A pattern only runs on clauses containing one of
+# its lowercase trigger words, found with plain substring search, which keeps the scan in C.
+RISK_SIGNALS = [
+    ("unlimited_liability", 5, ("unlimited", "uncapped", "not be limited"), r"\bunlimited\s+liabilit\w*|\buncapped\b|\bliabilit\w*\s+(?:shall|will)\s+not\s+be\s+limited"),
+    ("indemnity", 3, ("indemnif", "harmless"), r"\bindemnif\w*|\bhold\s+(?:\w+\s+){0,3}harmless\b"),
+    ("unilateral_termination", 4, ("terminat",), r"\bterminat\w*\s+(?:this\s+\w+\s+)?(?:at\s+any\s+time|for\s+(?:any\s+reason|convenience)|without\s+(?:cause|notice))"),
+    ("entry_without_notice", 4, ("enter",), r"\benter\w*\b[^.;]{0,80}?(?:at\s+any\s+time|without\s+(?:prior\s+)?notice)"),
+    ("sole_discretion", 3, ("discretion",), r"\b(?:sole|absolute)\s+discretion\b"),
+    ("unilateral_change", 3, ("amend", "modif", "change", "vary"), r"\bmay\s+(?:amend|modify|change|vary)\b[^.;]{0,60}?\b(?:at\s+any\s+time|from\s+time\s+to\s+time|without\s+notice)"),
+    ("without_notice", 2, ("without",), r"\bwithout\s+(?:prior\s+|further\s+|any\s+)?notice\b"),
+    ("penalty", 3, ("penalt", "liquidated", "late"), r"\bpenalt\w*|\bliquidated\s+damages\b|\blate\s+(?:fee|charge|payment\s+interest)\w*"),
+    ("forfeiture", 3, ("forfeit", "seiz", "deposit"), r"\bforfeit\w*|\bseiz\w*|\bretain\w*\s+(?:the\s+|any\s+)?(?:security\s+)?deposit"),
+    ("consequential_damages", 2, ("consequential", "indirect", "punitive"), r"\b(?:consequential|indirect|punitive)\s+damages\b"),
+    ("limitation_of_liability", 2, ("limitation", "capped", "limited"), r"\blimitation\s+of\s+liabilit\w*|\bliabilit\w*\s+(?:is|shall\s+be)\s+(?:capped|limited)"),
+    ("ip_assignment", 3, ("assign", "made for hire"), r"\bassign\w*\s+(?:all|any\s+and\s+all)\s+(?:right|title|intellectual)|\bwork\s+made\s+for\s+hire\b"),
+    ("irrevocable", 2, ("irrevocab", "perpetu"), r"\birrevocabl\w*|\bin\s+perpetuity\b|\bperpetual\w*"),
+    ("non_compete", 3, ("compet", "solicit"), r"\bnon-?compet\w*|\bnon-?solicit\w*"),
+    ("waiver", 2, ("waive",), r"\bwaive\w*\b|\bwaiver\b"),
+    ("auto_renewal", 2, ("renew",), r"\bautomatic(?:ally)?\s+renew\w*"),
+    ("dispute_forum", 2, ("arbitration", "jurisdiction", "class action"), r"\bbinding\s+arbitration\b|\bexclusive\s+jurisdiction\b|\bclass\s+action\b"),
+    ("non_refundable", 2, ("refundable", "set-off", "setoff", "deduction"), r"\bnon-?refundable\b|\bwithout\s+(?:any\s+)?(?:set-?off|deduction)\b"),
+]
+# Patterns are lowercase and run on the lowercased text (cheaper than re.IGNORECASE)
+SIGNAL_PATTERNS = [(name, weight, triggers, re.compile(pattern)) for name, weight, triggers, pattern in RISK_SIGNALS]
+SIGNAL_WEIGHTS = {name: weight for name, weight, _, _ in RISK_SIGNALS}
+
+
+class ClauseRisk(NamedTuple):
+    index: int
+    start: int
+    end: int
+    score: int
+    signals: tuple  # distinct signal names, strongest first
+
+
+class Screening(NamedTuple):
+    text: str        # what the agents see: top clauses verbatim plus a summary of the rest
+    selected: list   # ClauseRisk of the clauses kept, in contract order
+    clauses: int     # clauses in the whole contract
+    kept_share: float  # share of the contract's characters kept verbatim
+
+
+def score_clauses(text):
+    """ClauseRisk for every clause, in contract order."""
+    spans = clause_spans(text)
+    lowered = text.lower()
+    risks = []
+    for index, (start, end) in enumerate(spans):
+        clause = lowered[start:end]
+        signals = [
+            (name, weight) for name, weight, triggers, pattern in SIGNAL_PATTERNS
+            if any(trigger in clause for trigger in triggers) and pattern.search(lowered, start, end)
+        ]
+        # Distinct signals add up; a clause repeating one signal isn't riskier for it
+        signals.sort(key=lambda signal: -signal[1])
+        risks.append(ClauseRisk(index, start, end, sum(weight for _, weight in signals), tuple(name for name, _ in signals)))
+    return risks
+
+
+def _rank(risks, top_k):
+    return sorted((risk for risk in risks if risk.score), key=lambda risk: (-risk.score, risk.index))[:top_k]
+
+
+def top_risks(text, top_k=DEFAULT_TOP_K):
+    """The `top_k` highest-scoring clauses with at least one signal, riskiest first."""
+    return _rank(score_clauses(text), top_k)
+
+
+def _summary_line(text, risk):
+    words = text[risk.start:risk.end].split()
+    line = " ".join(words[:SUMMARY_WORDS])
+    return f"- {line}{' …' if len(words) > SUMMARY_WORDS else ''}"
+
+
+def screen_contract(text, top_k=DEFAULT_TOP_K):
+    """
+    Reduces the contract to its `top_k` riskiest clauses (verbatim, in contract order)
+    plus a one-line-per-clause summary of what was left out.
+    """
+    risks = score_clauses(text)
+    keep = {risk.index for risk in _rank(risks, top_k)}
+    selected = [risk for risk in risks if risk.index in keep]
+    skipped = [risk for risk in risks if risk.index not in keep]
+    if not skipped:
+        return Screening(text, selected, len(risks), 1.0)
+
+    kept_chars = sum(risk.end - risk.start for risk in selected)
+    total_chars = sum(risk.end - risk.start for risk in risks) or 1
+    lines = [_summary_line(text, risk) for risk in skipped[:SUMMARY_MAX_CLAUSES]]
+    if len(skipped) > SUMMARY_MAX_CLAUSES:
+        lines.append(f"- … and {len(skipped) - SUMMARY_MAX_CLAUSES} more")
+
+    parts = [
+        f"RISK-SCREENED CONTRACT: the {len(selected)} highest-risk clauses of {len(risks)}, quoted verbatim in contract order.",
+        *(text[risk.start:risk.end] for risk in selected),
+        f"NOT SHOWN: {len(skipped)} clauses ({1 - kept_chars / total_chars:.0%} of the text) that a risk scan found to be routine. They begin:",
+        "\n".join(lines)
+    ]
+    return Screening("\n\n".join(parts), selected, len(risks), kept_chars / total_chars)
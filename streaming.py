@@ -0,0 +1,93 @@
+import re
+import threading
+from langchain_core.callbacks import BaseCallbackHandler
+
+FINAL_ANSWER_MARKER = "Final Answer:"
+# What may follow a stage name in a buffer key: a clause chunk "[3]" or a debate round "-round2"
+KEY_SUFFIX = re.compile(r"\[(\d+)\]|-round(\d+)")
+
+
+class StreamBuffer:
+    """
+    Thread-safe, per-stage text buffers filled by the agents while they generate
+    and polled by the UI. Keys are stage labels such as "attack", "defense[3]"
+    (a clause chunk) or "verdict-round2" (a debate round).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._partial = {}
+        self._completed = {}
+        self.version = 0
+
+    def append(self, key, token):
+        with self._lock:
+            self._partial.setdefault(key, []).append(token)
+            self.version += 1
+
+    def complete(self, key, text):
+        with self._lock:
+            self._completed[key] = text
+            self._partial.pop(key, None)
+            self.version += 1
+
+    def snapshot(self):
+        """Returns (version, {key: (text, is_complete)}) for a consistent render."""
+        with self._lock:
+            view = {key: ("".join(tokens), False) for key, tokens in self._partial.items()}
+            view.update({key: (text, True) for key, text in self._completed.items()})
+            return self.version, view
+
+
+class StageStreamHandler(BaseCallbackHandler):
+    """LangChain callback that forwards every generated token into a StreamBuffer."""
+    def __init__(self, buffer, key):
+        self.buffer = buffer
+        self.key = key
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        # Agents may call the model several times per task (ReAct loop); keep the calls apart
+        self.buffer.append(self.key, "\n\n")
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.buffer.append(self.key, "\n\n")
+
+    def on_llm_new_token(self, token, **kwargs):
+        self.buffer.append(self.key, token)
+
+
+def visible_text(text):
+    """Hides the agent's ReAct scaffolding once the final answer starts streaming."""
+    if FINAL_ANSWER_MARKER in text:
+        return text.rsplit(FINAL_ANSWER_MARKER, 1)[1].strip()
+    return text.strip()
+
+
+def stage_keys(snapshot, stage):
+    """The buffer keys belonging to one stage, in order: the whole-contract run, then chunks or rounds by number."""
+    numbered = {}
+    for key in snapshot:
+        if key == stage:
+            numbered[key] = 0
+        elif key.startswith(stage):
+            match = KEY_SUFFIX.fullmatch(key, len(stage))
+            if match:
+                numbered[key] = int(match.group(1) or match.group(2))
+    return sorted(numbered, key=numbered.get)
+
+
+def stage_view(snapshot, stage):
+    """
+    Combines all buffers belonging to one stage (the whole-contract run plus any
+    per-chunk runs or debate rounds) in order. Returns (markdown, number_complete, number_total).
+    """
+    keys = stage_keys(snapshot, stage)
+
+    sections = []
+    for key in keys:
+        text, done = snapshot[key]
+        body = visible_text(text)
+        if not done:
+            body += " ▌"
+        sections.append(f"**{key}**\n\n{body}" if len(keys) > 1 else body)
+
+    return "\n\n---\n\n".join(sections), sum(1 for k in keys if snapshot[k][1]), len(keys)
@@ -1,12 +1,17 @@
 from crewai import Task
-import os
+
+# Separates the verdict from the playbook in the fast path's single review output
+PLAYBOOK_MARKER = "---PLAYBOOK---"
 
 class WarRoomTasks:
-    
-    def attack_task(self, agent, contract_text, counter_party):
+    # No output_file: crewai 0.11 ignores it, so WarRoomCrew writes each stage's
+    # output into the run's own directory itself (WarRoomCrew._save_output).
+
+    # The contract itself is not pasted here: it reaches every agent once, as the shared
+    # system prefix built in prompts.py, so it is not billed again per task.
+    def attack_task(self, agent, counter_party):
         return Task(
-            description=f"""Analyze the following contract text with the mindset of a high-pressure corporate negotiator representing {counter_party}:
-            '{contract_text}'
+            description=f"""Analyze the contract with the mindset of a high-pressure corporate negotiator representing {counter_party}.
             
             Your objectives:
             1. Analyze language for vulnerabilities, vague wording, or exploitable gaps.
@@ -15,14 +20,12 @@ class WarRoomTasks:
             4. Frame adversarial arguments to weaken any existing protections for the other party.
             """,
             agent=agent,
-            expected_output=f"A markdown 'Red Report' detailing aggressive demands, exploitable gaps, and strategic leverage points favoring {counter_party}.",
-            output_file=os.path.join(os.getcwd(), "shark_output.md")
+            expected_output=f"A markdown 'Red Report' detailing aggressive demands, exploitable gaps, and strategic leverage points favoring {counter_party}."
         )
 
-    def defense_task(self, agent, contract_text, context, user_role):
+    def defense_task(self, agent, context, user_role):
         return Task(
-            description=f"""Review the contract: '{contract_text}'
-            AND the 'Red Report' provided by The Shark.
+            description=f"""Review the contract AND the 'Red Report' provided by The Shark.
             
             Your objectives:
             1. Identify hidden threats and ambiguous obligations that harm {user_role}.
@@ -32,11 +35,10 @@ class WarRoomTasks:
             """,
             agent=agent,
             context=context,
-            expected_output=f"A markdown 'Blue Report' containing risk mitigation strategies, strong protective clauses, and a defense against the Shark's claims for {user_role}.",
-            output_file=os.path.join(os.getcwd(), "shield_output.md")
+            expected_output=f"A markdown 'Blue Report' containing risk mitigation strategies, strong protective clauses, and a defense against the Shark's claims for {user_role}."
         )
 
-    def verdict_task(self, agent, contract_text, context):
+    def verdict_task(self, agent, context):
         return Task(
             description=f"""Review the original contract, the Shark's Red Report, and the Shield's Blue Report.
             
@@ -59,10 +61,105 @@ class WarRoomTasks:
             """,
             agent=agent,
             context=context,
-            expected_output="A Final Verdict + A strict Original vs Revised comparison block at the end explaining the compromise and providing the specific, rewritten contract clauses that represent the optimal midpoint.",
-            output_file=os.path.join(os.getcwd(), "verdict_output.md")
+            expected_output="A Final Verdict + A strict Original vs Revised comparison block at the end explaining the compromise and providing the specific, rewritten contract clauses that represent the optimal midpoint."
         )
     
+    def verdict_update_task(self, agent, context, previous_verdict):
+        # Incremental rounds: the contract context only holds the clauses that changed since
+        # the previous version, so the Mediator revises its last verdict instead of starting over
+        return Task(
+            description=f"""The counterparty has sent a new version of a contract you already ruled on.
+            The contract you were given contains ONLY the clauses that changed (and those removed) since that ruling.
+            Review those changes, the Shark's Red Report and the Shield's Blue Report on them, and your previous verdict below.
+
+            Your objectives:
+            1. Keep every finding and every comparison block of the previous verdict whose clause did not change.
+            2. Revise or drop the parts affected by changed or removed clauses.
+            3. Rule on any new clause with the same fair, market-standard judgement.
+            4. Return the COMPLETE updated verdict, not just the changes.
+
+            Use the exact comparison block format of the previous verdict for EVERY clause you rewrote:
+
+            ---CLAUSE_COMPARISON_START---
+            ORIGINAL: [Insert the exact original text of the clause]
+            REVISED: [Insert your new fair version]
+            EXPLANATION: [One sentence explaining why you changed it]
+            ---CLAUSE_COMPARISON_END---
+
+            PREVIOUS VERDICT:
+            {previous_verdict}
+            """,
+            agent=agent,
+            context=context,
+            expected_output="The complete updated Final Verdict with its Original vs Revised comparison blocks, covering unchanged and changed clauses alike."
+        )
+
+    def rebuttal_task(self, agent, context, counter_party, round_number):
+        # Debate rounds after the first: the Shark finally answers the Shield and the Mediator
+        return Task(
+            description=f"""This is round {round_number} of the negotiation. Review the Shield's latest 'Blue Report'
+            and the Mediator's current Final Verdict, both provided as context.
+
+            Your objectives:
+            1. Push back on the revisions that cost {counter_party} the most, with arguments you have not made yet.
+            2. Concede the points you can no longer credibly defend.
+            3. Do not repeat arguments the Mediator already rejected. If nothing is worth contesting, say so briefly.
+            """,
+            agent=agent,
+            context=context,
+            expected_output=f"An updated markdown 'Red Report' for {counter_party}: the points still contested, with new arguments, and the points conceded."
+        )
+
+    def verdict_round_task(self, agent, context):
+        # Debate rounds after the first: the context carries the Mediator's own previous verdict,
+        # and keeping unchallenged revisions stable is what lets the debate converge
+        return Task(
+            description=f"""Review the Shark's and the Shield's latest reports and your previous Final Verdict, all provided as context.
+
+            Your objectives:
+            1. Keep every revision of your previous verdict that the new reports do not seriously challenge, word for word.
+            2. Change a revision only where a new argument shows it is unfair or unworkable.
+            3. Return the COMPLETE verdict, not just the changes.
+
+            For EVERY clause you rewrote, provide a structured comparison at the very bottom of your report, in this exact format:
+
+            ---CLAUSE_COMPARISON_START---
+            ORIGINAL: [Insert the exact original text of the clause]
+            REVISED: [Insert your new fair version]
+            EXPLANATION: [One sentence explaining why you changed it]
+            ---CLAUSE_COMPARISON_END---
+            """,
+            agent=agent,
+            context=context,
+            expected_output="The complete Final Verdict for this round with its Original vs Revised comparison blocks."
+        )
+
+    def review_task(self, agent, user_role, counter_party):
+        # Fast path for low-risk contracts: one pass stands in for the whole debate,
+        # so it writes the verdict and the playbook, split on PLAYBOOK_MARKER
+        return Task(
+            description=f"""This contract was pre-screened as LOW RISK for {user_role}. Review it in a single pass,
+            weighing the interests of {user_role} against those of {counter_party}.
+
+            Your objectives:
+            1. Briefly confirm why the contract is low risk, and flag anything that still deserves attention.
+            2. Propose fair, market-standard wording only for the clauses that genuinely need it (there may be none).
+            3. For EVERY clause you rewrote, provide a structured comparison in this exact format:
+
+            ---CLAUSE_COMPARISON_START---
+            ORIGINAL: [Insert the exact original text of the clause]
+            REVISED: [Insert your new fair version]
+            EXPLANATION: [One sentence explaining why you changed it]
+            ---CLAUSE_COMPARISON_END---
+
+            4. Then write the line {PLAYBOOK_MARKER} on its own, followed by a short Negotiation Playbook for {user_role}:
+               the 'Ask' script for your revisions, the most likely objection from {counter_party} with a counter-script,
+               and which points {user_role} can concede.
+            """,
+            agent=agent,
+            expected_output=f"A concise Final Verdict with Original vs Revised comparison blocks, then {PLAYBOOK_MARKER} and a short Negotiation Playbook."
+        )
+
     def negotiation_task(self, agent, context, user_role, counter_party):
         return Task(
             description=f"""
@@ -80,7 +177,6 @@ class WarRoomTasks:
             """,
             agent=agent,
             context=context, # This passes the Mediator's Verdict to this task
-            expected_output="A Markdown-formatted Negotiation Playbook containing scripts, BATNA analysis, and rebuttal strategies.",
-            output_file=os.path.join(os.getcwd(), "negotiation_output.md")
+            expected_output="A Markdown-formatted Negotiation Playbook containing scripts, BATNA analysis, and rebuttal strategies."
         )
     
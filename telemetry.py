@@ -0,0 +1,199 @@
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from langchain_core.callbacks import BaseCallbackHandler
+from prompts import count_tokens
+
+METRICS_PATH = os.getenv("WARROOM_METRICS_PATH", os.path.join(os.getcwd(), "warroom_metrics.jsonl"))
+
+# USD per 1M tokens as (input, output). Override or extend with WARROOM_MODEL_PRICES='{"model": [in, out]}'
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+MODEL_PRICES.update({k: tuple(v) for k, v in json.loads(os.getenv("WARROOM_MODEL_PRICES", "{}")).items()})
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    """Best-effort USD cost; unknown models fall back to the closest known prefix, else 0."""
+    model = model or ""
+    prices = MODEL_PRICES.get(model)
+    if prices is None:
+        matches = [name for name in MODEL_PRICES if model.startswith(name)]
+        prices = MODEL_PRICES[max(matches, key=len)] if matches else (0.0, 0.0)
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+
+def _empty_stage():
+    return {
+        "wall_time_s": 0.0,
+        "ttft_s": None,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "llm_calls": 0,
+        "retries": 0,
+        "queue_wait_s": 0.0,
+        "cost_usd": 0.0,
+        "cached": False,
+        "model": None,
+        "fallback_calls": 0,
+        "fallback_model": None
+    }
+
+
+class RunMetrics:
+    """
+    Collects per-stage wall time, time-to-first-token, token usage, retries and
+    estimated cost for one pipeline run, and appends it to a JSONL file.
+    """
+    def __init__(self, run_id=None, stages=None, **context):
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.started_at = time.time()
+        self.context = dict(context)
+        self.stages = {label: dict(values) for label, values in (stages or {}).items()}
+        self._lock = threading.Lock()
+
+    def _stage(self, label):
+        return self.stages.setdefault(label, _empty_stage())
+
+    def record(self, label, **values):
+        """Adds numeric values to a stage and overwrites everything else."""
+        with self._lock:
+            stage = self._stage(label)
+            for key, value in values.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool) and isinstance(stage.get(key), (int, float)):
+                    stage[key] += value
+                else:
+                    stage[key] = value
+
+    @contextmanager
+    def stage(self, label):
+        """Times a block as the wall time of `label`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(label, wall_time_s=time.perf_counter() - start)
+
+    def handler(self, label, model=None):
+        return MetricsCallbackHandler(self, label, model)
+
+    def summary(self):
+        with self._lock:
+            stages = {label: dict(values) for label, values in self.stages.items()}
+        totals = {
+            "wall_time_s": round(time.time() - self.started_at, 2),
+            "prompt_tokens": sum(s["prompt_tokens"] for s in stages.values()),
+            "completion_tokens": sum(s["completion_tokens"] for s in stages.values()),
+            "llm_calls": sum(s["llm_calls"] for s in stages.values()),
+            "retries": sum(s["retries"] for s in stages.values()),
+            "queue_wait_s": round(sum(s.get("queue_wait_s", 0.0) for s in stages.values()), 3),
+            "cost_usd": round(sum(s["cost_usd"] for s in stages.values()), 6),
+        }
+        return {"run_id": self.run_id, "started_at": self.started_at, **self.context, "totals": totals, "stages": stages}
+
+    def write(self, path=None):
+        path = path or METRICS_PATH
+        record = self.summary()
+        try:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            print(f"Metrics write failed for {path}: {e}")
+        return record
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """LangChain callback that meters every model call made on behalf of one stage."""
+    def __init__(self, metrics, label, model=None):
+        self.metrics = metrics
+        self.label = label
+        self.model = model
+        self._calls = {}
+
+    def _start(self, run_id, prompt_text, invocation_params=None):
+        self._calls[run_id] = {
+            "start": time.perf_counter(), "first_token": None, "prompt": prompt_text, "text": [], "model": self.model,
+            # prompts.ContractPrefixChatOpenAI adds the contract after the callbacks have seen the messages
+            "prefix_tokens": (invocation_params or {}).get("contract_prefix_tokens", 0)
+        }
+        self.metrics.record(self.label, llm_calls=1, model=self.model)
+
+    def on_llm_start(self, serialized, prompts, run_id=None, **kwargs):
+        self._start(run_id, "\n".join(prompts), kwargs.get("invocation_params"))
+
+    def on_chat_model_start(self, serialized, messages, run_id=None, **kwargs):
+        self._start(run_id, "\n".join(str(m.content) for batch in messages for m in batch), kwargs.get("invocation_params"))
+
+    def on_llm_new_token(self, token, run_id=None, **kwargs):
+        call = self._calls.get(run_id)
+        if call is None:
+            return
+        if call["first_token"] is None:
+            call["first_token"] = time.perf_counter()
+            with self.metrics._lock:
+                stage = self.metrics._stage(self.label)
+                if stage["ttft_s"] is None:
+                    stage["ttft_s"] = round(call["first_token"] - call["start"], 3)
+        call["text"].append(token)
+
+    def on_llm_end(self, response, run_id=None, **kwargs):
+        call = self._calls.pop(run_id, None)
+        if call is None:
+            return
+
+        # Single-chunk streams (llm_pool, no live view) carry the usage block in generation_info
+        usage = (response.llm_output or {}).get("token_usage") or next(
+            (g.generation_info["token_usage"] for batch in response.generations for g in batch
+             if (g.generation_info or {}).get("token_usage")), {}
+        )
+        prompt_tokens = usage.get("prompt_tokens")
+        completion_tokens = usage.get("completion_tokens")
+
+        model = call["model"]
+
+        # Streaming responses carry no usage block; estimate from the text instead
+        if prompt_tokens is None:
+            prompt_tokens = count_tokens(call["prompt"], model) + call["prefix_tokens"]
+        if completion_tokens is None:
+            generated = "".join(call["text"]) or "".join(
+                g.text for batch in response.generations for g in batch
+            )
+            completion_tokens = count_tokens(generated, model)
+
+        if call["first_token"] is None:
+            # Non-streaming call: the first token arrives with the whole response
+            with self.metrics._lock:
+                stage = self.metrics._stage(self.label)
+                if stage["ttft_s"] is None:
+                    stage["ttft_s"] = round(time.perf_counter() - call["start"], 3)
+
+        self.metrics.record(
+            self.label,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cost_usd=estimate_cost(model, prompt_tokens, completion_tokens)
+        )
+
+    def on_llm_error(self, error, run_id=None, **kwargs):
+        self._calls.pop(run_id, None)
+        self.metrics.record(self.label, retries=1)
+
+    def on_model_fallback(self, model, run_id=None):
+        """Called by llm_pool when the stage's fallback model serves a call instead of its own."""
+        # Without a run id, it's the call this stage's agent has in flight
+        call = self._calls.get(run_id) if run_id else next(reversed(self._calls.values()), None)
+        if call is not None:
+            call["model"] = model
+        self.metrics.record(self.label, fallback_calls=1, fallback_model=model)
+
+    def on_pool_event(self, queue_wait_s=0.0, retries=0):
+        """Called by llm_pool with time spent waiting for a rate-limit slot and pool-level retries."""
+        self.metrics.record(self.label, queue_wait_s=queue_wait_s, retries=retries)
@@ -0,0 +1,52 @@
+"""Offline checks for the batch manifest and resuming an interrupted batch."""
+import os
+import batch
+from batch import JobManifest, run_batch
+
+
+def test_manifest_marks_files_done_only_with_the_same_hash_and_result(tmp_path):
+    manifest = JobManifest(str(tmp_path))
+    assert not manifest.is_done("lease.pdf", "abc", str(tmp_path))
+    manifest.update("lease.pdf", sha256="abc", status="done", result="lease.json")
+    # The result file is missing
+    assert not manifest.is_done("lease.pdf", "abc", str(tmp_path))
+    (tmp_path / "lease.json").write_text("{}")
+    assert manifest.is_done("lease.pdf", "abc", str(tmp_path))
+    # The PDF changed since it was processed
+    assert not manifest.is_done("lease.pdf", "def", str(tmp_path))
+    # A new manifest reads the saved one back
+    assert JobManifest(str(tmp_path)).is_done("lease.pdf", "abc", str(tmp_path))
+
+
+def test_rerun_skips_finished_files_and_retries_failed_ones(tmp_path, monkeypatch):
+    contracts, results = tmp_path / "contracts", tmp_path / "results"
+    contracts.mkdir()
+    for name in ("a.pdf", "b.pdf", "c.pdf"):
+        (contracts / name).write_bytes(name.encode())
+    (contracts / "notes.txt").write_text("not a contract")
+    processed, failing = [], {"b.pdf"}
+
+    def process_contract(path, output_dir, *args):
+        name = os.path.basename(path)
+        processed.append(name)
+        if name in failing:
+            raise ValueError("No extractable text (scanned PDF?)")
+        result_name = name.replace(".pdf", ".json")
+        with open(os.path.join(output_dir, result_name), "w") as f:
+            f.write("{}")
+        return result_name
+
+    monkeypatch.setattr(batch, "process_contract", process_contract)
+    data = run_batch(str(contracts), str(results), workers=2)
+    assert sorted(processed) == ["a.pdf", "b.pdf", "c.pdf"]
+    assert data["files"]["b.pdf"]["status"] == "failed" and "scanned" in data["files"]["b.pdf"]["error"]
+    assert (data["last_batch"]["processed"], data["last_batch"]["failed"]) == (2, 1)
+
+    processed.clear()
+    failing.clear()
+    (contracts / "c.pdf").write_bytes(b"c.pdf, amended")
+    data = run_batch(str(contracts), str(results), workers=2)
+    # a.pdf is unchanged and done; b.pdf failed last time; c.pdf changed
+    assert sorted(processed) == ["b.pdf", "c.pdf"]
+    assert data["last_batch"]["skipped"] == 1
+    assert all(entry["status"] == "done" for entry in data["files"].values())
@@ -0,0 +1,78 @@
+"""Offline checks for cache.DiskCache and the cached contract analysis."""
+import cache
+import utils
+from cache import DiskCache, content_hash, normalize_text
+from telemetry import RunMetrics
+
+
+def test_get_and_set_round_trip(tmp_path):
+    store = DiskCache("t", directory=tmp_path)
+    assert store.get("missing", "default") == "default"
+    store.set("key", {"roles": ["a", "b"]})
+    assert store.get("key") == {"roles": ["a", "b"]}
+    assert (store.hits, store.misses) == (1, 1)
+    # A second handle on the same file sees the entry
+    assert DiskCache("t", directory=tmp_path).get("key") == {"roles": ["a", "b"]}
+
+
+def test_entries_expire_after_ttl(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    store = DiskCache("t", ttl_seconds=60, directory=tmp_path)
+    store.set("old", 1)
+    now[0] += 30
+    store.set("new", 2)
+    now[0] += 40
+    assert store.get("old") is None
+    assert store.get("new") == 2
+    assert len(store) == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    store = DiskCache("t", max_entries=2, directory=tmp_path)
+    for key in ("a", "b"):
+        now[0] += 1
+        store.set(key, key)
+    now[0] += 1
+    store.get("a")  # "b" is now the least recently used
+    now[0] += 1
+    store.set("c", "c")
+    assert len(store) == 2
+    assert store.get("b") is None
+    assert store.get("a") == "a" and store.get("c") == "c"
+
+
+def test_normalized_text_hashes_identically():
+    assert content_hash(normalize_text("The  Tenant\nshall pay")) == content_hash(normalize_text("The Tenant shall   pay "))
+    assert content_hash("a", "bc") != content_hash("ab", "c")
+
+
+def test_analysis_cache_hit_is_recorded_in_the_run_metrics(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENAI_MODEL_NAME", "gpt-4o-mini")
+    monkeypatch.delenv("WARROOM_MODEL_ROUTES", raising=False)
+    monkeypatch.setattr(utils, "analysis_cache", DiskCache("analysis", directory=tmp_path))
+    text = "The Tenant shall pay rent monthly."
+    analysis = {"roles": {"contract_type": "Lease"}, "risk_scores": {"liability_score": 10}}
+    utils.analysis_cache.set(content_hash(normalize_text(text), "gpt-4o-mini", utils.ANALYSIS_PROMPT_VERSION), analysis)
+    metrics = RunMetrics()
+    # A hit makes no model call, so this runs offline
+    assert utils.analyze_contract(text, metrics) == analysis
+    assert metrics.stages["analysis"]["cached"] is True
+
+
+def test_batched_reads_and_writes(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    store = DiskCache("t", ttl_seconds=60, max_entries=3, directory=tmp_path)
+    store.set("stale", 0)
+    now[0] += 61
+    store.set_many([("a", 1), ("b", 2), ("c", 3), ("d", 4)])
+    assert len(store) == 3  # the stale entry and one of the four are evicted in one pass
+    found = store.get_many(["a", "b", "c", "d", "stale", "missing"])
+    assert len(found) == 3 and "stale" not in found
+    assert all(found[key] == value for key, value in (("a", 1), ("b", 2), ("c", 3), ("d", 4)) if key in found)
+    assert (store.hits, store.misses) == (3, 3)
+    now[0] += 61
+    assert store.get_many(found) == {} and len(store) == 0
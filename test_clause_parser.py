@@ -0,0 +1,66 @@
+"""Offline checks for the Mediator's clause comparison parser."""
+from clause_parser import START_MARKER, ClauseStreamParser, parse_verdict
+
+VERDICT = """The lease is mostly fair, with two clauses to fix.
+
+---CLAUSE_COMPARISON_START---
+ORIGINAL: The Landlord may enter the premises at any time without notice for inspections or repairs.
+REVISED: The Landlord may enter the premises with 24 hours written notice for inspections or repairs.
+EXPLANATION: Tenants are entitled to quiet enjoyment.
+---CLAUSE_COMPARISON_END---
+
+---CLAUSE_COMPARISON_START---
+ORIGINAL: The Tenant shall indemnify and hold the Landlord harmless from any claim, with unlimited liability.
+REVISED: The Tenant shall indemnify the Landlord for claims caused by the Tenant's negligence.
+---CLAUSE_COMPARISON_END---
+
+Closing remarks."""
+
+
+def test_parse_verdict():
+    changes, body = parse_verdict(VERDICT)
+    assert len(changes) == 2
+    assert changes[0].original.startswith("The Landlord may enter")
+    assert changes[0].revised.startswith("The Landlord may enter the premises with 24 hours")
+    assert changes[0].explanation == "Tenants are entitled to quiet enjoyment."
+    assert changes[1].explanation == "No explanation provided."
+    assert VERDICT[changes[0].start:changes[0].end].startswith("---CLAUSE_COMPARISON_START---")
+    assert VERDICT[changes[0].start:changes[0].end].endswith("---CLAUSE_COMPARISON_END---")
+    assert "CLAUSE_COMPARISON" not in body
+    assert body.startswith("The lease is mostly fair") and body.endswith("Closing remarks.")
+
+
+def test_stream_parser_matches_single_pass():
+    parser = ClauseStreamParser()
+    streamed = []
+    for i in range(0, len(VERDICT), 7):
+        streamed.extend(parser.feed(VERDICT[i:i + 7]))
+        # A half-received block or marker never shows up in the visible body
+        assert "---CLAUSE" not in parser.body()
+    changes, body = parse_verdict(VERDICT)
+    assert tuple(streamed) == changes
+    assert parser.body(final=True) == body
+    assert parser.length == len(VERDICT)
+
+
+def test_unterminated_block_is_kept_as_text():
+    parser = ClauseStreamParser()
+    parser.feed("Intro.\n---CLAUSE_COMPARISON_START---\nORIGINAL: x\nREVISED: y")
+    assert parser.in_block
+    assert parser.body() == "Intro."
+    assert "REVISED: y" in parser.body(final=True)
+
+
+def test_only_the_unconsumed_tail_is_buffered():
+    verdict = "\n\n".join([VERDICT] * 50)
+    parser = ClauseStreamParser()
+    longest = 0
+    for char in verdict:
+        parser.feed(char)
+        longest = max(longest, len(parser._tail))
+    # Never more than one block, however long the verdict
+    assert longest <= max(change.end - change.start for change in parser.changes)
+    assert len(parser._tail) < len(START_MARKER)
+    # Offsets are still offsets into the whole verdict
+    assert [verdict[c.start:c.end] for c in parser.changes] == [verdict[c.start:c.end] for c in parse_verdict(verdict)[0]]
+    assert len(parser.changes) == 100 and parser.body(final=True) == parse_verdict(verdict)[1]
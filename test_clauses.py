@@ -0,0 +1,51 @@
+"""Offline checks for clause splitting and content-defined clause grouping."""
+from benchmarks import make_synthetic_contract
+from clauses import chunk_contract, group_clauses, split_clauses
+
+CLAUSE = "The Supplier shall deliver the goods within thirty days of each purchase order."
+
+
+def test_split_on_blank_lines_and_numbered_headings():
+    text = f"1. {CLAUSE}\n2. {CLAUSE}\n\n(a) {CLAUSE}\nSection 4 {CLAUSE}\nstill section four."
+    clauses = split_clauses(text)
+    assert clauses == [f"1. {CLAUSE}", f"2. {CLAUSE}", f"(a) {CLAUSE}", f"Section 4 {CLAUSE}\nstill section four."]
+
+
+def test_short_fragments_join_the_next_clause():
+    clauses = split_clauses(f"ARTICLE 1\n\n{CLAUSE}\n\n{CLAUSE}\n\nEnd.")
+    assert clauses[0] == f"ARTICLE 1\n\n{CLAUSE}"
+    # A short trailing fragment joins the clause before it
+    assert clauses[-1] == f"{CLAUSE}\n\nEnd."
+    assert len(clauses) == 2
+
+
+def test_groups_respect_the_size_limit_and_keep_every_clause():
+    clauses = split_clauses(make_synthetic_contract(60))
+    groups = group_clauses(clauses, max_chars=2000)
+    assert len(groups) > 1
+    assert all(len(group) <= 2000 for group in groups)
+    assert "\n\n".join(groups) == "\n\n".join(clauses)
+
+
+def test_oversized_clause_is_split_on_sentences():
+    long_clause = " ".join([CLAUSE] * 40)
+    groups = group_clauses([long_clause], max_chars=500)
+    assert all(len(group) <= 500 for group in groups)
+    assert all(group.endswith(".") for group in groups)
+    assert " ".join(" ".join(group.split("\n\n")) for group in groups) == long_clause
+
+
+def test_an_edit_only_changes_nearby_groups():
+    clauses = split_clauses(make_synthetic_contract(120))
+    before = group_clauses(clauses, max_chars=2000)
+    edited = list(clauses)
+    edited[60] = edited[60].replace("shall", "must")
+    after = group_clauses(edited, max_chars=2000)
+    changed = set(after) - set(before)
+    assert 1 <= len(changed) <= 2
+    assert len(set(after) & set(before)) >= len(before) - 2
+
+
+def test_chunk_contract():
+    text = make_synthetic_contract(30)
+    assert chunk_contract(text, 3000) == group_clauses(split_clauses(text), 3000)
@@ -0,0 +1,128 @@
+"""WarRoomCrew runs against the offline mock server (conftest.mock_llm)."""
+import pytest
+from benchmarks import LOW_RISK_SCORES, make_synthetic_contract
+from crew import AGGRESSION_MODES, SINGLE_PASS_CHARS, WarRoomCrew, fast_path_reason, merge_rounds, revision_similarity, run_crews, run_sweep, sweep_crews
+
+CONTRACT = make_synthetic_contract(8)
+
+
+def test_rerun_resumes_every_stage_from_checkpoints(mock_llm, checkpoints, tmp_path):
+    first = WarRoomCrew(CONTRACT, "Tenant", "Landlord", output_dir=tmp_path)
+    results = first.run()
+    assert first.resumed_stages == []
+
+    mock_llm.requests = 0
+    second = WarRoomCrew(CONTRACT, "Tenant", "Landlord", output_dir=tmp_path)
+    assert second.run() == results
+    assert second.resumed_stages == ["attack", "defense", "verdict", "negotiation"]
+    assert mock_llm.requests == 0
+
+
+def test_crashed_run_resumes_at_the_failed_stage(mock_llm, checkpoints, tmp_path, monkeypatch):
+    run_stage = WarRoomCrew._run_stage
+
+    def crash_at_verdict(self, stage, *args, **kwargs):
+        if stage == "verdict":
+            raise RuntimeError("process killed")
+        return run_stage(self, stage, *args, **kwargs)
+
+    monkeypatch.setattr(WarRoomCrew, "_run_stage", crash_at_verdict)
+    mock_llm.requests = 0
+    with pytest.raises(RuntimeError):
+        WarRoomCrew(CONTRACT, "Tenant", "Landlord", output_dir=tmp_path).run()
+    monkeypatch.setattr(WarRoomCrew, "_run_stage", run_stage)
+
+    crashed_requests, mock_llm.requests = mock_llm.requests, 0
+    resumed = WarRoomCrew(CONTRACT, "Tenant", "Landlord", output_dir=tmp_path)
+    resumed.run()
+    assert resumed.resumed_stages == ["attack", "defense"]
+    # Only the verdict and negotiation stages call the model again (the mock answers every stage alike)
+    assert mock_llm.requests == crashed_requests
+
+
+def test_checkpoints_are_scoped_to_the_inputs(mock_llm, checkpoints, tmp_path):
+    WarRoomCrew(CONTRACT, "Tenant", "Landlord", output_dir=tmp_path).run()
+    other_persona = WarRoomCrew(CONTRACT, "Tenant", "Landlord", aggression_mode="Killer", output_dir=tmp_path)
+    other_persona.run()
+    assert other_persona.resumed_stages == []
+    assert len(checkpoints) == 8
+
+
+def test_sweep_runs_every_persona_with_the_same_options(mock_llm, checkpoints, tmp_path):
+    crews = sweep_crews(CONTRACT, "Tenant", "Landlord", output_dir=str(tmp_path), risk_scores=LOW_RISK_SCORES, max_rounds=2)
+    assert list(crews) == list(AGGRESSION_MODES)
+    assert all(war_room.risk_scores == LOW_RISK_SCORES and war_room.max_rounds == 2 for war_room in crews.values())
+    # Each persona meters (and writes) its own run
+    assert len({id(war_room.metrics) for war_room in crews.values()}) == len(crews)
+
+    sweep = run_crews(crews)
+    for mode, results in sweep.items():
+        assert set(results) == {"shark_report", "shield_report", "final_verdict", "negotiation_strategy"}
+        assert crews[mode].fast_path_reason  # the low-risk fast path applied to every persona
+        assert crews[mode].metrics.summary()["totals"]["llm_calls"] > 0
+        assert (tmp_path / mode / "verdict_output.md").exists()
+
+
+def test_run_sweep(mock_llm, checkpoints):
+    sweep = run_sweep(CONTRACT, "Tenant", "Landlord", modes=AGGRESSION_MODES[:2], use_checkpoints=False, fast_path=False)
+    assert list(sweep) == list(AGGRESSION_MODES[:2])
+    assert all(results["final_verdict"] for results in sweep.values())
+
+
+def test_fast_path_reason():
+    assert fast_path_reason(LOW_RISK_SCORES, CONTRACT)
+    # Any axis above the threshold, or scores that can't be read, need the debate
+    assert fast_path_reason({**LOW_RISK_SCORES, "financial_risk": 31}, CONTRACT) is None
+    assert fast_path_reason({"liability_score": 10}, CONTRACT) is None
+    assert fast_path_reason({**LOW_RISK_SCORES, "liability_score": "n/a"}, CONTRACT) is None
+    assert fast_path_reason(None, CONTRACT) is None
+    # So does one risky clause the analysis may not have seen, or a contract too long for one pass
+    risky = CONTRACT + "\n\n9. The Tenant shall indemnify and hold the Landlord harmless from any claim, with unlimited liability."
+    assert fast_path_reason(LOW_RISK_SCORES, risky) is None
+    assert fast_path_reason(LOW_RISK_SCORES, make_synthetic_contract(SINGLE_PASS_CHARS // 400 + 10)) is None
+
+
+@pytest.mark.parametrize("fast_path", [True, False])
+def test_low_risk_contracts_skip_the_debate_unless_forced(mock_llm, checkpoints, tmp_path, fast_path):
+    war_room = WarRoomCrew(CONTRACT, "Tenant", "Landlord", output_dir=tmp_path, risk_scores=LOW_RISK_SCORES, fast_path=fast_path)
+    results = war_room.run()
+    stages = set(war_room.metrics.stages)
+    if fast_path:
+        assert war_room.fast_path_reason and results["shark_report"].startswith("⚡")
+        assert "review" in stages and not stages & {"attack", "defense"}
+    else:
+        assert war_room.fast_path_reason is None
+        assert {"attack", "defense", "verdict", "negotiation"} <= stages and "review" not in stages
+    assert results["final_verdict"] and results["negotiation_strategy"]
+
+
+def _verdict(*revisions):
+    return "Verdict.\n\n" + "\n\n".join(
+        f"---CLAUSE_COMPARISON_START---\nORIGINAL: {original}\nREVISED: {revised}\n---CLAUSE_COMPARISON_END---" for original, revised in revisions
+    )
+
+
+def test_revision_similarity():
+    entry, cap = ("Landlord may enter at any time.", "Landlord may enter with 24 hours notice."), ("Liability is unlimited.", "Liability is capped at one year of rent.")
+    # Revisions are matched up by the clause they revise, not by their order in the verdict
+    assert revision_similarity(_verdict(entry, cap), _verdict(cap, entry)) == 1.0
+    assert revision_similarity(_verdict(entry, cap), _verdict(entry, (cap[0], "Liability is capped at two years of rent."))) < 1.0
+    assert revision_similarity(_verdict(entry), _verdict(cap)) < 0.5
+    assert revision_similarity("No changes needed.", "Still no changes.") == 1.0
+
+
+def test_merge_rounds():
+    assert merge_rounds("Red Report", ["only"]) == "only"
+    merged = merge_rounds("Red Report", ["first", "second"])
+    assert merged.index("Round 1") < merged.index("first") < merged.index("Round 2") < merged.index("second")
+
+
+@pytest.mark.parametrize("convergence, rounds", [(0.9, 2), (1.01, 4)])
+def test_debate_stops_once_the_verdict_converges(mock_llm, checkpoints, tmp_path, convergence, rounds):
+    # The mock answers every round with the same verdict, so round 2 already matches round 1
+    war_room = WarRoomCrew(CONTRACT, "Tenant", "Landlord", output_dir=tmp_path, max_rounds=4, convergence=convergence)
+    results = war_room.run()
+    assert [entry["round"] for entry in war_room.rounds] == list(range(1, rounds + 1))
+    assert war_room.rounds[-1]["converged"] == (rounds < 4)
+    assert f"verdict-round{rounds}" in war_room.metrics.stages and f"verdict-round{rounds + 1}" not in war_room.metrics.stages
+    assert f"Round {rounds}" in results["shark_report"]
@@ -0,0 +1,59 @@
+"""Offline checks for extraction.iter_pdf_pages, in-process and on the process pool."""
+import pytest
+import extraction
+from benchmarks import make_synthetic_pdf
+from cache import DiskCache
+from extraction import PARALLEL_THRESHOLD, get_pdf_text, iter_pdf_pages
+
+PAGES = PARALLEL_THRESHOLD + 4
+
+
+@pytest.fixture(scope="module")
+def pdf():
+    return make_synthetic_pdf(PAGES)
+
+
+@pytest.fixture
+def page_cache(tmp_path, monkeypatch):
+    store = DiskCache("pdf_pages", directory=tmp_path)
+    monkeypatch.setattr(extraction, "page_cache", store)
+    return store
+
+
+def test_serial_and_pool_extraction_agree(pdf):
+    serial = list(iter_pdf_pages(pdf, workers=1, use_cache=False))
+    pooled = list(iter_pdf_pages(pdf, workers=2, use_cache=False))
+    assert [n for n, _ in serial] == list(range(PAGES))
+    assert pooled == serial
+    assert serial[3][1].startswith("4.1 ")
+
+
+def test_page_budget_caps_the_pages(pdf):
+    pages = list(iter_pdf_pages(pdf, page_budget=5, workers=1, use_cache=False))
+    assert [n for n, _ in pages] == [0, 1, 2, 3, 4]
+    assert get_pdf_text(pdf, page_budget=5, workers=1, use_cache=False) == "\n".join(text for _, text in pages)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_pages_are_cached_once_per_document(pdf, page_cache, workers):
+    first = list(iter_pdf_pages(pdf, workers=workers))
+    assert len(page_cache) == PAGES
+    assert (page_cache.hits, page_cache.misses) == (0, PAGES)
+    assert list(iter_pdf_pages(pdf, workers=workers)) == first
+    assert page_cache.hits == PAGES
+
+
+def test_pages_read_before_stopping_early_are_cached(pdf, page_cache):
+    pages = iter_pdf_pages(pdf, workers=1)
+    for _ in range(3):
+        next(pages)
+    pages.close()
+    assert len(page_cache) == 3
+
+
+def test_sources(pdf, tmp_path):
+    path = tmp_path / "contract.pdf"
+    path.write_bytes(pdf)
+    assert extraction.read_pdf_bytes(str(path)) == pdf
+    with open(path, "rb") as f:
+        assert extraction.read_pdf_bytes(f) == pdf
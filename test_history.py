@@ -0,0 +1,65 @@
+"""Offline checks for the searchable run history."""
+import pytest
+import history
+from history import RunHistory
+
+ANALYSIS = {"roles": {"contract_type": "Lease"}, "risk_scores": {"liability_score": 70}}
+
+
+def _record(store, title, verdict, clause=None, shark="", playbook=""):
+    changes = [{"original": clause, "revised": f"{clause} (capped)", "explanation": "Cap it."}] if clause else []
+    results = {"shark_report": shark, "shield_report": "", "final_verdict": verdict, "negotiation_strategy": playbook}
+    return store.record(title, f"Contract text of {title}", ANALYSIS, results, changes, {"totals": {}}, "Professional", {"rounds": []})
+
+
+@pytest.fixture
+def store(tmp_path):
+    return RunHistory("history", directory=str(tmp_path))
+
+
+def test_record_and_get(store):
+    run_id = _record(store, "lease.pdf", "Fair overall.", clause="The Tenant pays all repairs.")
+    run = store.get(run_id)
+    assert run["title"] == "lease.pdf" and run["contract_type"] == "Lease"
+    assert run["results"]["final_verdict"] == "Fair overall."
+    assert run["clause_changes"][0]["original"] == "The Tenant pays all repairs."
+    assert run["details"] == {"rounds": []} and run["analysis"] == ANALYSIS
+    assert store.get(run_id + 1) is None
+    assert store.count() == 1
+
+
+def test_search_stems_ranks_and_highlights(store):
+    assert store.fts
+    in_reports = _record(store, "nda.pdf", "Mutual NDA.", shark="Push for indemnification.")
+    in_clauses = _record(store, "lease.pdf", "Two fixes.", clause="The Tenant gives broad indemnities.")
+    _record(store, "sow.pdf", "Payment terms only.", clause="Invoices are due in 90 days.")
+    # "indemnity" finds "indemnities" and, as a prefix, "indemnification"; clause changes rank first
+    found = store.search("indemnity")
+    assert [run["id"] for run in found] == [in_clauses, in_reports]
+    assert "**" in found[0]["snippet"]
+    # Every word has to match, and FTS syntax in the query is just text
+    assert [run["id"] for run in store.search("tenant indemnities")] == [in_clauses]
+    assert store.search('indemn* OR "payment') == store.search("indemn payment") == []
+    assert len(store.search("  ")) == 3
+
+
+def test_search_since(store, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(history.time, "time", lambda: now[0])
+    _record(store, "old.pdf", "Liability is unlimited.")
+    now[0] = 2000.0
+    new = _record(store, "new.pdf", "Liability is capped.")
+    assert [run["id"] for run in store.search("liability", since=1500.0)] == [new]
+    assert [run["id"] for run in store.recent(since=1500.0)] == [new]
+    assert len(store.search("liability")) == 2
+
+
+def test_like_fallback_without_fts(store):
+    store.fts = False
+    lease = _record(store, "lease.pdf", "Two fixes.", clause="The Tenant gives broad indemnities.")
+    sow = _record(store, "sow.pdf", "Payment terms only.")
+    assert [run["id"] for run in store.search("tenant indemnit")] == [lease]
+    assert [run["id"] for run in store.search("SOW")] == [sow]
+    assert store.search("zebra") == []
+    store.clear()
+    assert store.count() == 0 and store.search("tenant") == []
@@ -0,0 +1,70 @@
+"""Offline checks for the background job queue."""
+import io
+import json
+import os
+import shutil
+import sys
+import threading
+import pytest
+from jobs import JobManager
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    # bind() installs the stdout router; keep it off pytest's own stream
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+    manager = JobManager(max_workers=1, jobs_dir=str(tmp_path / "runs"), max_run_dirs=3)
+    yield manager
+    manager.shutdown()
+
+
+def _saved(job):
+    with open(os.path.join(job.output_dir, "job.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_finished_job_keeps_its_result_and_log(manager):
+    def negotiate(job):
+        print("Shark is drafting")
+        return {"final_verdict": "ok"}
+
+    job = manager.submit(negotiate)
+    assert job.wait(5) and not job.is_alive()
+    assert job.status == "done" and job.result == {"final_verdict": "ok"}
+    assert "Shark is drafting" in "\n".join(job.log.tail(10))
+    with open(os.path.join(job.output_dir, "run.log"), encoding="utf-8") as f:
+        assert "Shark is drafting" in f.read()
+    assert _saved(job)["status"] == "done" and _saved(job)["finished_at"] is not None
+
+
+def test_failed_job_records_the_error(manager):
+    def negotiate(job):
+        raise RuntimeError("model unavailable")
+
+    job = manager.submit(negotiate)
+    assert job.wait(5)
+    assert job.status == "failed" and job.error == "RuntimeError: model unavailable"
+    assert job.finished_at is not None and _saved(job)["status"] == "failed"
+
+
+def test_job_without_a_usable_directory_still_finishes(manager):
+    release = threading.Event()
+    blocker = manager.submit(lambda job: release.wait(5))
+    job = manager.submit(lambda job: "never runs")
+    # The run.log can't be opened once the job's directory is gone
+    shutil.rmtree(job.output_dir)
+    release.set()
+    assert blocker.wait(5) and job.wait(5)
+    assert job.status == "failed" and job.error.startswith("FileNotFoundError")
+    assert job.result is None and job.finished_at is not None
+
+
+def test_oldest_run_directories_are_pruned(manager):
+    for i, name in enumerate(["old1", "old2", "old3"]):
+        os.makedirs(os.path.join(manager.jobs_dir, name))
+        os.utime(os.path.join(manager.jobs_dir, name), (1000 + i, 1000 + i))
+    job = manager.submit(lambda job: None)
+    assert job.wait(5)
+    manager._prune()
+    # Three directories kept: the job still in memory and the two newest others
+    assert sorted(os.listdir(manager.jobs_dir)) == sorted(["old2", "old3", job.id])
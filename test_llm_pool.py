@@ -0,0 +1,16 @@
+"""Offline checks for the shared rate limiter in llm_pool."""
+import pytest
+from llm_pool import TokenBucket
+
+
+def test_token_bucket():
+    bucket = TokenBucket(capacity=100, refill_per_second=10)
+    assert bucket.reserve(60) == 0.0
+    # 20 tokens short at 10 per second
+    assert bucket.reserve(60) == pytest.approx(2.0, abs=0.01)
+    bucket.adjust(-50)
+    assert bucket.reserve(0) == 0.0
+    # Requests above capacity are clamped to it
+    assert bucket.reserve(1000) == pytest.approx(7.0, abs=0.01)
+    bucket.drain(1)
+    assert bucket.reserve(0) == pytest.approx(8.0, abs=0.01)
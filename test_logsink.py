@@ -0,0 +1,82 @@
+"""Offline checks for the per-session log sinks and the stdout router."""
+import io
+import sys
+import threading
+import logsink
+from logsink import LogSink, StdoutRouter, bind, propagate
+
+
+def fresh_stdout(monkeypatch):
+    """A fresh sys.stdout for logsink.install() to wrap, restored after the test.
+    Set from the test body: pytest reinstalls its own capture between fixture setup and the test."""
+    fallback = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", fallback)
+    return fallback
+
+
+def test_sink_tags_strips_and_bounds_lines():
+    sink = LogSink(max_lines=3)
+    sink.write("\x1b[32mThe Shark is thinking\x1b[0m\npartial")
+    assert sink.tail(5) == ["**🦈 SHARK:** The Shark is thinking"]
+    sink.write(" line\n\n")
+    assert sink.tail(5)[-1] == "**🤖** partial line"
+    for n in range(5):
+        sink.write(f"Mediator {n}\n")
+    assert len(sink.tail(10)) == 3 and sink.total_lines == 7
+    assert sink.tail(1) == ["**⚖️ MEDIATOR:** Mediator 4"]
+
+
+def test_mirror_gets_the_untrimmed_log():
+    mirror = io.StringIO()
+    sink = LogSink(max_lines=1, mirror=mirror)
+    sink.write("one\ntwo\n")
+    assert mirror.getvalue() == "one\ntwo\n" and sink.tail(5) == ["**🤖** two"]
+
+
+def test_bound_threads_write_to_their_own_sink(monkeypatch):
+    stdout = fresh_stdout(monkeypatch)
+    sinks = [LogSink(), LogSink()]
+    barrier = threading.Barrier(2)
+
+    def session(sink, name):
+        with bind(sink):
+            barrier.wait()
+            for n in range(50):
+                print(f"{name} {n}")
+
+    threads = [threading.Thread(target=session, args=(sink, name)) for sink, name in zip(sinks, ("alpha", "beta"))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print("unbound")
+
+    assert isinstance(sys.stdout, StdoutRouter) and sys.stdout.sinks == {}
+    assert sinks[0].total_lines == sinks[1].total_lines == 50
+    assert not any("beta" in line for line in sinks[0].tail(100))
+    assert stdout.getvalue() == "unbound\n"
+
+
+def test_nested_bind_restores_the_outer_sink(monkeypatch):
+    stdout = fresh_stdout(monkeypatch)
+    outer, inner = LogSink(), LogSink()
+    with bind(outer):
+        with bind(inner):
+            print("inner")
+        print("outer")
+    with bind(None):
+        print("nowhere special")
+    assert inner.tail(5) == ["**🤖** inner"] and outer.tail(5) == ["**🤖** outer"]
+    assert stdout.getvalue() == "nowhere special\n"
+
+
+def test_propagate_carries_the_sink_to_pool_threads(monkeypatch):
+    stdout = fresh_stdout(monkeypatch)
+    sink = LogSink()
+    with bind(sink):
+        task = propagate(lambda: print("from the pool"))
+    thread = threading.Thread(target=task)
+    thread.start()
+    thread.join()
+    assert sink.tail(5) == ["**🤖** from the pool"]
+    assert logsink.current_sink() is None
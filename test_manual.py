@@ -1,3 +1,7 @@
+from dotenv import load_dotenv
+
+load_dotenv()
+
 from crew import WarRoomCrew
 
 # 1. Simulate a LEASE Scenario (Not a Freelance one!)
@@ -0,0 +1,30 @@
+"""Offline checks for the word-level redline diff."""
+from redline import diff_words, redline_html, similarity
+
+
+def test_diff_words_covers_both_texts():
+    a = "the tenant shall pay rent monthly".split()
+    b = "the tenant must pay the rent monthly".split()
+    ops = diff_words(a, b)
+    assert ops[0][1] == 0 and ops[0][3] == 0
+    assert ops[-1][2] == len(a) and ops[-1][4] == len(b)
+    for (_, _, a1, _, b1), (_, a0, _, b0, _) in zip(ops, ops[1:]):
+        assert (a1, b1) == (a0, b0)
+    rebuilt = []
+    for tag, i1, i2, j1, j2 in ops:
+        rebuilt.extend(b[j1:j2] if tag != "equal" else a[i1:i2])
+    assert rebuilt == b
+
+
+def test_similarity():
+    assert similarity("a b c d", "a b c d") == 1.0
+    assert similarity("", "") == 1.0
+    assert similarity("a b c d", "w x y z") == 0.0
+    assert similarity("a b c d", "a b c e") == 0.75
+
+
+def test_redline_html_marks_changes_and_escapes():
+    html = redline_html("Pay <b>all</b> fees within 30 days.", "Pay <b>all</b> fees within 60 days.")
+    assert "&lt;b&gt;all&lt;/b&gt;" in html and "<b>" not in html
+    assert "<del" in html and "<ins" in html
+    assert redline_html("same text here", "same text here") == "same text here"
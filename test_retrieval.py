@@ -0,0 +1,19 @@
+"""Offline checks for the BM25 clause retriever."""
+from retrieval import ClauseRetriever
+
+CONTRACT = """1. The Tenant shall pay rent of $1,000 on the first day of each month by bank transfer.
+
+2. The Landlord may enter the premises at any time without notice for inspections or repairs.
+
+3. The Tenant shall indemnify and hold the Landlord harmless from any claim, with unlimited liability.
+
+4. Either party may end this lease by giving two months written notice to the other party."""
+
+
+def test_retrieval_search():
+    retriever = ClauseRetriever(CONTRACT)
+    assert retriever.search("landlord entry inspections")[0][0] == 1
+    assert retriever.search("indemnify liability")[0][0] == 2
+    assert retriever.search("zebra") == []
+    assert retriever.format_results("rent bank transfer").startswith("[Clause 1] 1. The Tenant shall pay rent")
+    assert "4 clauses" in retriever.outline()
@@ -0,0 +1,45 @@
+"""Offline checks for applying the Mediator's clause changes to the contract."""
+from clause_parser import parse_verdict
+from revision import apply_revisions
+
+CONTRACT = """1. The Tenant shall pay rent of $1,000 on the first day of each month by bank transfer.
+
+2. The Landlord may enter the premises at any time without notice for inspections or repairs.
+
+3. The Tenant shall indemnify and hold the Landlord harmless from any claim, with unlimited liability.
+
+4. Either party may end this lease by giving two months written notice to the other party."""
+
+VERDICT = """The lease is mostly fair, with two clauses to fix.
+
+---CLAUSE_COMPARISON_START---
+ORIGINAL: The Landlord may enter the premises at any time without notice for inspections or repairs.
+REVISED: The Landlord may enter the premises with 24 hours written notice for inspections or repairs.
+EXPLANATION: Tenants are entitled to quiet enjoyment.
+---CLAUSE_COMPARISON_END---
+
+---CLAUSE_COMPARISON_START---
+ORIGINAL: The Tenant shall indemnify and hold the Landlord harmless from any claim, with unlimited liability.
+REVISED: The Tenant shall indemnify the Landlord for claims caused by the Tenant's negligence.
+---CLAUSE_COMPARISON_END---
+
+Closing remarks."""
+
+
+def test_apply_revisions():
+    changes, _ = parse_verdict(VERDICT)
+    revised = apply_revisions(CONTRACT, changes)
+    assert len(revised.applied) == 2 and not revised.unmatched
+    assert "with 24 hours written notice" in revised.text
+    assert "at any time without notice" not in revised.text
+    assert "caused by the Tenant's negligence" in revised.text
+    # Clauses nobody revised are untouched
+    assert "1. The Tenant shall pay rent of $1,000" in revised.text
+    assert revised.text.endswith("two months written notice to the other party.")
+    assert "".join(original for original, _, _ in revised.segments) == CONTRACT
+
+
+def test_apply_revisions_reports_unmatched():
+    change = parse_verdict(VERDICT)[0][0]._replace(original="The Licensee owes royalties on every unit sold worldwide.")
+    revised = apply_revisions(CONTRACT, [change])
+    assert revised.unmatched == [change] and revised.text == CONTRACT
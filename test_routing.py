@@ -0,0 +1,47 @@
+"""Offline checks for per-stage model routes and budgets."""
+import pytest
+from langchain_core.messages import HumanMessage
+from llm_pool import LLMPool
+from prompts import build_contract_prefix, count_tokens
+from routing import Route, StageBudget, load_routes, stage_of
+
+CONTRACT = """1. The Tenant shall pay rent of $1,000 on the first day of each month by bank transfer.
+
+2. The Landlord may enter the premises at any time without notice for inspections or repairs.
+
+3. The Tenant shall indemnify and hold the Landlord harmless from any claim, with unlimited liability.
+
+4. Either party may end this lease by giving two months written notice to the other party."""
+
+
+def test_load_routes(monkeypatch):
+    monkeypatch.setenv("OPENAI_MODEL_NAME", "gpt-4o-mini")
+    routes = load_routes({"default": {"fallback": "gpt-4.1-nano"}, "verdict": {"model": "gpt-4o", "max_tokens": 500}})
+    assert routes["attack"] == Route("gpt-4o-mini", "gpt-4.1-nano")
+    assert routes["verdict"] == Route("gpt-4o", "gpt-4.1-nano", None, 500)
+    monkeypatch.setenv("WARROOM_MODEL_ROUTES", '{"review": {"model": "gpt-4o"}}')
+    assert load_routes()["review"].model == "gpt-4o"
+
+
+def test_load_routes_rejects_unknown_keys():
+    with pytest.raises(TypeError):
+        load_routes({"verdict": {"model": "gpt-4o", "max_token": 500}})
+
+
+def test_stage_budget():
+    assert stage_of("attack[3]") == "attack" and stage_of("verdict-update") == "verdict"
+    budget = StageBudget(max_tokens=1000)
+    assert not budget.exceeded(1000)
+    budget.spend(600)
+    assert budget.exceeded(401) and not budget.exceeded(400)
+    assert not StageBudget().exceeded(10 ** 9)
+
+
+def test_stage_budget_counts_the_contract_prefix():
+    prefix = build_contract_prefix(CONTRACT * 20)
+    budget = StageBudget(max_tokens=count_tokens(prefix, "gpt-4o"))
+    llm = LLMPool().chat(model="gpt-4o", fallback="gpt-4o-mini", budget=budget, api_key="offline", contract_prefix=prefix)
+    messages = [HumanMessage(content="Rule on the contract.")]
+    assert llm._prompt_tokens(messages) == count_tokens(prefix, "gpt-4o") + count_tokens("Rule on the contract.", "gpt-4o")
+    # The task alone fits the budget; with the contract it does not
+    assert budget.exceeded(llm._prompt_tokens(messages)) and not budget.exceeded(count_tokens("Rule on the contract.", "gpt-4o"))
@@ -0,0 +1,31 @@
+"""Offline checks for the local clause risk screener."""
+from screener import score_clauses, screen_contract, top_risks
+
+CONTRACT = """1. The Tenant shall pay rent of $1,000 on the first day of each month by bank transfer.
+
+2. The Landlord may enter the premises at any time without notice for inspections or repairs.
+
+3. The Tenant shall indemnify and hold the Landlord harmless from any claim, with unlimited liability.
+
+4. Either party may end this lease by giving two months written notice to the other party."""
+
+
+def test_screener_ranks_risky_clauses():
+    risks = score_clauses(CONTRACT)
+    assert len(risks) == 4
+    assert risks[0].score == 0 and risks[3].score == 0
+    assert "entry_without_notice" in risks[1].signals
+    assert risks[2].signals[0] == "unlimited_liability" and "indemnity" in risks[2].signals
+    assert [risk.index for risk in top_risks(CONTRACT, top_k=1)] == [2]
+
+
+def test_screen_contract():
+    screening = screen_contract(CONTRACT, top_k=2)
+    assert [risk.index for risk in screening.selected] == [1, 2]
+    assert screening.clauses == 4 and 0 < screening.kept_share < 1
+    assert "may enter the premises at any time" in screening.text
+    assert "NOT SHOWN: 2 clauses" in screening.text
+    # Routine clauses are summarised even with room to spare; a contract with nothing to leave out is kept whole
+    assert "NOT SHOWN: 2 clauses" in screen_contract(CONTRACT, top_k=10).text
+    risky = CONTRACT.split("\n\n")[1:3]
+    assert screen_contract("\n\n".join(risky), top_k=10).text == "\n\n".join(risky)
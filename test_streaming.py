@@ -0,0 +1,54 @@
+"""Offline checks for the live stage buffers."""
+import threading
+from streaming import StageStreamHandler, StreamBuffer, stage_keys, stage_view, visible_text
+
+
+def test_buffer_snapshot_and_completion():
+    buffer = StreamBuffer()
+    buffer.append("attack", "Red ")
+    buffer.append("attack", "Report")
+    version, view = buffer.snapshot()
+    assert view == {"attack": ("Red Report", False)} and version == 2
+    buffer.complete("attack", "Final Red Report")
+    assert buffer.snapshot() == (3, {"attack": ("Final Red Report", True)})
+
+
+def test_concurrent_appends_are_all_kept():
+    buffer = StreamBuffer()
+    workers = [threading.Thread(target=lambda: [buffer.append("verdict", "x") for _ in range(1000)]) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert buffer.snapshot()[1]["verdict"][0] == "x" * 4000
+
+
+def test_handler_separates_model_calls():
+    buffer = StreamBuffer()
+    handler = StageStreamHandler(buffer, "defense")
+    handler.on_chat_model_start({}, [[]])
+    handler.on_llm_new_token("Thought")
+    handler.on_chat_model_start({}, [[]])
+    handler.on_llm_new_token("Final Answer: keep the cap")
+    text = buffer.snapshot()[1]["defense"][0]
+    assert text == "\n\nThought\n\nFinal Answer: keep the cap"
+    assert visible_text(text) == "keep the cap"
+
+
+def test_stage_keys_order_chunks_and_rounds_by_number():
+    snapshot = {key: ("", False) for key in ("attack[10]", "attack", "attack[2]", "attack-round3", "attack-round2", "defense[1]")}
+    assert stage_keys(snapshot, "attack") == ["attack", "attack[2]", "attack-round2", "attack-round3", "attack[10]"]
+
+
+def test_stage_keys_ignore_unknown_suffixes():
+    snapshot = {key: ("", False) for key in ("attack", "attack-roundup", "attack[a]", "attackers", "attack[2]x", "verdict-update")}
+    assert stage_keys(snapshot, "attack") == ["attack"]
+    assert stage_keys(snapshot, "verdict") == []
+
+
+def test_stage_view_combines_buffers():
+    snapshot = {"attack[1]": ("Thought: hm\nFinal Answer: one", True), "attack[2]": ("two", False)}
+    text, done, total = stage_view(snapshot, "attack")
+    assert (done, total) == (1, 2)
+    assert text.startswith("**attack[1]**") and "two ▌" in text
+    assert stage_view({"verdict": ("Final Answer: ok", True)}, "verdict") == ("ok", 1, 1)
@@ -0,0 +1,83 @@
+"""Offline checks for telemetry.RunMetrics and its LangChain callback."""
+import json
+import uuid
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+from prompts import count_tokens
+from telemetry import RunMetrics, estimate_cost
+
+
+def test_estimate_cost():
+    assert estimate_cost("gpt-4o", 1_000_000, 1_000_000) == pytest.approx(12.50)
+    # Dated snapshots are priced as the longest known prefix
+    assert estimate_cost("gpt-4o-mini-2024-07-18", 1_000_000, 0) == pytest.approx(0.15)
+    assert estimate_cost("some-local-model", 1000, 1000) == 0.0
+    assert estimate_cost(None, 1000, 1000) == 0.0
+
+
+def test_record_adds_numbers_and_overwrites_the_rest():
+    metrics = RunMetrics(contract="lease.pdf")
+    metrics.record("attack", prompt_tokens=100, completion_tokens=20, llm_calls=1, model="gpt-4o")
+    metrics.record("attack", prompt_tokens=50, llm_calls=1, model="gpt-4o-mini", cached=True)
+    metrics.record("verdict", prompt_tokens=10, cost_usd=0.5)
+    attack = metrics.stages["attack"]
+    assert (attack["prompt_tokens"], attack["completion_tokens"], attack["llm_calls"]) == (150, 20, 2)
+    assert attack["model"] == "gpt-4o-mini" and attack["cached"] is True
+    summary = metrics.summary()
+    assert summary["contract"] == "lease.pdf"
+    assert summary["totals"]["prompt_tokens"] == 160 and summary["totals"]["cost_usd"] == 0.5
+
+
+def _call(metrics, label, model, response, prefix_tokens=0):
+    handler = metrics.handler(label, model)
+    run_id = uuid.uuid4()
+    handler.on_chat_model_start({}, [[HumanMessage(content="Attack the indemnity clause.")]], run_id=run_id,
+                                invocation_params={"contract_prefix_tokens": prefix_tokens})
+    handler.on_llm_end(response, run_id=run_id)
+
+
+def test_callback_prices_the_reported_usage():
+    metrics = RunMetrics()
+    response = LLMResult(generations=[[ChatGeneration(message=AIMessage(content="ok"))]],
+                         llm_output={"token_usage": {"prompt_tokens": 1000, "completion_tokens": 200}})
+    _call(metrics, "attack", "gpt-4o", response, prefix_tokens=500)
+    stage = metrics.stages["attack"]
+    # Reported usage already includes the contract prefix
+    assert (stage["prompt_tokens"], stage["completion_tokens"], stage["llm_calls"]) == (1000, 200, 1)
+    assert stage["cost_usd"] == pytest.approx(estimate_cost("gpt-4o", 1000, 200))
+    assert stage["ttft_s"] is not None
+
+
+def test_callback_estimates_streamed_calls_with_the_contract_prefix():
+    metrics = RunMetrics()
+    response = LLMResult(generations=[[ChatGeneration(message=AIMessage(content="The clause is one-sided."))]])
+    _call(metrics, "defense", "gpt-4o-mini", response, prefix_tokens=500)
+    stage = metrics.stages["defense"]
+    assert stage["prompt_tokens"] == count_tokens("Attack the indemnity clause.", "gpt-4o-mini") + 500
+    assert stage["completion_tokens"] == count_tokens("The clause is one-sided.", "gpt-4o-mini")
+    assert stage["cost_usd"] == pytest.approx(estimate_cost("gpt-4o-mini", stage["prompt_tokens"], stage["completion_tokens"]))
+
+
+def test_fallback_calls_are_priced_as_the_fallback_model():
+    metrics = RunMetrics()
+    handler = metrics.handler("verdict", "gpt-4o")
+    run_id = uuid.uuid4()
+    handler.on_chat_model_start({}, [[HumanMessage(content="Rule.")]], run_id=run_id)
+    handler.on_model_fallback("gpt-4o-mini")
+    handler.on_llm_end(LLMResult(generations=[[ChatGeneration(message=AIMessage(content="ok"))]],
+                                 llm_output={"token_usage": {"prompt_tokens": 1000, "completion_tokens": 0}}), run_id=run_id)
+    stage = metrics.stages["verdict"]
+    assert (stage["model"], stage["fallback_model"], stage["fallback_calls"]) == ("gpt-4o", "gpt-4o-mini", 1)
+    assert stage["cost_usd"] == pytest.approx(estimate_cost("gpt-4o-mini", 1000, 0))
+
+
+def test_write_appends_one_json_line_per_run(tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    for _ in range(2):
+        metrics = RunMetrics()
+        metrics.record("attack", prompt_tokens=5)
+        metrics.write(str(path))
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(records) == 2 and records[0]["run_id"] != records[1]["run_id"]
+    assert records[1]["totals"]["prompt_tokens"] == 5
@@ -0,0 +1,33 @@
+"""Offline checks for the contract version diff and the profile results are reused under."""
+import pytest
+import crew
+from crew import WarRoomCrew
+from routing import load_routes
+from telemetry import RunMetrics
+from versions import diff_versions
+
+
+def test_diff_versions():
+    old = ["clause one text", "clause two text", "clause three text", "clause four text"]
+    new = ["clause one text", "clause two   text", "clause three EDITED", "clause four text", "clause five text"]
+    diff = diff_versions(old, new)
+    assert diff.unchanged == 3  # whitespace changes don't count
+    assert diff.changed == ["clause three EDITED", "clause five text"]
+    assert diff.removed == ["clause three text"]
+    assert diff.changed_share == pytest.approx(2 / 5)
+    assert diff_versions([], []).changed_share == 0.0
+
+
+def test_profile_covers_every_option_that_changes_the_output(monkeypatch, tmp_path):
+    monkeypatch.setenv("OPENAI_MODEL_NAME", "gpt-4o-mini")
+    monkeypatch.delenv("WARROOM_MODEL_ROUTES", raising=False)
+    scores = {"liability_score": 10, "financial_risk": 20, "unfairness_score": 5}
+    profile = WarRoomCrew("contract", risk_scores=scores).profile
+    # Where and how the run executes doesn't matter...
+    assert WarRoomCrew("other text", risk_scores=scores, output_dir=str(tmp_path), metrics=RunMetrics(), max_parallel=1).profile == profile
+    # ...what the agents are asked, and with which prompts and models, does
+    assert WarRoomCrew("contract", risk_scores={**scores, "liability_score": 90}).profile != profile
+    assert WarRoomCrew("contract", risk_scores=scores, max_rounds=3).profile != profile
+    assert WarRoomCrew("contract", risk_scores=scores, routes=load_routes({"verdict": {"model": "gpt-4o"}})).profile != profile
+    monkeypatch.setattr(crew, "STAGE_VERSION", crew.STAGE_VERSION + "-next")
+    assert WarRoomCrew("contract", risk_scores=scores).profile != profile
@@ -1,19 +1,43 @@
-from langchain_openai import ChatOpenAI
-from langchain.prompts import PromptTemplate
 import os
 import difflib
 import json
-from dotenv import load_dotenv
+from cache import DiskCache, content_hash, normalize_text
+from redline import redline_html
+from clause_parser import parse_verdict
+from routing import StageBudget, load_routes
 
-load_dotenv()
+# Bump whenever the analysis prompt below changes so stale cache entries are ignored
+ANALYSIS_PROMPT_VERSION = "1"
 
-def analyze_contract(contract_text):
+analysis_cache = DiskCache("analysis")
+
+def analyze_contract(contract_text, metrics=None):
     """
     Combines Role Identification AND Risk Assessment into a single API call 
     to save tokens and reduce latency.
+    Results are cached on disk, keyed by the normalized contract text,
+    model name and prompt version, so repeat uploads skip the LLM entirely.
+    Pass a telemetry.RunMetrics as `metrics` to meter the call as the "analysis" stage.
     """
-    llm = ChatOpenAI(
-        model=os.getenv("OPENAI_MODEL_NAME"),
+    snippet = contract_text[:10000]
+    route = load_routes()["analysis"]
+    model_name = route.model
+    cache_key = content_hash(normalize_text(snippet), model_name, ANALYSIS_PROMPT_VERSION)
+
+    cached = analysis_cache.get(cache_key)
+    if cached is not None:
+        if metrics is not None:
+            metrics.record("analysis", cached=True, model=model_name)
+        return cached
+
+    # LangChain and the OpenAI SDK are only imported on a cache miss, so the UI can import this module cheaply
+    from langchain.prompts import PromptTemplate
+    from llm_pool import get_pool
+
+    llm = get_pool().chat(
+        model=model_name,
+        fallback=route.fallback,
+        budget=StageBudget(route.max_seconds, route.max_tokens),
         api_key=os.getenv("OPENAI_API_KEY"),
         temperature=0
     )
@@ -60,9 +84,13 @@ def analyze_contract(contract_text):
         input_variables=["text_snippet"]
     )
     
-    # Process first 3000 characters
+    # Process first 10000 characters
     chain = prompt | llm
-    response = chain.invoke({"text_snippet": contract_text[:10000]})
+    if metrics is not None:
+        with metrics.stage("analysis"):
+            response = chain.invoke({"text_snippet": snippet}, config={"callbacks": [metrics.handler("analysis", model_name)]})
+    else:
+        response = chain.invoke({"text_snippet": snippet})
     
     # Default Safe Fallback
     default_response = {
@@ -83,7 +111,10 @@ def analyze_contract(contract_text):
 
     try:
         clean_json = response.content.replace("```json", "").replace("```", "").strip()
-        return json.loads(clean_json)
+        result = json.loads(clean_json)
+        # Only successful parses are cached; the fallback should be retried next time
+        analysis_cache.set(cache_key, result)
+        return result
     except Exception as e:
         print(f"JSON Parsing Error: {e}")
         return default_response
@@ -92,33 +123,33 @@ def analyze_contract(contract_text):
 def get_redline_html(original_text, revised_text):
     """
     Generates a 'Track Changes' style HTML visualization.
-    - Deleted words: Red strikethrough
-    - Added words: Green bold
+    - Deleted words: <del> (red strikethrough)
+    - Added words: <ins> (green bold)
+    Styling lives in redline.REDLINE_CSS; see redline.py for the diff itself.
     """
-    # Split into words for granular comparison
-    a = original_text.split()
-    b = revised_text.split()
-    
-    matcher = difflib.SequenceMatcher(None, a, b)
-    html_output = []
+    return redline_html(original_text, revised_text)
+
+
+def compare_clause_revisions(verdicts, similarity=0.8):
+    """
+    Aligns clause revisions from several verdicts (e.g. one per Shark persona)
+    by their ORIGINAL text. Returns one row per original clause:
+    {"original": ..., "revisions": {label: {"revised": ..., "explanation": ...}}}
+    """
+    rows = []
+    for label, verdict_text in verdicts.items():
+        changes, _ = parse_verdict(verdict_text)
+        for change in changes:
+            key = " ".join(change.original.lower().split())
+            row = next(
+                (r for r in rows if difflib.SequenceMatcher(None, r["_key"], key).ratio() >= similarity),
+                None
+            )
+            if row is None:
+                row = {"_key": key, "original": change.original, "revisions": {}}
+                rows.append(row)
+            row["revisions"].setdefault(label, {"revised": change.revised, "explanation": change.explanation})
 
-    for opcode, a0, a1, b0, b1 in matcher.get_opcodes():
-        if opcode == 'equal':
-            # No change: just append the words
-            html_output.append(" ".join(a[a0:a1]))
-        elif opcode == 'insert':
-            # Addition: Green background/text
-            added_text = " ".join(b[b0:b1])
-            html_output.append(f"<span style='color: #4caf50; background-color: #1b3320; font-weight: bold; padding: 2px 4px; border-radius: 4px;'>{added_text}</span>")
-        elif opcode == 'delete':
-            # Deletion: Red strikethrough
-            deleted_text = " ".join(a[a0:a1])
-            html_output.append(f"<span style='color: #ff4b4b; text-decoration: line-through; background-color: #331b1b; opacity: 0.8; padding: 2px 4px;'>{deleted_text}</span>")
-        elif opcode == 'replace':
-            # Replacement: Show deletion then addition
-            deleted_text = " ".join(a[a0:a1])
-            added_text = " ".join(b[b0:b1])
-            html_output.append(f"<span style='color: #ff4b4b; text-decoration: line-through; background-color: #331b1b; opacity: 0.8; padding: 2px 4px;'>{deleted_text}</span>")
-            html_output.append(f"<span style='color: #4caf50; background-color: #1b3320; font-weight: bold; padding: 2px 4px; border-radius: 4px;'>{added_text}</span>")
-            
-    return " ".join(html_output)
\ No newline at end of file
+    for row in rows:
+        del row["_key"]
+    return rows
@@ -0,0 +1,151 @@
+"""
+Contract version store for incremental re-negotiation.
+
+Every negotiated contract is recorded with its clause hashes and, per negotiation
+profile (persona + roles), the results of the run. When a counterparty sends back
+a new version, find_previous() recognises it by the clauses it shares with a stored
+version, and diff_versions() tells the crew which clauses were edited, added or
+removed, so only those go back through the agents.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import NamedTuple
+from cache import CACHE_DIR, content_hash, normalize_text
+from clauses import clause_hash, split_clauses
+from redline import opcodes
+
+# A stored version counts as an earlier draft if at least this share of the new clauses is unchanged
+MIN_SHARED_CLAUSES = 0.5
+# Only the most recent versions are compared against a new upload
+MAX_CANDIDATES = 200
+
+
+class ClauseDiff(NamedTuple):
+    changed: list   # clauses of the new version that were edited or added
+    removed: list   # clauses of the old version that are gone or were replaced
+    unchanged: int  # clauses carried over verbatim
+
+    @property
+    def changed_share(self):
+        total = len(self.changed) + self.unchanged
+        return len(self.changed) / total if total else 0.0
+
+
+def diff_versions(old_clauses, new_clauses):
+    """Clause-level diff, aligned on clause hashes (whitespace changes don't count as edits)."""
+    a = [clause_hash(c) for c in old_clauses]
+    b = [clause_hash(c) for c in new_clauses]
+    changed, removed, unchanged = [], [], 0
+    for tag, i1, i2, j1, j2 in opcodes(a, b):
+        if tag == "equal":
+            unchanged += i2 - i1
+            continue
+        removed.extend(old_clauses[i1:i2])
+        changed.extend(new_clauses[j1:j2])
+    return ClauseDiff(changed, removed, unchanged)
+
+
+def negotiation_profile(user_role, counter_party, aggression_mode, **options):
+    """
+    Results are only reused for the same sides, the same Shark persona and the same
+    run `options` (every WarRoomCrew setting that changes what the agents produce).
+    """
+    return content_hash(user_role, counter_party, aggression_mode, *(f"{key}={options[key]!r}" for key in sorted(options)))
+
+
+class VersionStore:
+    """SQLite-backed, like cache.DiskCache, but versions are kept until deleted."""
+    def __init__(self, name="versions", directory=None):
+        directory = directory or CACHE_DIR
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{name}.sqlite3")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS versions (
+                contract_hash TEXT PRIMARY KEY,
+                lineage TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                clauses TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS results (
+                contract_hash TEXT NOT NULL,
+                profile TEXT NOT NULL,
+                results TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (contract_hash, profile)
+            )"""
+        )
+        self._conn.commit()
+
+    def find_previous(self, contract_text, profile):
+        """
+        The stored version (with results for `profile`) that shares the most clauses
+        with `contract_text`, as a dict with lineage, version, clauses and results, or None.
+        """
+        new_hashes = {clause_hash(c) for c in split_clauses(contract_text)}
+        if not new_hashes:
+            return None
+        with self._lock:
+            rows = self._conn.execute(
+                """SELECT v.contract_hash, v.lineage, v.version, v.clauses, r.results
+                   FROM versions v JOIN results r ON r.contract_hash = v.contract_hash
+                   WHERE r.profile = ? ORDER BY v.created_at DESC LIMIT ?""",
+                (profile, MAX_CANDIDATES)
+            ).fetchall()
+
+        best, best_rank = None, None
+        for contract_hash, lineage, version, clauses_json, results_json in rows:
+            clauses = json.loads(clauses_json)
+            shared = len(new_hashes & {clause_hash(c) for c in clauses}) / len(new_hashes)
+            if shared < MIN_SHARED_CLAUSES or (best_rank is not None and (shared, version) <= best_rank):
+                continue
+            best_rank = (shared, version)
+            best = {
+                "contract_hash": contract_hash,
+                "lineage": lineage,
+                "version": version,
+                "clauses": clauses,
+                "results": json.loads(results_json)
+            }
+        return best
+
+    def record(self, contract_text, profile, results, previous=None):
+        """Stores a negotiated version (as the next version of `previous`'s lineage) and its results."""
+        contract_hash = content_hash(normalize_text(contract_text))
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT version FROM versions WHERE contract_hash = ?", (contract_hash,)).fetchone()
+            if row is None:
+                if previous and previous["contract_hash"] != contract_hash:
+                    lineage = previous["lineage"]
+                    version = self._conn.execute("SELECT MAX(version) FROM versions WHERE lineage = ?", (lineage,)).fetchone()[0] + 1
+                else:
+                    lineage, version = uuid.uuid4().hex[:12], 1
+                self._conn.execute(
+                    "INSERT INTO versions (contract_hash, lineage, version, clauses, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (contract_hash, lineage, version, json.dumps(split_clauses(contract_text)), now)
+                )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (contract_hash, profile, results, created_at) VALUES (?, ?, ?, ?)",
+                (contract_hash, profile, json.dumps(results), now)
+            )
+            self._conn.commit()
+            return row[0] if row else version
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+            self._conn.execute("DELETE FROM versions")
+            self._conn.commit()
+
+
+version_store = VersionStore()